@@ -0,0 +1,100 @@
+import argparse
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import torch
+
+# --- Project Paths ---
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(SCRIPT_DIR)
+sys.path.append(BACKEND_DIR)
+
+DATA_DIR = os.path.join(SCRIPT_DIR, 'data', 'processed')
+
+from src.scoring_engine import SynapseScoringEngine, CROSS_ENCODER_MODEL
+from src.inference_pool import CrossEncoderPool
+
+
+def parse_config(text):
+    """'4x2' -> (4 workers, 2 threads each). '0x8' = in-process with 8 torch threads."""
+    workers, threads = text.lower().split('x')
+    return int(workers), int(threads)
+
+
+def make_requests(engine, count, candidates, seed):
+    """Synthetic rerank requests: a random user skill set against a random slice of jobs."""
+    rng = random.Random(seed)
+    all_skills = sorted({s for skills in engine.master_df['skills_list'] for s in skills})
+    requests = []
+    for _ in range(count):
+        user_text = ' '.join(rng.sample(all_skills, rng.randint(3, min(25, len(all_skills)))))
+        rows = engine.master_df.sample(n=min(candidates, len(engine.master_df)), random_state=rng.randint(0, 10**6))
+        requests.append((user_text, list(rows['skill_token_ids'])))
+    return requests
+
+
+def run_config(engine, requests, concurrency):
+    latencies = []
+
+    def one(request):
+        start = time.perf_counter()
+        _, stats = engine._predict_pairs(*request)
+        latencies.append(time.perf_counter() - start)
+        return stats['pairs']
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        pairs = sum(executor.map(one, requests))
+    elapsed = time.perf_counter() - start
+    return {
+        "requests_per_s": len(requests) / elapsed,
+        "pairs_per_s": pairs / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "p95_ms": float(np.percentile(latencies, 95) * 1000),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cross-encoder throughput vs. worker/thread configuration.")
+    parser.add_argument('--configs', nargs='+', default=['0x1', '0x4', '1x4', '2x2', '4x2', '8x2'],
+                        help="WORKERSxTHREADS entries; 0 workers runs in-process.")
+    parser.add_argument('--requests', type=int, default=64)
+    parser.add_argument('--candidates', type=int, default=30, help="Pairs per request (Stage 2 reranks the top 30).")
+    parser.add_argument('--concurrency', type=int, default=8, help="Concurrent client threads.")
+    parser.add_argument('--model', default=CROSS_ENCODER_MODEL)
+    args = parser.parse_args()
+
+    engine = SynapseScoringEngine(
+        data_path=os.path.join(DATA_DIR, 'market_intelligence_db.csv'),
+        aspirational_data_path=os.path.join(DATA_DIR, 'aspirational_roles.csv'),
+        career_path_model_path=os.path.join(DATA_DIR, 'career_path_model.json'),
+        cross_encoder_model=args.model
+    )
+    requests = make_requests(engine, args.requests, args.candidates, seed=42)
+    default_threads = torch.get_num_threads()
+
+    results = []
+    for text in args.configs:
+        workers, threads = parse_config(text)
+        engine.close()
+        if workers > 0:
+            torch.set_num_threads(default_threads)
+            engine.inference_pool = CrossEncoderPool(args.model, workers, threads)
+        else:
+            torch.set_num_threads(threads)
+        run_config(engine, requests[:min(8, len(requests))], args.concurrency)  # warm-up
+        results.append((workers, threads, run_config(engine, requests, args.concurrency)))
+    engine.close()
+
+    print(f"\n{args.requests} requests x {args.candidates} pairs, {args.concurrency} client threads, {os.cpu_count()} cores")
+    print(f"{'workers':>8} {'threads':>8} {'req/s':>8} {'pairs/s':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    for workers, threads, r in results:
+        print(f"{workers:>8} {threads:>8} {r['requests_per_s']:>8.1f} {r['pairs_per_s']:>9.0f} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,226 @@
+"""
+Offline builder for the LLM-generated datasets:
+
+  synthetic_roles -> data/processed/aspirational_roles.csv
+  career_paths    -> data/processed/career_path_model.json
+  skill_graphs    -> skill_graph column of data/processed/market_intelligence_db.csv
+
+Jobs run one after another; within a job, items are generated concurrently on
+`--workers` threads under a token-bucket limiter sized to the Gemini RPM/TPM
+quota instead of fixed sleeps. Every finished item is appended to a checkpoint
+file, so a crashed run picks up where it stopped; outputs are written to a temp
+file and swapped in atomically.
+
+Usage (from Backend/src):
+    python build_datasets.py                       # all jobs
+    python build_datasets.py career_paths --rpm 15 --tpm 1000000 --workers 4
+    python build_datasets.py skill_graphs --fresh  # ignore old checkpoints
+"""
+import argparse
+import ast
+import json
+import os
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+from dotenv import load_dotenv
+
+# --- Project Paths ---
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(SCRIPT_DIR)
+GENAI_PROJECT_DIR = os.path.join(os.path.dirname(BACKEND_DIR), 'googlegenaiproject')
+sys.path.append(SCRIPT_DIR)
+sys.path.append(GENAI_PROJECT_DIR) # Shared LLM client lives in googlegenaiproject/app/genai.py
+
+ENV_PATH = os.path.join(BACKEND_DIR, '.env')
+DATA_DIR = os.path.join(SCRIPT_DIR, 'data', 'processed')
+CHECKPOINT_DIR = os.path.join(DATA_DIR, '.build')
+
+from app.genai import get_llm_client
+from app.ratelimit import TokenBucketLimiter
+from gemini_utils import create_skill_graph, generate_career_path_probabilities
+
+MODEL_NAME = 'models/gemini-pro-latest'
+
+
+# --- Atomic writes & checkpoints ---
+
+def atomic_write(path, write_fn):
+    """Calls write_fn(tmp_path) and renames the result over path."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.' + os.path.basename(path), suffix='.tmp')
+    os.close(fd)
+    try:
+        write_fn(tmp_path)
+        os.chmod(tmp_path, 0o644)  # mkstemp creates 0600 files
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+class Checkpoint:
+    """Append-only JSONL of finished items: one {"key": ..., "result": ...} per line."""
+
+    def __init__(self, job_name, fresh=False):
+        os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+        self.path = os.path.join(CHECKPOINT_DIR, f"{job_name}.jsonl")
+        self._lock = threading.Lock()
+        self.results = {}
+        if fresh and os.path.exists(self.path):
+            os.remove(self.path)
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn last line from a crash
+                    self.results[entry['key']] = entry['result']
+
+    def record(self, key, result):
+        with self._lock:
+            self.results[key] = result
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({"key": key, "result": result}) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+
+# --- Jobs ---
+# Each job lists (key, callable) work items and writes its output from the
+# checkpointed results.
+
+def synthetic_roles_items(model):
+    from generate_synthetic_data import ASPIRATIONAL_ROLES, generate_synthetic_profile
+    return [
+        (f"{item['company']}|{item['role']}", lambda item=item: generate_synthetic_profile(item['company'], item['role'], model))
+        for item in ASPIRATIONAL_ROLES
+    ]
+
+
+def synthetic_roles_write(results):
+    from generate_synthetic_data import ASPIRATIONAL_ROLES
+    order = [f"{item['company']}|{item['role']}" for item in ASPIRATIONAL_ROLES]
+    df_synthetic = pd.DataFrame([results[key] for key in order if key in results])
+    path = os.path.join(DATA_DIR, 'aspirational_roles.csv')
+    atomic_write(path, lambda tmp: df_synthetic.to_csv(tmp, index=False))
+    return path
+
+
+def career_paths_items(model):
+    df = pd.read_csv(os.path.join(DATA_DIR, 'market_intelligence_db.csv'))
+    return [
+        (role, lambda role=role: generate_career_path_probabilities(role, model))
+        for role in df['Standard_Title'].dropna().unique()
+    ]
+
+
+def career_paths_write(results):
+    df = pd.read_csv(os.path.join(DATA_DIR, 'market_intelligence_db.csv'))
+    career_path_model = {role: results[role] for role in df['Standard_Title'].dropna().unique() if role in results}
+
+    def write(tmp):
+        with open(tmp, 'w') as f:
+            json.dump(career_path_model, f, indent=2)
+
+    path = os.path.join(DATA_DIR, 'career_path_model.json')
+    atomic_write(path, write)
+    return path
+
+
+def _skill_graph_key(row):
+    return f"{row['CompanyName']}|{row['Standard_Title']}"
+
+
+def skill_graphs_items(model):
+    df = pd.read_csv(os.path.join(DATA_DIR, 'market_intelligence_db.csv'))
+    items = []
+    for _, row in df.iterrows():
+        skills = ast.literal_eval(row['skills_list']) if isinstance(row['skills_list'], str) and row['skills_list'].startswith('[') else []
+        items.append((
+            _skill_graph_key(row),
+            lambda skills=skills, title=row['Standard_Title']: create_skill_graph(skills, title, model),
+        ))
+    return items
+
+
+def skill_graphs_write(results):
+    path = os.path.join(DATA_DIR, 'market_intelligence_db.csv')
+    df = pd.read_csv(path)
+    for idx, row in df.iterrows():
+        graph = results.get(_skill_graph_key(row))
+        if graph:
+            df.at[idx, 'skill_graph'] = str(graph)  # same repr the scoring engine literal_evals
+    atomic_write(path, lambda tmp: df.to_csv(tmp, index=False))
+    return path
+
+
+JOBS = {
+    'synthetic_roles': (synthetic_roles_items, synthetic_roles_write),
+    'career_paths': (career_paths_items, career_paths_write),
+    'skill_graphs': (skill_graphs_items, skill_graphs_write),
+}
+
+
+def run_job(name, model, workers, fresh=False):
+    items_fn, write_fn = JOBS[name]
+    checkpoint = Checkpoint(name, fresh=fresh)
+    items = items_fn(model)
+    pending = [(key, fn) for key, fn in items if key not in checkpoint.results]
+    print(f"\n[{name}] {len(items)} items, {len(items) - len(pending)} already checkpointed, {len(pending)} to build")
+
+    failed = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(fn): key for key, fn in pending}
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"[{name}] {key} failed: {e}")
+                result = None
+            if result:
+                checkpoint.record(key, result)
+                print(f"[{name}] done: {key}")
+            else:
+                failed.append(key)
+
+    path = write_fn(checkpoint.results)
+    print(f"[{name}] wrote {len(checkpoint.results)}/{len(items)} items to {path}")
+    if failed:
+        print(f"[{name}] {len(failed)} items failed; re-run to retry only those.")
+    return not failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build LLM-generated datasets under the Gemini quota.")
+    parser.add_argument('jobs', nargs='*', help=f"Any of: {', '.join(JOBS)} (default: all)")
+    parser.add_argument('--rpm', type=float, default=float(os.getenv("GEMINI_RPM", "10")), help="Requests per minute quota.")
+    parser.add_argument('--tpm', type=float, default=float(os.getenv("GEMINI_TPM", "250000")), help="Tokens per minute quota.")
+    parser.add_argument('--workers', type=int, default=4, help="Concurrent in-flight LLM calls.")
+    parser.add_argument('--fresh', action='store_true', help="Discard checkpoints and rebuild everything.")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.jobs if name not in JOBS]
+    if unknown:
+        parser.error(f"unknown job(s): {', '.join(unknown)}")
+
+    load_dotenv(dotenv_path=ENV_PATH)
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key and not get_llm_client().offline:
+        raise ValueError(f"GEMINI_API_KEY not found. Looked for .env file at: {ENV_PATH}")
+
+    client = get_llm_client(api_key=api_key)
+    client.rate_limiter = TokenBucketLimiter(rpm=args.rpm, tpm=args.tpm)
+    ok = True
+    for name in args.jobs or list(JOBS):
+        ok = run_job(name, client.for_agent(name, MODEL_NAME), args.workers, fresh=args.fresh) and ok
+        client.log_stats(name)
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,20 +1,22 @@
-import google.generativeai as genai
 import pandas as pd
 import json
 import os
-import time
+import sys
 from dotenv import load_dotenv
 
+# Shared LLM client lives in googlegenaiproject/app/genai.py
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'googlegenaiproject'))
+from app.genai import get_llm_client
+
 load_dotenv()
 
 # Configure your Gemini API key
 api_key = os.getenv("GEMINI_API_KEY")
 
-if not api_key:
+if not api_key and not get_llm_client().offline:
     raise ValueError("GEMINI_API_KEY not found. Please set it in your .env file.")
-genai.configure(api_key= api_key)
 
-model = genai.GenerativeModel('models/gemini-pro-latest')
+model = get_llm_client(api_key=api_key).for_agent("synthetic_roles", 'models/gemini-pro-latest')
 
 ASPIRATIONAL_ROLES = [
     {"company": "Google", "role": "Software Engineer"},
@@ -85,20 +87,6 @@ def generate_synthetic_profile(company, role, model):
 
 # --- Main script ---
 if __name__ == '__main__':
-    all_profiles = []
-    
-    for item in ASPIRATIONAL_ROLES:
-        print(f"Generating profile for {item['role']} at {item['company']}...")
-        profile = generate_synthetic_profile(item['company'], item['role'], model)
-        if profile:
-            all_profiles.append(profile)
-        time.sleep(10)
-            
-    df_synthetic = pd.DataFrame(all_profiles)
-    
-    output_path = 'data/processed/aspirational_roles.csv'
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    df_synthetic.to_csv(output_path, index=False)
-    
-    print(f"\nSynthetic dataset created and saved to {output_path}")
-    print(df_synthetic.head())
\ No newline at end of file
+    # Concurrent, rate-limited and resumable build: see build_datasets.py
+    from build_datasets import main
+    sys.exit(main(['synthetic_roles']))
@@ -0,0 +1,187 @@
+import itertools
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+# How often the collector checks that the worker processes are still alive
+LIVENESS_INTERVAL_S = 1.0
+# Upper bound on waiting for one batch from the pool
+POOL_RESULT_TIMEOUT_S = 120
+
+
+def _worker_main(worker_idx, model_name, num_threads, task_queue, result_queue):
+    """
+    Worker process: pins torch to a few threads, loads its own cross-encoder copy
+    and scores padded batches until it receives None.
+    """
+    import torch
+    from sentence_transformers import CrossEncoder
+
+    torch.set_num_threads(num_threads)
+    torch.set_num_interop_threads(1)
+    model = CrossEncoder(model_name, device='cpu')
+    model.eval()
+    result_queue.put(("ready", worker_idx, os.getpid()))
+
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+        task_id, features = task
+        try:
+            with torch.inference_mode():
+                tensors = {key: torch.from_numpy(value) for key, value in features.items()}
+                logits = model.activation_fn(model.model(**tensors, return_dict=True).logits)
+            result_queue.put(("result", task_id, logits[:, 0].float().numpy()))
+        except Exception as e:
+            result_queue.put(("error", task_id, repr(e)))
+
+
+class CrossEncoderPool:
+    """
+    A fixed set of worker processes, each with its own cross-encoder and a small
+    torch thread budget. Batches go to the worker with the fewest in-flight
+    tokens, so one long request cannot pile up behind another on a busy worker.
+    """
+
+    def __init__(self, model_name, workers=2, threads_per_worker=2, ready_timeout=300):
+        print(f"Starting cross-encoder pool: {workers} workers x {threads_per_worker} threads...")
+        ctx = mp.get_context('spawn')
+        self.workers = workers
+        self.threads_per_worker = threads_per_worker
+        self._result_queue = ctx.Queue()
+        self._task_queues = [ctx.Queue() for _ in range(workers)]
+        self._processes = [
+            ctx.Process(
+                target=_worker_main,
+                args=(idx, model_name, threads_per_worker, self._task_queues[idx], self._result_queue),
+                daemon=True,
+            )
+            for idx in range(workers)
+        ]
+        for proc in self._processes:
+            proc.start()
+
+        self._lock = threading.Lock()
+        self._task_ids = itertools.count()
+        self._pending = {}  # task_id -> (future, worker_idx, tokens)
+        self._inflight_tokens = [0] * workers
+        self._completed_batches = [0] * workers
+        self._completed_tokens = [0] * workers
+        self._ready = threading.Semaphore(0)
+        self._dead = set()  # indices of workers that exited
+        self._closing = False
+
+        self._collector = threading.Thread(target=self._collect_results, daemon=True)
+        self._collector.start()
+
+        deadline = time.monotonic() + ready_timeout
+        ready = 0
+        while ready < workers:
+            if self._ready.acquire(timeout=LIVENESS_INTERVAL_S):
+                ready += 1
+                continue
+            if self._dead or time.monotonic() > deadline:
+                reason = f"worker(s) {sorted(self._dead)} exited" if self._dead else f"not ready after {ready_timeout}s"
+                self.close()
+                raise Exception(f"Error: cross-encoder pool failed to start: {reason}")
+        print("Cross-encoder pool ready.")
+
+    def _collect_results(self):
+        # Liveness runs on its own clock: a busy result queue must not delay
+        # failing the futures of a worker that died mid-batch
+        next_check = time.monotonic() + LIVENESS_INTERVAL_S
+        while True:
+            now = time.monotonic()
+            if now >= next_check:
+                self._check_workers()
+                next_check = now + LIVENESS_INTERVAL_S
+            try:
+                message = self._result_queue.get(timeout=max(0.0, next_check - now))
+            except queue.Empty:
+                continue
+            if message is None:
+                break
+            kind, key, payload = message
+            if kind == "ready":
+                self._ready.release()
+                continue
+            with self._lock:
+                if key not in self._pending:
+                    continue  # already failed by _check_workers
+                future, worker_idx, tokens = self._pending.pop(key)
+                self._inflight_tokens[worker_idx] -= tokens
+                self._completed_batches[worker_idx] += 1
+                self._completed_tokens[worker_idx] += tokens
+            if kind == "result":
+                future.set_result(payload)
+            else:
+                future.set_exception(RuntimeError(f"Cross-encoder worker {worker_idx} failed: {payload}"))
+
+    def _check_workers(self):
+        """Fails the futures of any worker process that died, so callers don't wait forever."""
+        if self._closing:
+            return
+        for worker_idx, proc in enumerate(self._processes):
+            if worker_idx not in self._dead and not proc.is_alive():
+                print(f"Warning: cross-encoder worker {worker_idx} exited (code {proc.exitcode})")
+                self._fail_pending(RuntimeError(f"Cross-encoder worker {worker_idx} exited"), worker_idx)
+
+    def _fail_pending(self, error, worker_idx=None):
+        with self._lock:
+            if worker_idx is not None:
+                self._dead.add(worker_idx)
+                self._inflight_tokens[worker_idx] = 0
+            failed = [
+                task_id for task_id, (_, idx, _) in self._pending.items()
+                if worker_idx is None or idx == worker_idx
+            ]
+            futures = [self._pending.pop(task_id)[0] for task_id in failed]
+        for future in futures:
+            future.set_exception(error)
+
+    def submit(self, features):
+        """
+        Queues one padded batch (dict of numpy arrays) on the least-loaded worker.
+        Returns a Future resolving to the raw scores for that batch.
+        """
+        tokens = int(np.asarray(features['input_ids']).size)
+        future = Future()
+        with self._lock:
+            live = [idx for idx in range(self.workers) if idx not in self._dead]
+            if not live or self._closing:
+                raise RuntimeError("Cross-encoder pool has no live workers")
+            worker_idx = min(live, key=lambda idx: self._inflight_tokens[idx])
+            task_id = next(self._task_ids)
+            self._inflight_tokens[worker_idx] += tokens
+            self._pending[task_id] = (future, worker_idx, tokens)
+        self._task_queues[worker_idx].put((task_id, features))
+        return future
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "dead_workers": sorted(self._dead),
+                "threads_per_worker": self.threads_per_worker,
+                "inflight_tokens": list(self._inflight_tokens),
+                "completed_batches": list(self._completed_batches),
+                "completed_tokens": list(self._completed_tokens),
+            }
+
+    def close(self):
+        self._closing = True
+        for task_queue in self._task_queues:
+            task_queue.put(None)
+        for proc in self._processes:
+            proc.join(timeout=10)
+            if proc.is_alive():
+                proc.terminate()
+        self._result_queue.put(None)
+        self._collector.join(timeout=10)
+        self._fail_pending(RuntimeError("Cross-encoder pool closed"))
@@ -1,14 +1,17 @@
 from flask import Flask, request, jsonify
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
 from dotenv import load_dotenv
 import os
 import sys
-import google.generativeai as genai
+import threading
 
 # --- NEW: Project Paths ---
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 BACKEND_DIR = os.path.dirname(SCRIPT_DIR)
+GENAI_PROJECT_DIR = os.path.join(os.path.dirname(BACKEND_DIR), 'googlegenaiproject')
 sys.path.append(BACKEND_DIR) # Add Backend/ to Python path
+sys.path.append(GENAI_PROJECT_DIR) # Shared LLM client lives in googlegenaiproject/app/genai.py
 
 # Absolute paths
 ENV_PATH = os.path.join(BACKEND_DIR, '.env')
@@ -17,9 +20,22 @@ DATA_DIR = os.path.join(SCRIPT_DIR, 'data', 'processed')
 # --- Local Module Imports ---
 from src.scoring_engine import SynapseScoringEngine
 from src.gemini_utils import enrich_skills_with_gemini
+from app.genai import get_llm_client
+from app.serialization import dumps_text, loads
 
 # --- 1. App Initialization ---
+class OrjsonProvider(JSONProvider):
+    """jsonify() / request.get_json() through the shared orjson layer (app/serialization.py)."""
+
+    def dumps(self, obj, **kwargs):
+        return dumps_text(obj)
+
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 CORS(app, resources={r"/api/v1/*": {"origins": "*"}}) 
 
 # --- 2. One-Time Setup: Load Models and Engine ---
@@ -27,19 +43,36 @@ print("--- Initializing Synapse Application Server ---")
 load_dotenv(dotenv_path=ENV_PATH) # Use absolute path
 api_key = os.getenv("GEMINI_API_KEY")
 
-if not api_key:
+if not api_key and not get_llm_client().offline:
     raise ValueError(f"GEMINI_API_KEY not found. Looked for .env file at: {ENV_PATH}")
-genai.configure(api_key=api_key)
 
-gemini_model = genai.GenerativeModel('models/gemini-pro-latest')
+# Cached model handle on the shared client (retries + per-agent counters)
+gemini_model = get_llm_client(api_key=api_key).for_agent("enrichment", 'models/gemini-pro-latest')
+
+# Optional process pool for cross-encoder reranking (0 = run in the server process)
+inference_workers = int(os.getenv("SYNAPSE_INFERENCE_WORKERS", "0"))
+threads_per_worker = int(os.getenv("SYNAPSE_THREADS_PER_WORKER", "2"))
+
+# The engine (and its worker pool) is built on first use, never at import time:
+# spawned pool workers re-import this module as __mp_main__ and must not start a pool of their own.
+scoring_engine = None
+_engine_lock = threading.Lock()
+
 
-# Load engine with absolute paths
-scoring_engine = SynapseScoringEngine(
-    data_path=os.path.join(DATA_DIR, 'market_intelligence_db.csv'),
-    aspirational_data_path=os.path.join(DATA_DIR, 'aspirational_roles.csv'),
-    career_path_model_path=os.path.join(DATA_DIR, 'career_path_model.json')
-)
-print("--- Initialization Complete. Server is ready. ---")
+def get_scoring_engine():
+    global scoring_engine
+    with _engine_lock:
+        if scoring_engine is None:
+            # Load engine with absolute paths
+            scoring_engine = SynapseScoringEngine(
+                data_path=os.path.join(DATA_DIR, 'market_intelligence_db.csv'),
+                aspirational_data_path=os.path.join(DATA_DIR, 'aspirational_roles.csv'),
+                career_path_model_path=os.path.join(DATA_DIR, 'career_path_model.json'),
+                inference_workers=inference_workers,
+                threads_per_worker=threads_per_worker
+            )
+            print("--- Initialization Complete. Server is ready. ---")
+        return scoring_engine
 
 
 # --- 3. API Endpoints ---
@@ -87,7 +120,7 @@ def generate_career_plan():
             return jsonify({"error": "No skills provided or extracted."}), 400
 
         # 3. Run the Scoring Engine
-        recommendation_payload = scoring_engine.get_tiered_recommendations(
+        recommendation_payload = get_scoring_engine().get_tiered_recommendations(
             all_user_skills, 
             user_experience,
             user_certifications,
@@ -120,7 +153,7 @@ def gap_analysis():
         if 'user_skills' not in data or 'dream_role' not in data:
             return jsonify({"error": "Missing 'user_skills' or 'dream_role'."}), 400
         
-        gap_result = scoring_engine.perform_gap_analysis(
+        gap_result = get_scoring_engine().perform_gap_analysis(
             data['user_skills'], 
             data['dream_role'], 
             data.get('dream_company')
@@ -137,4 +170,6 @@ def gap_analysis():
 
 
 if __name__ == '__main__':
-    app.run(debug=True, port=5000)
\ No newline at end of file
+    get_scoring_engine()
+    # The debug reloader runs this file again in a child process, which would start a second pool
+    app.run(debug=True, port=5000, use_reloader=inference_workers == 0)
@@ -1,10 +1,17 @@
 import pandas as pd
 import numpy as np
+import torch
 from sklearn.preprocessing import MinMaxScaler
 from sentence_transformers import SentenceTransformer, util, CrossEncoder
 import os
 import ast 
 import json
+import threading
+
+try:
+    from .inference_pool import CrossEncoderPool, POOL_RESULT_TIMEOUT_S
+except ImportError:
+    from inference_pool import CrossEncoderPool, POOL_RESULT_TIMEOUT_S
 
 # Domain mapping for Q9 (work_energy)
 DOMAIN_MAP = {
@@ -14,10 +21,25 @@ DOMAIN_MAP = {
     'collaborating': ['Business Analyst', 'Product Engineer', 'Technical Support']
 }
 
+# Cross-encoder batching: pairs are sorted by token length and cut into buckets
+# of at most BUCKET_MAX_PAIRS, starting a new bucket once the longest pair would
+# exceed the shortest one by more than BUCKET_LENGTH_RATIO.
+BUCKET_MAX_PAIRS = 32
+BUCKET_LENGTH_RATIO = 1.25
+
+BI_ENCODER_MODEL = 'all-MiniLM-L6-v2'
+CROSS_ENCODER_MODEL = 'cross-encoder/ms-marco-MiniLM-L-6-v2'
+
 class SynapseScoringEngine:
     def __init__(self, data_path='data/processed/market_intelligence_db.csv', 
                  aspirational_data_path='data/processed/aspirational_roles.csv',
-                 career_path_model_path='data/processed/career_path_model.json'):
+                 career_path_model_path='data/processed/career_path_model.json',
+                 cross_encoder_model=CROSS_ENCODER_MODEL,
+                 inference_workers=0, threads_per_worker=2):
+        """
+        inference_workers > 0 runs cross-encoder batches on a CrossEncoderPool of
+        that many processes, each limited to threads_per_worker torch threads.
+        """
         
         print("Initializing Synapse Scoring Engine...")
         
@@ -59,11 +81,17 @@ class SynapseScoringEngine:
 
         # --- 4. Load AI Models ---
         print("Loading Sentence Transformer (Bi-Encoder) model...")
-        self.bi_encoder = SentenceTransformer('all-MiniLM-L6-v2')
+        self.bi_encoder = SentenceTransformer(BI_ENCODER_MODEL)
         print("Loading Cross-Encoder model...")
-        self.cross_encoder = CrossEncoder('cross-encoder/ms-marco-MiniLM-L-6-v2')
+        self.cross_encoder = CrossEncoder(cross_encoder_model)
+        # Fast tokenizers are not safe to call from several request threads at once
+        self._tokenizer_lock = threading.Lock()
+        self.inference_pool = None
+        if inference_workers > 0:
+            self.inference_pool = CrossEncoderPool(cross_encoder_model, inference_workers, threads_per_worker)
         
         self._prepare_data()
+        self._pretokenize_job_corpus()
         print("Engine ready.")
 
     def _prepare_data(self):
@@ -79,6 +107,107 @@ class SynapseScoringEngine:
         self.master_df['final_demand_score'] = (weights_demand['cmp'] * self.master_df['norm_cmp']) + (weights_demand['fgm'] * self.master_df['norm_fgm'])
         print("Data preparation complete.")
 
+    def _pretokenize_job_corpus(self):
+        """Tokenizes the job side of every cross-encoder pair once, at load time."""
+        tokenizer = self.cross_encoder.tokenizer
+        skill_texts = self.master_df['skills_list'].apply(lambda skills: ' '.join(skills))
+        context_texts = self.master_df['Standard_Title'] + " " + skill_texts
+        self.master_df['skill_token_ids'] = tokenizer(skill_texts.tolist(), add_special_tokens=False)['input_ids']
+        self.master_df['context_token_ids'] = tokenizer(context_texts.fillna('').tolist(), add_special_tokens=False)['input_ids']
+        print(f"Pre-tokenized {len(self.master_df)} job texts for the cross-encoder.")
+
+    def _length_buckets(self, lengths):
+        """Groups pair indices into batches of similar token length."""
+        bucket = []
+        for idx in np.argsort(lengths, kind='stable'):
+            if bucket and (len(bucket) >= BUCKET_MAX_PAIRS or lengths[idx] > lengths[bucket[0]] * BUCKET_LENGTH_RATIO):
+                yield bucket
+                bucket = []
+            bucket.append(idx)
+        if bucket:
+            yield bucket
+
+    def _pad_batch(self, encodings):
+        """
+        Pads prepare_for_model outputs into numpy arrays, as tokenizer.pad would.
+        Done by hand: tokenizer.pad warns on fast tokenizers, and its __call__
+        cannot take pre-tokenized id pairs.
+        """
+        tokenizer = self.cross_encoder.tokenizer
+        width = max(len(e['input_ids']) for e in encodings)
+        batch = {}
+        for key in encodings[0].keys():
+            pad_value = tokenizer.pad_token_id if key == 'input_ids' else 0
+            rows = []
+            for e in encodings:
+                padding = [pad_value] * (width - len(e[key]))
+                rows.append(padding + list(e[key]) if tokenizer.padding_side == 'left' else list(e[key]) + padding)
+            batch[key] = np.array(rows, dtype=np.int64)
+        return batch
+
+    def _predict_pairs(self, query_text, job_token_ids):
+        """
+        Scores one query against pre-tokenized job texts.
+        Same logits as cross_encoder.predict, but only the query is tokenized and
+        batches are length-bucketed so padding stays minimal.
+        Returns (scores, token_stats).
+        """
+        tokenizer = self.cross_encoder.tokenizer
+        with self._tokenizer_lock:
+            query_ids = tokenizer(query_text, add_special_tokens=False)['input_ids']
+            encoded = [tokenizer.prepare_for_model(query_ids, job_ids, truncation=True) for job_ids in job_token_ids]
+        lengths = np.array([len(e['input_ids']) for e in encoded])
+
+        scores = np.zeros(len(encoded), dtype=np.float32)
+        stats = {
+            "pairs": len(encoded),
+            "batches": 0,
+            "tokens": int(lengths.sum()),
+            "padded_tokens": 0,
+            # What predict()'s unsorted batches would have padded to
+            "unbucketed_padded_tokens": sum(
+                len(chunk) * int(chunk.max())
+                for chunk in (lengths[i:i + BUCKET_MAX_PAIRS] for i in range(0, len(lengths), BUCKET_MAX_PAIRS))
+            ),
+        }
+
+        buckets = list(self._length_buckets(lengths))
+        batches = [self._pad_batch([encoded[i] for i in bucket]) for bucket in buckets]
+        for bucket in buckets:
+            stats["batches"] += 1
+            stats["padded_tokens"] += len(bucket) * int(lengths[bucket].max())
+
+        if self.inference_pool is not None:
+            # Fan the buckets out across worker processes, then gather in order
+            futures = [self.inference_pool.submit(dict(features)) for features in batches]
+            for bucket, future in zip(buckets, futures):
+                scores[bucket] = future.result(timeout=POOL_RESULT_TIMEOUT_S)
+            return scores, stats
+
+        model = self.cross_encoder.model
+        self.cross_encoder.eval()
+        with torch.inference_mode():
+            for bucket, features in zip(buckets, batches):
+                tensors = {key: torch.from_numpy(value).to(model.device) for key, value in features.items()}
+                logits = self.cross_encoder.activation_fn(model(**tensors, return_dict=True).logits)
+                scores[bucket] = logits[:, 0].float().cpu().numpy()
+        return scores, stats
+
+    def _report_token_stats(self, label, stats_list):
+        """Sums per-call token stats, logs the token-level work for one request and returns the totals."""
+        totals = {key: sum(s[key] for s in stats_list) for key in stats_list[0]}
+        totals["padding_ratio"] = round(totals["padded_tokens"] / totals["tokens"], 3) if totals["tokens"] else 0.0
+        print(f"[{label}] cross-encoder work: {totals['pairs']} pairs in {totals['batches']} batches, "
+              f"{totals['tokens']} tokens, {totals['padded_tokens']} padded "
+              f"(vs {totals['unbucketed_padded_tokens']} unbucketed)")
+        return totals
+
+    def close(self):
+        """Stops the inference pool's worker processes, if any."""
+        if self.inference_pool is not None:
+            self.inference_pool.close()
+            self.inference_pool = None
+
     ### NEW: Sigmoid function to normalize scores
     def _sigmoid(self, x):
         """Squashes any number to a 0-1 range."""
@@ -166,26 +295,23 @@ class SynapseScoringEngine:
              return {"error": "No top candidates found after initial scoring."}
 
         # 6. STAGE 2: REFINE
+        # Job-side token IDs were cached at load; only the user side is tokenized here.
         user_skills_text = ' '.join(user_skills)
-        job_skills_texts = top_candidates['skills_list'].apply(lambda skills: ' '.join(skills))
-        skill_sentence_pairs = [[user_skills_text, job_text] for job_text in job_skills_texts]
         
         ### MODIFIED: Apply sigmoid to normalize the score
-        cross_encoder_skill_scores = self.cross_encoder.predict(skill_sentence_pairs, show_progress_bar=False)
+        cross_encoder_skill_scores, skill_stats = self._predict_pairs(user_skills_text, top_candidates['skill_token_ids'])
         top_candidates['skill_overlap_score'] = self._sigmoid(cross_encoder_skill_scores)
+        token_stats = [skill_stats]
         
         user_experience_text = " ".join(user_experience_summary) + " " + " ".join(user_certifications)
         if not user_experience_text.strip():
             top_candidates['experience_score'] = 0.0
         else:
-            job_context_texts = top_candidates.apply(
-                lambda row: row['Standard_Title'] + " " + " ".join(row['skills_list']),
-                axis=1
-            )
-            exp_sentence_pairs = [[user_experience_text, job_text] for job_text in job_context_texts]
             ### MODIFIED: Apply sigmoid to normalize the score
-            cross_encoder_exp_scores = self.cross_encoder.predict(exp_sentence_pairs, show_progress_bar=False)
+            cross_encoder_exp_scores, exp_stats = self._predict_pairs(user_experience_text, top_candidates['context_token_ids'])
             top_candidates['experience_score'] = self._sigmoid(cross_encoder_exp_scores)
+            token_stats.append(exp_stats)
+        self._report_token_stats("recommendations", token_stats)
 
 
         # 7. Final Trajectory Score Calculation
@@ -243,11 +369,11 @@ class SynapseScoringEngine:
         skill_gap = self._get_skill_gap(user_skills, target_skills)
         
         user_skills_text = ' '.join(user_skills)
-        target_skills_text = ' '.join(target_skills)
         
         ### MODIFIED: Apply sigmoid to normalize the score
-        raw_match_score = self.cross_encoder.predict([[user_skills_text, target_skills_text]])[0]
-        normalized_score = self._sigmoid(raw_match_score)
+        raw_scores, match_stats = self._predict_pairs(user_skills_text, [target_role['skill_token_ids']])
+        self._report_token_stats("gap_analysis", [match_stats])
+        normalized_score = self._sigmoid(raw_scores[0])
 
         return {
             "dream_role": f"{target_role['Standard_Title']} at {target_role['CompanyName']}",
@@ -2,13 +2,14 @@ import json
 import os
 import sys
 from dotenv import load_dotenv
-import google.generativeai as genai
 import time  # <-- IMPORT TIME
 
 # --- Project Paths ---
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 BACKEND_DIR = os.path.dirname(SCRIPT_DIR)
+GENAI_PROJECT_DIR = os.path.join(os.path.dirname(BACKEND_DIR), 'googlegenaiproject')
 sys.path.append(BACKEND_DIR) 
+sys.path.append(GENAI_PROJECT_DIR)
 
 ENV_PATH = os.path.join(BACKEND_DIR, '.env')
 DATA_DIR = os.path.join(BACKEND_DIR, 'data', 'processed')
@@ -16,18 +17,18 @@ DATA_DIR = os.path.join(BACKEND_DIR, 'data', 'processed')
 # --- Local Module Imports ---
 from src.scoring_engine import SynapseScoringEngine
 from src.gemini_utils import enrich_skills_with_gemini
+from app.genai import get_llm_client
 
 # --- 1. One-Time Setup: Load Models and Engine ---
 print("--- Initializing Offline Test ---")
 load_dotenv(dotenv_path=ENV_PATH) 
 api_key = os.getenv("GEMINI_API_KEY")
 
-if not api_key:
+if not api_key and not get_llm_client().offline:
     raise ValueError(f"GEMINI_API_KEY not found. Looked for .env file at: {ENV_PATH}")
-genai.configure(api_key=api_key)
 
 # Use the correct, full model name from your list
-gemini_model = genai.GenerativeModel('models/gemini-pro-latest')
+gemini_model = get_llm_client(api_key=api_key).for_agent("enrichment", 'models/gemini-pro-latest')
 
 scoring_engine = SynapseScoringEngine(
     data_path=os.path.join(DATA_DIR, 'market_intelligence_db.csv'),
@@ -5,10 +5,11 @@ Prioritizes Coursera and YouTube. Filters by PCP constraints and ranks.
 
 from __future__ import annotations
 
+import asyncio
 from typing import Dict, List
 
 from ..schemas import CourseItem, CourseRecommendations, PCP, Roadmap, SkillGraph
-from ..integrations.courses_api import CourseraAPI, YouTubeAPI
+from ..integrations.local_courses import CourseraAPI, YouTubeAPI
 from ..integrations.rapidapi_udemy import UdemyRapidAPI
 
 
@@ -30,19 +31,34 @@ class CourseRecommenderAgent:
         self.udemy = udemy or UdemyRapidAPI()
 
     def recommend(self, pcp: PCP, skill_graph: SkillGraph, roadmap: Roadmap) -> CourseRecommendations:
-        items: List[CourseItem] = []
-
-        # Gather candidate skills from roadmap
-        target_skills: List[str] = []
-        for m in roadmap.milestones:
-            target_skills.extend(m.skills)
-        target_skills = list(dict.fromkeys(target_skills))
+        target_skills = self._target_skills(roadmap)
 
         # Query providers
+        items: List[CourseItem] = []
         items.extend(self.coursera.search_courses(target_skills))
         items.extend(self.youtube.search_videos(target_skills))
         items.extend(self.udemy.search_courses(target_skills))
+        return self._rank(pcp, items)
+
+    async def arecommend(self, pcp: PCP, skill_graph: SkillGraph, roadmap: Roadmap) -> CourseRecommendations:
+        """`recommend` with the provider searches awaited together."""
+        target_skills = self._target_skills(roadmap)
+        udemy_search = getattr(self.udemy, "asearch_courses", None)
+        results = await asyncio.gather(
+            asyncio.to_thread(self.coursera.search_courses, target_skills),
+            asyncio.to_thread(self.youtube.search_videos, target_skills),
+            udemy_search(target_skills) if udemy_search else asyncio.to_thread(self.udemy.search_courses, target_skills),
+        )
+        return self._rank(pcp, [item for found in results for item in found])
+
+    def _target_skills(self, roadmap: Roadmap) -> List[str]:
+        # Gather candidate skills from roadmap
+        target_skills: List[str] = []
+        for m in roadmap.milestones:
+            target_skills.extend(m.skills)
+        return list(dict.fromkeys(target_skills))
 
+    def _rank(self, pcp: PCP, items: List[CourseItem]) -> CourseRecommendations:
         # Filter by budget (keep free or within budget)
         filtered = [i for i in items if i.cost_usd <= pcp.budget_usd]
 
@@ -52,5 +68,3 @@ class CourseRecommenderAgent:
 
         # Simple sequencing: first N matching early milestones
         return CourseRecommendations(user_id=pcp.user_id, items=filtered[:12])
-
-
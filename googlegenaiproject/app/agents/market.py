@@ -1,9 +1,13 @@
 import os
 import json
 import time
-from pathlib import Path
 from dotenv import load_dotenv
 
+from ..genai import get_llm_client
+from ..prompting import PromptBuilder, budget_for
+from .registry import FALLBACK
+from ..workspace import atomic_write_json, outputs_dir
+
 load_dotenv()
 
 # Attempt to import Gemini SDK
@@ -13,33 +17,13 @@ except Exception as e:
     raise ImportError("google-generativeai is required. Install with: pip install google-generativeai") from e
 
 API_KEY = os.getenv("GEMINI_API_KEY") or os.getenv("GENAI_API_KEY")
-if not API_KEY:
+if not API_KEY and not get_llm_client().offline:
     raise RuntimeError("GEMINI_API_KEY (or GENAI_API_KEY) not found in environment. Add it to .env or env variables.")
 
-genai.configure(api_key=API_KEY)
-
 # model name can be set via env; default to gemini-2.0-flash
 ENV_MODEL = os.getenv("GENAI_MODEL", "gemini-2.0-flash")
 
 
-def _get_model_instance(model_name: str):
-    """Create and return a generative model instance; raise if cannot instantiate."""
-    try:
-        model = genai.GenerativeModel(model_name)
-        return model
-    except Exception as e:
-        # try without "models/" prefix/suffix variants
-        alt = model_name
-        if model_name.startswith("models/"):
-            alt = model_name.split("models/", 1)[-1]
-        else:
-            alt = f"models/{model_name}"
-        try:
-            return genai.GenerativeModel(alt)
-        except Exception:
-            raise RuntimeError(f"Could not instantiate model '{model_name}' or '{alt}': {e}") from e
-
-
 def _clean_fenced_markdown(raw: str) -> str:
     """Remove common Markdown code fences and language tags like ```json."""
     if not isinstance(raw, str):
@@ -54,41 +38,22 @@ def _clean_fenced_markdown(raw: str) -> str:
 
 
 def _call_gemini_with_retries(prompt: str, model_name: str, max_retries: int = 3, backoff: float = 2.0):
-    """Call the Gemini model with retries on transient failures like 429."""
-    last_exception = None
-    model = _get_model_instance(model_name)
-    for attempt in range(1, max_retries + 1):
-        try:
-            resp = model.generate_content(prompt)
-            # Prefer .text if present
-            text = getattr(resp, "text", None)
-            if text is None:
-                # fallback: stringify object
-                text = str(resp)
-            return text
-        except Exception as e:
-            last_exception = e
-            # detect rate-limit or transient errors heuristically by message content
-            msg = str(e).lower()
-            if "429" in msg or "resource exhausted" in msg or "rate limit" in msg or "quota" in msg:
-                wait = backoff * attempt
-                print(f"Rate/Quota issue detected (attempt {attempt}/{max_retries}). Waiting {wait}s and retrying...")
-                time.sleep(wait)
-                continue
-            # for other exceptions, break immediately (no retry)
-            print(f"Non-retryable error calling Gemini: {e}")
-            break
-    raise last_exception
+    """Call the Gemini model through the shared client (jittered retries on 429/quota)."""
+    return get_llm_client(api_key=API_KEY).generate(
+        prompt, model=model_name, agent="market", max_retries=max_retries, backoff_base=backoff,
+        generation_config=budget_for("market").generation_config(),
+    )
 
 
 def run_market_research_agent():
     """
     Main entrypoint for market research agent.
-    Produces outputs/market_insights.json
+    Produces outputs/market_insights.json; returns FALLBACK if that is the heuristic stub.
     """
     print("Running Market Research Agent")
-    input_path = Path("outputs/skill_gap_report.json")
-    output_path = Path("outputs/market_insights.json")
+    output_dir = outputs_dir()
+    input_path = output_dir / "skill_gap_report.json"
+    output_path = output_dir / "market_insights.json"
     # load skill context if available
     if input_path.exists():
         with input_path.open("r", encoding="utf-8") as f:
@@ -115,24 +80,33 @@ def run_market_research_agent():
     else:
         missing = {}
         recs = {}
-
-    # build a focused prompt for Gemini
-    prompt = f"""
-You are a market intelligence analyst for technology hiring in 2025. Given the candidate's missing or target skills:
-{json.dumps(extracted_skills, indent=2)}
-
-Please produce a concise JSON object with the following keys:
-- trending_skills: a list of strings (top 8 skills/tools trending for AI/ML roles right now)
-- top_roles: a list of objects {{ "role": string, "demand_reason": string, "skill_priority": [list of skills] }}
+    if not extracted_skills:
+        # the pipeline's skill gap agent writes skillgap.json with a flat gap list
+        skillgap_path = output_dir / "skillgap.json"
+        if skillgap_path.exists():
+            try:
+                extracted_skills = list(json.loads(skillgap_path.read_text(encoding="utf-8")).get("inferred_skill_gaps") or [])
+            except Exception:
+                extracted_skills = []
+
+    # build a focused prompt for Gemini (compact JSON, skills list trimmed to the market budget)
+    builder = PromptBuilder("market")
+    builder.text("You are a market intelligence analyst for technology hiring in 2025.")
+    builder.data("Candidate's missing or target skills", extracted_skills, priority=1)
+    builder.text("""
+Produce a concise JSON object with the following keys:
+- trending_skills: list of strings (top 8 skills/tools trending for AI/ML roles right now)
+- top_roles: list of {"role": string, "demand_reason": string, "skill_priority": [skills]}
 - top_tools: list of tools/frameworks in demand
-- salary_insights: a list of objects {{ "location": string, "median_inr": number, "notes": string }} (include India metro(s) if relevant)
-- hiring_signals: list of short objects {{ "source": string, "signal": string, "confidence": 0-1 }}
+- salary_insights: list of {"location": string, "median_inr": number, "notes": string} (include India metro(s) if relevant)
+- hiring_signals: list of {"source": string, "signal": string, "confidence": 0-1}
 - action_recommendations: short actionable bullets for the candidate (max 6)
-
-Return ONLY valid JSON. Keep arrays reasonably sized (no more than 10 items each).
-"""
+Return ONLY valid JSON. No more than 10 items per array.
+""")
+    prompt = builder.build()
 
     # attempt to call Gemini with retries
+    fallback = False
     try:
         raw = _call_gemini_with_retries(prompt, ENV_MODEL, max_retries=3, backoff=3.0)
         cleaned = _clean_fenced_markdown(raw)
@@ -158,6 +132,7 @@ Return ONLY valid JSON. Keep arrays reasonably sized (no more than 10 items each
     except Exception as e:
         # LLM failed — produce a deterministic fallback stub
         print("LLM market call failed or produced unparseable output:", e)
+        fallback = True
         # build a reasonable fallback based on missing skills
         fallback_trending = ["python", "pytorch", "tensorflow", "sql", "docker", "kubernetes", "mlops", "cloud"]
         # prefer skills from missing list at front
@@ -189,14 +164,9 @@ Return ONLY valid JSON. Keep arrays reasonably sized (no more than 10 items each
 
     # Write insights to disk reliably
     try:
-        output_dir = Path("outputs")
-        output_dir.mkdir(parents=True, exist_ok=True)
-        # ensure file replace to avoid stale locks
-        if (output_dir / "market_insights.json").exists():
-            (output_dir / "market_insights.json").unlink()
-        with (output_dir / "market_insights.json").open("w", encoding="utf-8") as f:
-            json.dump(insights, f, indent=2, ensure_ascii=False)
-        print("Market insights saved to outputs/market_insights.json")
+        # temp file + replace, so readers never see a partial file
+        atomic_write_json(output_path, insights)
+        print(f"Market insights saved to {output_path}")
     except Exception as file_err:
         print("Failed to write market_insights.json:", file_err)
         raise
@@ -211,6 +181,8 @@ Return ONLY valid JSON. Keep arrays reasonably sized (no more than 10 items each
             print("Top role example:", roles[0].get("role"), "-", roles[0].get("demand_reason"))
     except Exception:
         pass
+    get_llm_client().log_stats("market")
+    return FALLBACK if fallback else None
 
 
 if __name__ == "__main__":
@@ -1,12 +1,13 @@
 import os
 import json
 
+from ..workspace import atomic_write_json, outputs_dir
+
 def run_mentor_agent():
     print("\nRunning Mentor Agent...")
 
-    # Base project directory (E:\googlegenaiproject)
-    base_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-    output_dir = os.path.join(base_dir, "outputs")
+    # The run's workspace (or the project-level outputs/ when run standalone)
+    output_dir = str(outputs_dir())
 
     # Correct file paths
     skillgap_file = os.path.join(output_dir, "skillgap.json")
@@ -60,11 +61,7 @@ def run_mentor_agent():
         recommendations["next_steps"].append("Keep learning consistently each week.")
 
     # Save mentor recommendations
-    if os.path.exists(mentor_output):
-        os.remove(mentor_output)
-
-    with open(mentor_output, "w", encoding="utf-8") as f:
-        json.dump(recommendations, f, indent=4)
+    atomic_write_json(mentor_output, recommendations)
 
     print(f"Mentor recommendations saved to {mentor_output}")
 
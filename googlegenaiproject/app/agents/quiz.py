@@ -2,9 +2,19 @@ from __future__ import annotations
 import os
 import json
 import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from dotenv import load_dotenv
 
+from ..genai import get_llm_client
+from ..json_stream import JSONArrayStreamParser
+from ..prompting import PromptBuilder, budget_for, compact_json, count_tokens
+from ..quiz_table import get_table
+from ..serialization import dumps, loads
+from ..workspace import atomic_write_json, outputs_dir, source_path
+from .registry import FALLBACK
+
 load_dotenv()
 
 # Try to import Gemini SDK; if missing, the script will fall back to a local evaluator.
@@ -17,6 +27,8 @@ except Exception:
 # Config
 API_KEY = os.getenv("GEMINI_API_KEY") or os.getenv("GENAI_API_KEY")
 MODEL_NAME = os.getenv("GENAI_MODEL", "gemini-2.0-flash")
+# LLM rewrite of the table summary per user (off by default: adds an LLM call)
+PERSONALIZE = os.getenv("QUIZ_PERSONALIZE", "0").lower() in ("1", "on", "true", "yes")
 
 # Fixed quiz questions (as provided by frontend)
 QUIZ_QUESTIONS = {
@@ -89,77 +101,46 @@ def _clean_fenced_markdown(raw: str) -> str:
     return s
 
 
+def _llm_enabled() -> bool:
+    # replay/fake cache modes serve responses without a key (see app/llm_cache.py)
+    return (GENAI_AVAILABLE and bool(API_KEY)) or get_llm_client().offline
+
+
 def _call_gemini(prompt: str, model_name: str = MODEL_NAME, max_retries: int = 2):
-    if not GENAI_AVAILABLE or not API_KEY:
+    if not _llm_enabled():
         raise RuntimeError("Gemini not available or GEMINI_API_KEY missing.")
-    genai.configure(api_key=API_KEY)
-    # try a couple of model name variants
-    candidates = [model_name]
-    if model_name.startswith("models/"):
-        candidates.append(model_name.split("models/", 1)[-1])
-    else:
-        candidates.append(f"models/{model_name}")
-    last_exc = None
-    for name in candidates:
-        try:
-            model = genai.GenerativeModel(name)
-        except Exception as e:
-            last_exc = e
-            continue
-        for attempt in range(1, max_retries + 1):
-            try:
-                resp = model.generate_content(prompt)
-                text = getattr(resp, "text", None)
-                if text is None:
-                    text = str(resp)
-                return text
-            except Exception as e:
-                last_exc = e
-                # if transient, wait and retry
-                if "429" in str(e).lower() or "rate limit" in str(e).lower() or "resource exhausted" in str(e).lower():
-                    time.sleep(2 * attempt)
-                    continue
-                break
-    raise last_exc or RuntimeError("Failed to call Gemini.")
+    # shared client: configured once, model handle cached, jittered retries on 429s
+    return get_llm_client(api_key=API_KEY).generate(
+        prompt, model=model_name, agent="quiz", max_retries=max_retries,
+        generation_config=budget_for("quiz").generation_config(),
+    )
 
 
-def _build_prompt(user_id: str, answers: dict) -> str:
-    # construct a clear instruction for the model
-    lines = [
-        "You are an expert career coach. Interpret this user's fixed quiz answers and produce",
-        "a JSON object with keys: score_percent, per_question (map of question number to {choice, interpretation, score_1_5}),",
-        "persona (short label), summary (2-3 sentences), and recommendations (list of short action items).",
-        "Use the fixed questions below (do not invent new questions).",
-        "",
-        "Fixed Questions (id: question text):"
-    ]
+def _answer_lines(answers: dict) -> list:
+    """One line per question with only the option the user picked (not every option)."""
+    lines = []
     for qid, q in QUIZ_QUESTIONS.items():
-        if q["options"]:
-            opts = " | ".join([f"{k}: {v}" for k, v in q["options"].items()])
-            lines.append(f"{qid}. {q['text']} Options: {opts}")
-        else:
-            lines.append(f"{qid}. {q['text']} (numeric input expected)")
-    lines.append("")
-    lines.append("User answers (question_id: selected option or free text):")
-    for qid in sorted(QUIZ_QUESTIONS.keys(), key=int):
         val = answers.get(qid, answers.get(str(qid), ""))
-        lines.append(f"{qid}: {val}")
-    lines.append("")
-    lines.append(
-        "Return ONLY valid JSON. Score each question on a 1-5 scale; compute score_percent as (sum(scores)/(5*10))*100."
+        choice = (q["options"] or {}).get(str(val).lower())
+        answer = f"{val}: {choice}" if choice else (val or "(no answer)")
+        lines.append(f"{qid}. [{q['section']}] {q['text']} -> {answer}")
+    return lines
+
+
+def _build_prompt(user_id: str, answers: dict) -> str:
+    builder = PromptBuilder("quiz")
+    builder.text(
+        "You are an expert career coach. Interpret this user's answers to a fixed 10-question career quiz.\n"
+        "Question id, [section], question -> user's answer:\n" + "\n".join(_answer_lines(answers))
     )
-    # example output schema
-    lines.append(
-        "Output schema example:\n"
-        "{\n"
-        "  \"score_percent\": 80,\n"
-        "  \"per_question\": {\"1\": {\"choice\":\"c\",\"interpretation\":\"likes startups\",\"score\":4}, ...},\n"
-        "  \"persona\": \"Startup Builder\",\n"
-        "  \"summary\": \"...\",\n"
-        "  \"recommendations\": [\"...\",\"...\"]\n"
-        "}"
+    builder.text(
+        "Return ONLY valid JSON with keys: score_percent, per_question (question id -> {choice, interpretation, score}), "
+        "persona (short label), summary (2-3 sentences), recommendations (list of short action items). "
+        "Score each question 1-5; score_percent = sum(scores)/50*100.\n"
+        'Example: {"score_percent":80,"per_question":{"1":{"choice":"c","interpretation":"likes startups","score":4}},'
+        '"persona":"Startup Builder","summary":"...","recommendations":["..."]}'
     )
-    return "\n".join(lines)
+    return builder.build()
 
 
 def _deterministic_evaluator(answers: dict):
@@ -231,15 +212,49 @@ def _deterministic_evaluator(answers: dict):
     }
 
 
+def _personalize(user_id: str, answers: dict, report: dict) -> dict:
+    """Optional: rewrite the table summary for this user. Keeps the table report on any failure."""
+    builder = PromptBuilder("quiz")
+    builder.text(
+        "You are an expert career coach. Rewrite this quiz summary in 2-3 warm sentences addressed to the user, "
+        "keeping the persona and facts. Return only the summary text.\n"
+        "Answers:\n" + "\n".join(_answer_lines(answers))
+    )
+    builder.data("Persona", report["persona"], priority=0)
+    builder.data("Summary", report["summary"], priority=0)
+    try:
+        text = _clean_fenced_markdown(_call_gemini(builder.build(), MODEL_NAME, max_retries=1))
+    except Exception as e:
+        print(f"Quiz personalization skipped: {e}")
+        return {**report, "source": "table+fallback"}
+    return {**report, "summary": text or report["summary"], "source": "table+llm"}
+
+
+def _table_report(ans: dict):
+    """Report from the precomputed persona table (rules- or LLM-built); None if any answer is off-table."""
+    table = get_table()
+    return table.lookup(ans) if table is not None else None
+
+
 def evaluate_quiz(user_id: str, answers: dict):
     """
-    Evaluate quiz answers using Gemini if available, otherwise use deterministic fallback.
+    Evaluate quiz answers from the precomputed persona table, whether or not a
+    Gemini key is set; QUIZ_PERSONALIZE=1 adds one LLM call to rewrite the summary.
+    Answers outside the table go to Gemini if available, otherwise to the
+    deterministic fallback.
     Returns a dict matching the output schema.
     """
     # normalize answer keys to strings "1"..."10"
     ans = {str(k): str(v).strip() for k, v in (answers or {}).items()}
 
-    if GENAI_AVAILABLE and API_KEY:
+    # precomputed persona table (app/quiz_table.py): no LLM call on the onboarding path
+    report = _table_report(ans)
+    if report is not None:
+        if PERSONALIZE and _llm_enabled():
+            report = _personalize(user_id, ans, report)
+        return report
+
+    if _llm_enabled():
         prompt = _build_prompt(user_id, ans)
         try:
             raw = _call_gemini(prompt, MODEL_NAME, max_retries=3)
@@ -259,21 +274,181 @@ def evaluate_quiz(user_id: str, answers: dict):
                     except Exception:
                         pass
                 # fallback to returning the raw cleaned text as summary
-                return {"score_percent": 0, "per_question": {}, "persona": "LLM-raw", "summary": cleaned[:1000], "recommendations": []}
+                return {"score_percent": 0, "per_question": {}, "persona": "LLM-raw", "summary": cleaned[:1000], "recommendations": [],
+                        "source": "fallback"}
         except Exception as e:
             # log and fallback
-            return {"score_percent": 0, "per_question": {}, "persona": "error", "summary": f"LLM error: {e}", "recommendations": []}
+            return {"score_percent": 0, "per_question": {}, "persona": "error", "summary": f"LLM error: {e}", "recommendations": [],
+                    "source": "fallback"}
     else:
         # no LLM available; use deterministic fallback
         return _deterministic_evaluator(ans)
 
 
+# ------------------------
+# Bulk (cohort) evaluation
+# ------------------------
+BULK_OUTPUT_TOKENS_PER_USER = 350  # observed size of one per-user report, with headroom
+BULK_MAX_ROUNDS = 3                # first attempt + retries for users that failed to parse
+REPORT_KEYS = ("score_percent", "per_question", "persona", "summary", "recommendations")
+
+
+def _bulk_header() -> str:
+    lines = [
+        "You are an expert career coach. Evaluate EACH user's answers to this fixed 10-question career quiz.",
+        "Questions (id. text {options}):",
+    ]
+    for qid, q in QUIZ_QUESTIONS.items():
+        opts = compact_json(q["options"]) if q["options"] else "(numeric INR)"
+        lines.append(f"{qid}. {q['text']} {opts}")
+    lines.append(
+        "Return ONLY a JSON array with one object per user, in input order: "
+        '[{"user_id":"<id>","score_percent":<0-100>,"per_question":{"<qid>":{"choice":"<x>","interpretation":"<text>","score":<1-5>}},'
+        '"persona":"<label>","summary":"<2-3 sentences>","recommendations":["<action>"]}]. '
+        "score_percent = sum(scores)/50*100."
+    )
+    lines.append("Users (user_id: qid=answer ...):")
+    return "\n".join(lines)
+
+
+def _bulk_user_line(user_id: str, answers: dict) -> str:
+    return f"{user_id}: " + " ".join(f"{qid}={answers.get(qid, '') or '-'}" for qid in QUIZ_QUESTIONS)
+
+
+def _pack_batches(users: list, header: str) -> list:
+    """Greedy packing of (user_id, answers) under the quiz_bulk input and output budgets."""
+    budget = budget_for("quiz_bulk")
+    max_users = max(1, budget.output_tokens // BULK_OUTPUT_TOKENS_PER_USER)
+    used = count_tokens(header)
+    batches, batch = [], []
+    for user_id, answers in users:
+        cost = count_tokens(_bulk_user_line(user_id, answers)) + 1
+        if batch and (used + cost > budget.input_tokens or len(batch) >= max_users):
+            batches.append(batch)
+            batch, used = [], count_tokens(header)
+        batch.append((user_id, answers))
+        used += cost
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def _valid_report(item: dict) -> bool:
+    return (
+        all(k in item for k in REPORT_KEYS)
+        and isinstance(item["per_question"], dict)
+        and isinstance(item["recommendations"], list)
+        and isinstance(item["score_percent"], (int, float))
+    )
+
+
+def _call_gemini_bulk(prompt: str) -> str:
+    return get_llm_client(api_key=API_KEY).generate(
+        prompt, model=MODEL_NAME, agent="quiz_bulk", generation_config=budget_for("quiz_bulk").generation_config()
+    )
+
+
+def _evaluate_batch(batch: list, header: str) -> dict:
+    """One packed LLM call; returns {user_id: report} for users whose result parsed and validated."""
+    prompt = header + "\n" + "\n".join(_bulk_user_line(uid, ans) for uid, ans in batch)
+    try:
+        raw = _call_gemini_bulk(prompt)
+    except Exception as e:
+        print(f"Bulk quiz call for {len(batch)} users failed: {e}")
+        return {}
+    wanted = {uid for uid, _ in batch}
+    results = {}
+    # the stream parser also keeps every complete object before a truncated tail
+    for item in JSONArrayStreamParser().feed(raw):
+        uid = str(item.get("user_id", ""))
+        if uid in wanted and uid not in results and _valid_report(item):
+            results[uid] = {k: item[k] for k in REPORT_KEYS}
+            results[uid]["source"] = "llm_bulk"
+    return results
+
+
+def evaluate_quiz_bulk(records: list, workers: int = 4) -> dict:
+    """Evaluate many users; returns {user_id: report}.
+
+    Table hits are answered immediately. The rest are packed into shared-header
+    prompts up to the token budget and evaluated concurrently; only users whose
+    results are missing or invalid are re-packed and retried, and anyone still
+    failing after BULK_MAX_ROUNDS gets the deterministic evaluation.
+    User ids must be unique (ValueError otherwise).
+    """
+    duplicates = sorted(uid for uid, n in Counter(uid for uid, _ in records).items() if n > 1)
+    if duplicates:
+        raise ValueError(f"Duplicate user_id(s) in bulk quiz input: {', '.join(duplicates[:10])}")
+    reports = {}
+    pending = []
+    for user_id, answers in records:
+        ans = {str(k): str(v).strip() for k, v in (answers or {}).items()}
+        report = _table_report(ans)  # same table path as evaluate_quiz
+        if report is not None:
+            reports[user_id] = report
+        else:
+            pending.append((user_id, ans))
+
+    if pending and _llm_enabled():
+        header = _bulk_header()
+        for round_no in range(1, BULK_MAX_ROUNDS + 1):
+            batches = _pack_batches(pending, header)
+            print(f"Bulk quiz round {round_no}: {len(pending)} users in {len(batches)} LLM calls")
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for results in executor.map(lambda b: _evaluate_batch(b, header), batches):
+                    reports.update(results)
+            pending = [(uid, ans) for uid, ans in pending if uid not in reports]
+            if not pending:
+                break
+
+    for user_id, ans in pending:
+        reports[user_id] = {**_deterministic_evaluator(ans), "source": "rules"}
+    return reports
+
+
+def run_quiz_bulk(input_path: str, output_path: str | None = None, workers: int = 4):
+    """Bulk entrypoint: NDJSON in ({"user_id", "answers"} per line), NDJSON out ({"user_id", "report"})."""
+    in_path = Path(input_path)
+    out_path = Path(output_path) if output_path else outputs_dir() / "quiz_bulk.ndjson"
+    records = []
+    seen = set()
+    with in_path.open("r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                payload = loads(line)
+                user_id = str(payload["user_id"])
+            except (json.JSONDecodeError, KeyError, TypeError) as e:
+                print(f"Skipping {in_path}:{line_no}: {e}")
+                continue
+            if user_id in seen:
+                # one report per user: keep the first answers rather than silently overwriting
+                print(f"Skipping {in_path}:{line_no}: duplicate user_id {user_id!r}")
+                continue
+            seen.add(user_id)
+            records.append((user_id, payload.get("answers", {})))
+
+    start = time.perf_counter()
+    reports = evaluate_quiz_bulk(records, workers=workers)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = out_path.with_suffix(out_path.suffix + ".tmp")
+    with tmp_path.open("wb") as f:
+        for user_id, _ in records:
+            f.write(dumps({"user_id": user_id, "report": reports[user_id]}, pretty=False) + b"\n")
+    tmp_path.replace(out_path)
+
+    print(f"Evaluated {len(records)} users in {time.perf_counter() - start:.1f}s -> {out_path}")
+    get_llm_client().log_stats("quiz_bulk")
+    return reports
+
+
 def run_quiz_agent(input_path: str | None = None):
     """
-    Entrypoint. Reads input JSON, evaluates, and writes app/samples/quiz_report.json.
+    Entrypoint. Reads input JSON (default: the run's answers or the sample), evaluates, and writes quiz.json.
+    Returns the report, or FALLBACK if an LLM call failed and quiz.json holds a fallback.
     """
-    default_input = Path("app/samples/quiz_input.json")
-    in_path = Path(input_path) if input_path else default_input
+    in_path = Path(input_path) if input_path else source_path("quiz_input")
     if not in_path.exists():
         print(f"Input file {in_path} not found. Expected structure: {{'user_id':'...', 'answers': {{'1':'a', ...}}}}")
         return
@@ -286,19 +461,22 @@ def run_quiz_agent(input_path: str | None = None):
     print("Evaluating quiz answers for user:", user_id)
     report = evaluate_quiz(user_id, answers)
 
-    # write output (delete old first)
-    out_dir = Path("outputs")
-    out_dir.mkdir(parents=True, exist_ok=True)
-    out_file = out_dir / "quiz.json"
-    if out_file.exists():
-        out_file.unlink()
-    out_file.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    # write output (atomic replace)
+    out_file = outputs_dir() / "quiz.json"
+    atomic_write_json(out_file, report)
 
     print(f"Saved quiz report to {out_file}")
+    get_llm_client().log_stats("quiz")
+    if str(report.get("source", "")).endswith("fallback"):
+        return FALLBACK
     return report
 
 
 if __name__ == "__main__":
     import sys
-    arg = sys.argv[1] if len(sys.argv) > 1 else None
-    run_quiz_agent(arg)
+    if len(sys.argv) > 2 and sys.argv[1] == "--bulk":
+        # python -m app.agents.quiz --bulk cohort.ndjson [outputs/quiz_bulk.ndjson]
+        run_quiz_bulk(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else None)
+    else:
+        arg = sys.argv[1] if len(sys.argv) > 1 else None
+        run_quiz_agent(arg)
@@ -0,0 +1,186 @@
+"""Agent registry and execution engine.
+
+Every pipeline agent is registered once with a uniform entrypoint (a function
+taking no required arguments that reads/writes `outputs/`). `AgentRunner` runs
+them either:
+
+- in-process (default): on a thread pool inside the calling process, so the
+  interpreter, pandas / google-generativeai imports and the shared LLM client
+  are set up once and reused by every run; or
+- in a subprocess (`AGENT_EXECUTION=subprocess`): `python -m app.agents.registry
+  <agent>` with the project root as cwd, for full isolation.
+
+Either way the agent sees the caller's active run workspace (`app.workspace`):
+worker threads run in a copy of the submitting context, and subprocesses get
+`AGENT_RUN_DIR`. Its LLM calls queue on the shared quota as the runner's
+`run_id` (default: the workspace's run id) via `quota_run()` in-process and
+`LLM_RUN_ID` in a subprocess, so concurrent runs in one API process are
+served fairly.
+
+An entrypoint that wrote its output from a fallback path (e.g. a heuristic stub
+after an LLM error) returns `FALLBACK` (exit code `EXIT_FALLBACK` in a
+subprocess). The run still succeeds, but `AgentResult.fallback` tells the
+pipeline not to cache that output.
+
+Agent modules are imported lazily on first use.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import importlib
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from ..config import PROJECT_ROOT, get_config
+from ..ratelimit import quota_run
+from ..workspace import current_run, outputs_dir
+
+
+FALLBACK = "fallback"
+EXIT_FALLBACK = 75  # EX_TEMPFAIL: output written, but from a fallback path
+
+
+@dataclass(frozen=True)
+class AgentSpec:
+    name: str
+    module: str
+    entrypoint: str
+    outputs: Tuple[str, ...]  # candidate output files in outputs/, preferred first
+    inputs: Tuple[str, ...] = ()  # files in outputs/ this agent reads (drives the run_all DAG)
+    sources: Tuple[str, ...] = ()  # other inputs it reads, by `app.workspace.DEFAULT_SOURCES` name
+    env: Tuple[str, ...] = ()  # env vars that change its output
+    version: str = "1"  # bump to invalidate cached outputs (see app/build_cache.py)
+
+    def load(self):
+        return getattr(importlib.import_module(self.module), self.entrypoint)
+
+
+AGENTS: Dict[str, AgentSpec] = {
+    spec.name: spec
+    for spec in (
+        AgentSpec("resume", "app.agents.resume", "run_resume_agent", ("resume_skills.json", "resume.json"),
+                  sources=("resume",)),
+        AgentSpec("quiz", "app.agents.quiz", "run_quiz_agent", ("quiz.json",),
+                  sources=("quiz_input", "quiz_table"),
+                  env=("QUIZ_PERSONALIZE",)),
+        AgentSpec("skillgap", "app.agents.skill_gap_agent", "run_skillgap_agent", ("skillgap.json", "skill_gap.json"),
+                  inputs=("resume_skills.json", "quiz.json")),
+        AgentSpec("mentor", "app.agents.mentor", "run_mentor_agent", ("mentor_report.json", "mentor.json"),
+                  inputs=("skillgap.json", "quiz.json")),
+        AgentSpec("roadmap", "app.agents.roadmap", "run_roadmap_agent", ("roadmap.json", "learning_roadmap.json"),
+                  inputs=("skillgap.json", "mentor_report.json")),
+        AgentSpec("market", "app.agents.market", "run_market_research_agent", ("market_insights.json",),
+                  inputs=("skillgap.json",)),
+    )
+}
+
+
+def get_agent(name: str) -> AgentSpec:
+    try:
+        return AGENTS[name.lower()]
+    except KeyError:
+        raise KeyError(f"Unknown agent '{name}'. Known agents: {', '.join(AGENTS)}") from None
+
+
+class AgentError(RuntimeError):
+    pass
+
+
+@dataclass
+class AgentResult:
+    name: str
+    mode: str
+    duration_s: float
+    value: Any = None
+    outputs_dir: Optional[Path] = None  # the workspace the agent wrote to
+
+    @property
+    def fallback(self) -> bool:
+        return isinstance(self.value, str) and self.value == FALLBACK
+
+    def output_path(self) -> Optional[str]:
+        for filename in get_agent(self.name).outputs:
+            path = (self.outputs_dir or outputs_dir()) / filename
+            if path.exists():
+                return str(path)
+        return None
+
+
+class AgentRunner:
+    def __init__(self, mode: Optional[str] = None, workers: Optional[int] = None, run_id: Optional[str] = None) -> None:
+        cfg = get_config()
+        self.mode = (mode or cfg.agent_execution).lower()
+        if self.mode not in ("inprocess", "subprocess"):
+            raise ValueError(f"AGENT_EXECUTION must be 'inprocess' or 'subprocess', got {self.mode!r}")
+        self.run_id = run_id
+        self._executor = ThreadPoolExecutor(max_workers=workers or cfg.agent_workers, thread_name_prefix="agent")
+
+    def _run_inprocess(self, spec: AgentSpec) -> Any:
+        return spec.load()()
+
+    def _quota_run_id(self) -> Optional[str]:
+        run = current_run()
+        return self.run_id or (run.run_id if run else None)
+
+    def _run_subprocess(self, spec: AgentSpec) -> Optional[str]:
+        env = dict(os.environ)
+        run_id = self._quota_run_id()
+        if run_id:
+            env["LLM_RUN_ID"] = run_id
+        run = current_run()
+        if run:
+            env["AGENT_RUN_DIR"] = str(run.root)
+        cmd = [sys.executable, "-m", __name__, spec.name]
+        returncode = subprocess.call(cmd, cwd=str(PROJECT_ROOT), env=env)
+        if returncode == EXIT_FALLBACK:
+            return FALLBACK
+        if returncode:
+            raise subprocess.CalledProcessError(returncode, cmd)
+        return None
+
+    def _run(self, spec: AgentSpec) -> AgentResult:
+        start = time.perf_counter()
+        try:
+            if self.mode == "subprocess":
+                value = self._run_subprocess(spec)
+            else:
+                with quota_run(self._quota_run_id()):
+                    value = self._run_inprocess(spec)
+        except Exception as e:
+            raise AgentError(f"Agent {spec.name} failed: {e}") from e
+        return AgentResult(spec.name, self.mode, time.perf_counter() - start, value, outputs_dir())
+
+    def submit(self, name: str) -> "Future[AgentResult]":
+        # carry the caller's run workspace into the worker thread
+        ctx = contextvars.copy_context()
+        return self._executor.submit(ctx.run, self._run, get_agent(name))
+
+    def run(self, name: str) -> AgentResult:
+        return self.submit(name).result()
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
+
+
+_runner: Optional[AgentRunner] = None
+
+
+def get_runner() -> AgentRunner:
+    """Process-wide runner (the API's worker pool)."""
+    global _runner
+    if _runner is None:
+        _runner = AgentRunner()
+    return _runner
+
+
+if __name__ == "__main__":
+    # subprocess entry (AgentRunner._run_subprocess): python -m app.agents.registry <agent>
+    result = get_agent(sys.argv[1]).load()()
+    sys.exit(EXIT_FALLBACK if isinstance(result, str) and result == FALLBACK else 0)
@@ -10,6 +10,7 @@ import os
 import json
 from pathlib import Path
 
+from ..workspace import DEFAULT_SOURCES, atomic_write_json, output_path, source_path
 from ..schemas import ProfilerPayload, ProfileData, ResumeProfile, SkillEdge, SkillGraph, SkillNode
 from ..integrations.parsers import extract_text_from_file
 
@@ -150,34 +151,32 @@ class ResumeIntelligenceAgent:
         return entries[:5]
 
 
-if __name__ == "__main__":
-    import sys
-    from pathlib import Path
-    import json
+DEFAULT_RESUME = DEFAULT_SOURCES["resume"]
 
-    # Allow passing a file path or default to sample resume
-    resume_file = sys.argv[1] if len(sys.argv) > 1 else "app/samples/resumeanweshsinha.pdf"
 
+def run_resume_agent(resume_file: str | None = None, user_id: str = "user123"):
+    """Extract skills from a resume (default: the run's upload or the sample) and write resume_skills.json."""
     agent = ResumeIntelligenceAgent()
 
     # Run extraction
-    profile, graph, payload = agent.parse_and_extract("user123", resume_file)
+    profile, graph, payload = agent.parse_and_extract(user_id, str(resume_file or source_path("resume")))
 
     # --- Save extracted skills ---
-    out_dir = Path("outputs")
-    out_dir.mkdir(exist_ok=True)
-
     skills_json = {
         "skills": list({s for cat in profile.skills.values() for s in cat})
     }
-    out_file = out_dir / "resume_skills.json"
-    out_file.write_text(json.dumps(skills_json, indent=2))
+    out_file = output_path("resume_skills.json")
+    atomic_write_json(out_file, skills_json)
     print(f"✅ Saved resume skills to {out_file}")
 
     # Optional: print top-level summary
     print(f"Extracted {len(skills_json['skills'])} skills:")
     print(", ".join(skills_json["skills"]))
+    return skills_json
 
 
+if __name__ == "__main__":
+    import sys
 
-
+    # Allow passing a file path or default to sample resume
+    run_resume_agent(sys.argv[1] if len(sys.argv) > 1 else None)
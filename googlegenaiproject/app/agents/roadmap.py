@@ -2,70 +2,124 @@ from dotenv import load_dotenv
 load_dotenv()
 
 import os
-import google.generativeai as genai
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
 from datetime import datetime
 import json
 
-# Configure Gemini
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+from ..events import publish_partial
+from ..genai import get_llm_client
+from ..json_stream import JSONArrayStreamParser
+from ..prompting import PromptBuilder, budget_for
+from ..workspace import atomic_write_json, outputs_dir
+
+
+ROADMAP_MODEL = "gemini-2.0-flash"
+ROADMAP_WEEKS = 8
+
+WEEK_FORMAT = '{"roadmap":[{"week":<number>,"start_date":"<YYYY-MM-DD>","focus":"<topic or skill focus>","resources":["<link or course>"],"outcome":"<expected learning result>"}]}'
+
 
 def call_llm(prompt):
     """Send prompt to Gemini 2.0 Flash and return text output."""
-    model = genai.GenerativeModel("gemini-2.0-flash")
-    response = model.generate_content(prompt)
-    return response.text
+    return get_llm_client().generate(
+        prompt, model=ROADMAP_MODEL, agent="roadmap", generation_config=budget_for("roadmap").generation_config()
+    )
+
+
+def stream_llm(prompt):
+    """Stream text chunks from Gemini 2.0 Flash as they are generated."""
+    return get_llm_client().stream(
+        prompt, model=ROADMAP_MODEL, agent="roadmap", generation_config=budget_for("roadmap").generation_config()
+    )
+
+
+def _add_inputs(builder, skillgap_data, mentor_data):
+    # Mentor text is the most verbose and least specific, so it is trimmed first
+    builder.data("SKILL GAPS", skillgap_data, priority=1, optional_keys=("timestamp", "resume_skills"))
+    builder.data("MENTOR RECOMMENDATIONS", mentor_data, priority=2, optional_keys=("timestamp", "next_steps"))
+
+
+def build_roadmap_prompt(skillgap_data, mentor_data):
+    builder = PromptBuilder("roadmap")
+    builder.text(
+        f"You are an AI mentor. Using the skill gap data and mentor guidance below, "
+        f"generate an {ROADMAP_WEEKS}-week learning roadmap starting from today's date."
+    )
+    _add_inputs(builder, skillgap_data, mentor_data)
+    builder.text(f"Output must be valid JSON in this format: {WEEK_FORMAT}")
+    return builder.build()
+
+
+def build_continuation_prompt(skillgap_data, mentor_data, weeks):
+    """Ask only for the weeks after the last one that arrived intact."""
+    builder = PromptBuilder("roadmap")
+    builder.text(f"You are an AI mentor continuing an {ROADMAP_WEEKS}-week learning roadmap.")
+    # Only what the model needs to continue the sequence, not the full weeks
+    written = [{k: w.get(k) for k in ("week", "start_date", "focus")} for w in weeks]
+    builder.data(f"Weeks 1-{len(weeks)} already written", written, priority=0)
+    _add_inputs(builder, skillgap_data, mentor_data)
+    builder.text(
+        f"Write ONLY weeks {len(weeks) + 1}-{ROADMAP_WEEKS}, continuing the dates weekly. "
+        f"Output must be valid JSON in this format: {WEEK_FORMAT}"
+    )
+    return builder.build()
+
+
+def _stream_weeks(prompt, first_week):
+    """Yield week objects from a streamed response as each one closes."""
+    parser = JSONArrayStreamParser()
+    expected = first_week
+    for chunk in stream_llm(prompt):
+        for week in parser.feed(chunk):
+            # Keep numbering contiguous even if the model repeats or skips a week
+            week["week"] = expected
+            expected += 1
+            yield week
+    if parser.skipped or not parser.complete:
+        print(f"Roadmap stream ended with a malformed tail after week {expected - 1}.")
+
+
+def stream_roadmap_weeks(skillgap_data, mentor_data):
+    """Yield each roadmap week as soon as Gemini finishes writing it.
+
+    If the stream ends short of ROADMAP_WEEKS (truncated or malformed tail),
+    one follow-up request asks only for the missing weeks.
+    """
+    weeks = []
+    for week in _stream_weeks(build_roadmap_prompt(skillgap_data, mentor_data), 1):
+        weeks.append(week)
+        yield week
+    if weeks and len(weeks) < ROADMAP_WEEKS:
+        print(f"Requesting weeks {len(weeks) + 1}-{ROADMAP_WEEKS} to complete the roadmap...")
+        prompt = build_continuation_prompt(skillgap_data, mentor_data, weeks)
+        for week in _stream_weeks(prompt, len(weeks) + 1):
+            if week["week"] > ROADMAP_WEEKS:
+                break
+            weeks.append(week)
+            yield week
 
 
 def generate_roadmap_content(skillgap_data, mentor_data):
     """Generate a timestamped roadmap using the LLM."""
-    prompt = f"""
-    You are an AI mentor. Using the following skill gap data and mentor guidance,
-    generate an 8-week learning roadmap starting from today's date.
-
-    SKILL GAPS:
-    {json.dumps(skillgap_data, indent=2)}
-
-    MENTOR RECOMMENDATIONS:
-    {json.dumps(mentor_data, indent=2)}
-
-    Output must be valid JSON in this format:
-    {{
-      "roadmap": [
-        {{
-          "week": <number>,
-          "start_date": "<YYYY-MM-DD>",
-          "focus": "<topic or skill focus>",
-          "resources": ["<link or course>", "..."],
-          "outcome": "<expected learning result>"
-        }}
-      ]
-    }}
-    """
+    weeks = []
+    for week in stream_roadmap_weeks(skillgap_data, mentor_data):
+        weeks.append(week)
+        publish_partial("roadmap", week=week)  # run event stream, see app/events.py
+    if not weeks:
+        raise ValueError("Gemini response not valid JSON.")
+    return {"roadmap": weeks}
 
-    response = call_llm(prompt)
 
-    try:
-        roadmap_json = json.loads(response)
-    except json.JSONDecodeError:
-        # Fallback: extract JSON portion if wrapped in text
-        import re
-        match = re.search(r'\{[\s\S]*\}', response)
-        if match:
-            roadmap_json = json.loads(match.group(0))
-        else:
-            raise ValueError("Gemini response not valid JSON.")
-    return roadmap_json
+def save_roadmap(roadmap_file, roadmap_data):
+    atomic_write_json(roadmap_file, roadmap_data)
 
 
 def run_roadmap_agent():
     print("\nRunning Roadmap Agent...")
 
-    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
-    outputs_dir = os.path.join(project_root, "outputs")
-    skillgap_file = os.path.join(outputs_dir, "skillgap.json")
-    mentor_file = os.path.join(outputs_dir, "mentor_report.json")
-    roadmap_file = os.path.join(outputs_dir, "roadmap.json")
+    run_outputs = str(outputs_dir())
+    skillgap_file = os.path.join(run_outputs, "skillgap.json")
+    mentor_file = os.path.join(run_outputs, "mentor_report.json")
+    roadmap_file = os.path.join(run_outputs, "roadmap.json")
 
     print(f"SkillGap file: {skillgap_file}")
     print(f"Mentor file: {mentor_file}")
@@ -99,11 +153,11 @@ def run_roadmap_agent():
     roadmap_data = generate_roadmap_content(skillgap_data, mentor_data)
 
     # Save output
-    with open(roadmap_file, "w", encoding="utf-8") as f:
-        json.dump(roadmap_data, f, indent=2)
+    save_roadmap(roadmap_file, roadmap_data)
 
     print(f"Updated roadmap saved to: {roadmap_file}")
     print("Roadmap generation complete.")
+    get_llm_client().log_stats("roadmap")
 
 
 if __name__ == "__main__":
@@ -1,46 +1,9 @@
 import json
-from pathlib import Path
 from datetime import datetime
 import re
-import sys
-
-# ------------ Helpers to find project root and outputs dir ------------
-def find_project_root_with_outputs(max_levels: int = 5) -> Path:
-    """
-    Start from this file's directory and walk up until we find a directory
-    that contains an 'outputs' folder. If not found, fall back to cwd if it
-    contains outputs. Otherwise return the parent-parent (best guess).
-    """
-    start = Path(__file__).resolve()
-    for i, p in enumerate(start.parents):
-        if i >= max_levels:
-            break
-        if (p / "outputs").exists():
-            return p
-    # fallback: check cwd
-    cwd = Path.cwd()
-    if (cwd / "outputs").exists():
-        return cwd
-    # last-resort: use third parent if available, else topmost parent
-    if len(start.parents) >= 3:
-        return start.parents[2]
-    return start.parents[-1]
-
-# determine project root
-PROJECT_ROOT = find_project_root_with_outputs()
-OUTPUTS_DIR = PROJECT_ROOT / "outputs"
-
-RESUME_FILE = OUTPUTS_DIR / "resume_skills.json"
-QUIZ_FILE = OUTPUTS_DIR / "quiz_report.json"
-OUTPUT_FILE = OUTPUTS_DIR / "skillgap.json"
-
-# Print diagnostics
-print("Project root (resolved):", PROJECT_ROOT)
-print("Outputs directory:", OUTPUTS_DIR)
-print("Resume file expected at:", RESUME_FILE)
-print("Quiz file expected at:", QUIZ_FILE)
-print("Skillgap output will be:", OUTPUT_FILE)
-print()
+
+from ..workspace import atomic_write_json, outputs_dir
+
 
 # ---------- Utility functions ----------
 def clean_text(text: str) -> str:
@@ -83,24 +46,25 @@ def infer_gaps_from_quiz(quiz_data: dict) -> list[str]:
 def run_skillgap_agent() -> None:
     print("Running SkillGap Agent...\n")
 
-    # ensure outputs dir exists (may not, which explains many issues)
-    if not OUTPUTS_DIR.exists():
-        print("Outputs directory does not exist at:", OUTPUTS_DIR)
-        print("Creating outputs directory.")
-        OUTPUTS_DIR.mkdir(parents=True, exist_ok=True)
+    # the run's workspace (or the project-level outputs/ when run standalone)
+    out_dir = outputs_dir()
+    resume_file = out_dir / "resume_skills.json"
+    quiz_file = out_dir / "quiz_report.json"
+    output_file = out_dir / "skillgap.json"
+    print("Outputs directory:", out_dir)
 
     # show current files in outputs for debugging
-    existing = sorted([p.name for p in OUTPUTS_DIR.iterdir() if p.is_file()])
+    existing = sorted([p.name for p in out_dir.iterdir() if p.is_file()])
     print("Files currently in outputs/:", existing)
     print()
 
     # Load resume file
-    if not RESUME_FILE.exists():
+    if not resume_file.exists():
         print("Missing resume_skills.json at the expected path.")
         print("Please ensure the resume agent wrote resume_skills.json into the project-level outputs/ directory.")
         return
     try:
-        resume_data = json.loads(RESUME_FILE.read_text(encoding="utf-8"))
+        resume_data = json.loads(resume_file.read_text(encoding="utf-8"))
     except Exception as e:
         print("Failed to read/parse resume_skills.json:", e)
         return
@@ -110,10 +74,10 @@ def run_skillgap_agent() -> None:
     resume_skills = extract_skills(resume_text)
 
     # Load quiz file (allow alternative name if present)
-    if not QUIZ_FILE.exists():
+    if not quiz_file.exists():
         # try alternative common names
-        alt = OUTPUTS_DIR / "quiz.json"
-        alt2 = OUTPUTS_DIR / "quiz_report.json"
+        alt = out_dir / "quiz.json"
+        alt2 = out_dir / "quiz_report.json"
         if alt.exists():
             quiz_path = alt
         elif alt2.exists():
@@ -122,7 +86,7 @@ def run_skillgap_agent() -> None:
             print("Missing quiz report. Expected quiz_report.json (or quiz.json) in outputs/.")
             return
     else:
-        quiz_path = QUIZ_FILE
+        quiz_path = quiz_file
 
     try:
         quiz_data = json.loads(quiz_path.read_text(encoding="utf-8"))
@@ -157,12 +121,12 @@ def run_skillgap_agent() -> None:
 
     # Write output safely (overwrite)
     try:
-        OUTPUT_FILE.write_text(json.dumps(result, indent=2), encoding="utf-8")
+        atomic_write_json(output_file, result)
     except Exception as e:
         print("Failed to write skillgap.json:", e)
         return
 
-    print("skillgap.json created at:", OUTPUT_FILE)
+    print("skillgap.json created at:", output_file)
     print("\nPreview of result:")
     print(json.dumps(result, indent=2))
 
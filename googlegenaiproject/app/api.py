@@ -1,10 +1,25 @@
-from fastapi import FastAPI, UploadFile, File, BackgroundTasks, HTTPException, Path as ApiPath
+from fastapi import FastAPI, UploadFile, File, Header, HTTPException, Path as ApiPath, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-import subprocess, os, uuid, shutil, json, sys
+from fastapi.responses import StreamingResponse
+import asyncio, os, shutil, sys
 from pathlib import Path
-from typing import Dict
+from typing import Any, Dict, Optional
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 from starlette.middleware.wsgi import WSGIMiddleware
 
+from app.agents.registry import AGENTS, get_agent, get_runner
+from app.agents.roadmap import save_roadmap, stream_roadmap_weeks
+from app.build_cache import StageCache
+from app.config import get_config
+from app.events import bus
+from app.jobs import QueueFull, get_job_queue, new_job_id
+from app.output_cache import output_cache, respond
+from app.run_all import main as run_pipeline
+from app.serialization import ORJSONResponse, dumps, loads
+from app.uploads import UploadTooLarge, resume_parse_cached, save_upload
+from app.workspace import get_run, list_runs, new_run, use_run
+
 # ------------------------
 # Project paths (consistent, pathlib)
 # ------------------------
@@ -20,7 +35,8 @@ UPLOADS_DIR.mkdir(parents=True, exist_ok=True)
 # ------------------------
 # FastAPI app
 # ------------------------
-app = FastAPI(title="GenAI Project API")
+# JSON bodies are encoded with orjson (app/serialization.py)
+app = FastAPI(title="GenAI Project API", default_response_class=ORJSONResponse)
 
 # ------------------------
 # Mount Flask ML app (Backend/src/main_api.py)
@@ -61,91 +77,212 @@ app.add_middleware(
 )
 
 # ------------------------
-# Agents config & helpers
+# Agents (registry + in-process worker pool, see app/agents/registry.py)
+# ------------------------
+agent_runner = get_runner()
+
+# ------------------------
+# Job queue (see app/jobs.py): fixed worker pool, bounded depth -> 429 when full
+# ------------------------
+job_queue = get_job_queue()
+
+def enqueue(kind: str, fn, **meta):
+    try:
+        return job_queue.submit(kind, fn, **meta)
+    except QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "10"})
+
+def agent_payload(agent_name: str, result):
+    """The agent's JSON output, or a short status if it has none."""
+    output_path = result.output_path()
+    if output_path:
+        p = Path(output_path)
+        try:
+            return loads(p.read_bytes())
+        except Exception:
+            return {"status": "done", "output_path": str(p)}
+    return {"status": "done", "message": f"{agent_name} executed, no named output found in outputs/"}
+
+def agent_job(agent_name: str, run):
+    with use_run(run):
+        return agent_payload(agent_name, agent_runner.run(agent_name))
+
+# ------------------------
+# Run workspaces (see app/workspace.py): each pipeline run reads and writes
+# runs/<run_id>/ instead of the shared outputs/
 # ------------------------
-AGENT_MODULES: Dict[str, str] = {
-    "resume": "app.agents.resume",
-    "quiz": "app.agents.quiz",
-    "skillgap": "app.agents.skill_gap_agent",
-    "mentor": "app.agents.mentor",
-    "roadmap": "app.agents.roadmap",
-}
+class RunAllRequest(BaseModel):
+    resume_upload: Optional[str] = None       # `upload_id` returned by /api/upload_resume
+    user_id: Optional[str] = None
+    answers: Optional[Dict[str, Any]] = None  # quiz answers, {"1": "a", ...}
 
-def run_agent_module(module_path: str) -> None:
+def get_run_or_404(run_id: str):
     try:
-        # run with project root as cwd
-        subprocess.check_call(["python3", "-m", module_path], cwd=str(PROJECT_ROOT))
-    except subprocess.CalledProcessError as e:
-        raise RuntimeError(f"Agent {module_path} failed: {e}")
+        return get_run(run_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown run '{run_id}'")
+
+def outputs_for(run_id: Optional[str]) -> Path:
+    """A run's outputs directory, or the shared outputs/ when no run is given."""
+    return get_run_or_404(run_id).outputs_dir if run_id else OUTPUTS_DIR
 
 # ------------------------
 # Endpoints (upload, run all, agent runner, outputs)
 # ------------------------
 @app.post("/api/upload_resume")
 async def upload_resume(file: UploadFile = File(...)):
-    filename = f"{uuid.uuid4().hex}_{file.filename}"
-    file_path = UPLOADS_DIR / filename
-    with open(file_path, "wb") as f:
-        shutil.copyfileobj(file.file, f)
-    return {"status": "saved", "path": str(file_path)}
-
-@app.post("/api/runall")
-async def run_all(background: BackgroundTasks):
-    run_script = APP_DIR / "run_all.py"
-    if not run_script.exists():
-        raise HTTPException(status_code=500, detail="run_all.py not found in app/")
-    # Add background task correctly: add_task(func, *args, **kwargs)
-    background.add_task(subprocess.run, ["python3", str(run_script)], cwd=str(APP_DIR), check=True)
-    return {"status": "started"}
+    # streamed in chunks, hashed on the way; identical bytes map to the same upload_id
+    try:
+        stored = await save_upload(file, UPLOADS_DIR, get_config().upload_max_bytes)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    return {
+        "status": "duplicate" if stored.duplicate else "saved",
+        "path": str(stored.path),
+        "upload_id": stored.upload_id,
+        "sha256": stored.sha256,
+        "bytes": stored.size,
+        "parsed": await run_in_threadpool(resume_parse_cached, stored.path, StageCache()),
+    }
+
+@app.post("/api/runall", status_code=202)
+async def run_all(req: Optional[RunAllRequest] = None):
+    req = req or RunAllRequest()
+    sources, inputs = {}, {}
+    if req.resume_upload:
+        upload = UPLOADS_DIR / Path(req.resume_upload).name
+        if not upload.exists():
+            raise HTTPException(status_code=404, detail=f"Unknown upload '{req.resume_upload}'")
+        sources["resume"] = str(upload)
+    if req.answers is not None:
+        inputs["quiz_input"] = {"user_id": req.user_id or "anonymous", "answers": req.answers}
+    run = new_run(sources=sources, inputs=inputs)
+    job_id = new_job_id()
+    # published before submitting, so an idle worker's run_started can't come first
+    bus.publish(run.run_id, "run_queued", job_id=job_id)
+    try:
+        job = enqueue("pipeline", lambda: run_pipeline(run=run).to_dict(), job_id=job_id, run_id=run.run_id)
+    except HTTPException:
+        bus.discard(run.run_id)
+        shutil.rmtree(run.root, ignore_errors=True)
+        raise
+    return {"status": job.status, "job_id": job.id, "run_id": run.run_id}
+
+@app.get("/api/runs")
+async def runs(limit: int = Query(50, ge=1, le=500), offset: int = Query(0, ge=0)):
+    page = list_runs(limit=limit + 1, offset=offset)  # one extra to know if there is a next page
+    return {
+        "runs": [r.to_dict() for r in page[:limit]],
+        "next_offset": offset + limit if len(page) > limit else None,
+    }
+
+@app.get("/api/runs/{run_id}/events")
+async def run_events(run_id: str, last_event_id: Optional[int] = Header(None)):
+    """Server-sent events for one run (see app/events.py); replays from Last-Event-ID on reconnect.
+
+    Event logs live in this process's memory, so this only works with a single
+    API worker: runs started by another worker or by the CLI (`run_all`) get a 404.
+    """
+    get_run_or_404(run_id)
+    log = bus.log(run_id)
+    if log is None:
+        if not job_queue.has_active("pipeline", run_id):
+            raise HTTPException(status_code=404, detail=f"No event stream for run '{run_id}' in this process; see /api/outputs")
+        log = bus.log(run_id, create=True)  # queued here; its log was evicted
+
+    async def stream():
+        async for event in log.follow(after=last_event_id or 0):
+            yield event.sse() if event else ": keepalive\n\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
 
 @app.post("/api/agent/{agent_name}")
-async def run_agent(agent_name: str = ApiPath(..., description="one of: resume, quiz, skillgap, mentor, roadmap")):
-    agent_key = agent_name.lower()
-    if agent_key not in AGENT_MODULES:
+async def run_agent(
+    agent_name: str = ApiPath(..., description=f"one of: {', '.join(AGENTS)}"),
+    run_id: Optional[str] = Query(None, description="run workspace to use (default: shared outputs/)"),
+    wait: bool = Query(True, description="wait for the result; false returns 202 with a job id"),
+):
+    try:
+        spec = get_agent(agent_name)
+    except KeyError:
         raise HTTPException(status_code=400, detail=f"Unknown agent '{agent_name}'")
-    module = AGENT_MODULES[agent_key]
+    run = get_run_or_404(run_id) if run_id else None
+    job = enqueue("agent", lambda: agent_job(spec.name, run), agent=spec.name, run_id=run_id)
+    if not wait:
+        return ORJSONResponse(status_code=202, content={"status": job.status, "job_id": job.id})
     try:
-        run_agent_module(module)
-    except RuntimeError as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-    candidate_names = {
-        "resume": ["resume_skills.json", "resume.json"],
-        "quiz": ["quiz.json"],
-        "skillgap": ["skillgap.json", "skill_gap.json"],
-        "mentor": ["mentor_report.json", "mentor.json"],
-        "roadmap": ["roadmap.json", "learning_roadmap.json"],
-    }
-    outputs = []
-    for name in candidate_names.get(agent_key, []):
-        p = OUTPUTS_DIR / name
-        if p.exists():
-            outputs.append(p)
-    if outputs:
-        p = outputs[0]
+        # the job runs on the queue's worker threads; the event loop stays free meanwhile
+        return await asyncio.wrap_future(job.future)
+    except Exception:
+        raise HTTPException(status_code=500, detail=job.error)
+
+@app.get("/api/jobs/{job_id}")
+async def job_status(job_id: str):
+    try:
+        return job_queue.get(job_id).to_dict()
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown job '{job_id}'")
+
+@app.get("/api/jobs/{job_id}/result")
+async def job_result(job_id: str):
+    try:
+        job = job_queue.get(job_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown job '{job_id}'")
+    if job.status == "failed":
+        raise HTTPException(status_code=500, detail=job.error)
+    if job.status != "done":
+        return ORJSONResponse(status_code=202, content=job.to_dict())
+    return {"job_id": job.id, "result": job.result}
+
+@app.get("/api/metrics")
+async def metrics():
+    return {"jobs": job_queue.metrics()}
+
+@app.get("/api/roadmap/stream")
+def stream_roadmap(run_id: Optional[str] = None):
+    """Generate the roadmap and stream each week as one NDJSON line as soon as it is ready."""
+    outputs_dir = outputs_for(run_id)
+    skillgap_file = outputs_dir / "skillgap.json"
+    mentor_file = outputs_dir / "mentor_report.json"
+    missing = [p.name for p in (skillgap_file, mentor_file) if not p.exists()]
+    if missing:
+        raise HTTPException(status_code=409, detail=f"Missing required input files: {', '.join(missing)}")
+    skillgap_data = loads(skillgap_file.read_bytes())
+    mentor_data = loads(mentor_file.read_bytes())
+
+    def events():
+        weeks = []
         try:
-            return json.loads(p.read_text(encoding="utf-8"))
-        except Exception:
-            return {"status": "done", "output_path": str(p)}
-    return {"status": "done", "message": f"{agent_name} executed, no named output found in outputs/"}
+            for week in stream_roadmap_weeks(skillgap_data, mentor_data):
+                weeks.append(week)
+                yield dumps({"event": "week", "data": week}, pretty=False) + b"\n"
+        except Exception as e:
+            yield dumps({"event": "error", "detail": str(e), "weeks": len(weeks)}, pretty=False) + b"\n"
+            return
+        if weeks:
+            save_roadmap(outputs_dir / "roadmap.json", {"roadmap": weeks})
+        yield dumps({"event": "done", "weeks": len(weeks)}, pretty=False) + b"\n"
+
+    # Sync generator: Starlette iterates it in a worker thread, so blocking LLM reads are fine
+    return StreamingResponse(events(), media_type="application/x-ndjson")
 
+# Served from app/output_cache.py: bodies are encoded once per file version,
+# with ETag/Last-Modified, 304 on If-None-Match and gzip when accepted.
 @app.get("/api/outputs")
-async def list_outputs():
-    items = []
-    for p in OUTPUTS_DIR.glob("*"):
-        items.append({"name": p.name, "path": str(p)})
-    return {"outputs": items}
+async def list_outputs(request: Request, run_id: Optional[str] = None):
+    return respond(request, output_cache.listing(outputs_for(run_id), run_id))
 
 @app.get("/api/outputs/{name}")
-async def get_output(name: str):
-    p = OUTPUTS_DIR / name
-    if not p.exists():
-        raise HTTPException(status_code=404, detail="Not found")
-    text = p.read_text(encoding="utf-8")
+async def get_output(request: Request, name: str, run_id: Optional[str] = None):
+    p = outputs_for(run_id) / Path(name).name
     try:
-        return json.loads(text)
-    except Exception:
-        return {"name": p.name, "content": text}
+        entry = output_cache.file(p)
+    except (FileNotFoundError, IsADirectoryError):
+        raise HTTPException(status_code=404, detail="Not found")
+    return respond(request, entry)
 
 @app.get("/api/health")
 async def health():
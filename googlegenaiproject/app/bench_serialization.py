@@ -0,0 +1,105 @@
+"""Micro-benchmark: stdlib json vs app/serialization.py on real payloads.
+
+    python -m app.bench_serialization [--users 500] [--repeat 5]
+
+Payloads are a cohort export of `--users` copies of outputs/roadmap.json and a
+`CourseRecommendations` model per user built from app/data/coursera_courses.csv
+(the same shape FirestoreClient stores and the API serves).
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import OUTPUTS_DIR, PROJECT_ROOT
+from app.schemas import CourseItem, CourseRecommendations
+from app.serialization import dump_model, dumps, loads
+
+COURSES_CSV = PROJECT_ROOT / "app" / "data" / "coursera_courses.csv"
+
+
+def load_roadmaps(users):
+    roadmap = json.loads((OUTPUTS_DIR / "roadmap.json").read_text(encoding="utf-8"))
+    return [{"user_id": f"user-{i}", **roadmap} for i in range(users)]
+
+
+def load_recommendations(users, per_user):
+    with COURSES_CSV.open(encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    items = [
+        CourseItem(
+            provider="coursera",
+            course_id=f"coursera-{i}",
+            title=row["course"],
+            url=f"https://www.coursera.org/search?query={row['course'].replace(' ', '+')}",
+            modality=row["certificatetype"].strip().lower(),
+            mapped_skills=[s.strip(' "') for s in row["skills"].strip("{}").split(",") if s.strip(' "')],
+            priority=i,
+        )
+        for i, row in enumerate(rows)
+    ]
+    return [
+        CourseRecommendations(
+            user_id=f"user-{u}",
+            items=[items[(u * per_user + k) % len(items)] for k in range(per_user)],
+        )
+        for u in range(users)
+    ]
+
+
+def timed(fn, repeat):
+    """Best of `repeat` runs (seconds) and the output size of the last one."""
+    best = float("inf")
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, size
+
+
+def report(title, cases, repeat):
+    print(f"\n{title}")
+    baseline = None
+    for name, fn in cases:
+        seconds, size = timed(fn, repeat)
+        baseline = baseline or seconds
+        print(f"  {name:<38} {seconds * 1000:9.1f} ms  {size / 1e6:7.2f} MB  x{baseline / seconds:5.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=500, help="Users in the cohort export.")
+    parser.add_argument("--courses", type=int, default=25, help="Course recommendations per user.")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per case; the best is reported.")
+    args = parser.parse_args()
+
+    roadmaps = load_roadmaps(args.users)
+    recs = load_recommendations(args.users, args.courses)
+    encoded = dumps(roadmaps, pretty=False)
+
+    report(f"roadmap.json x {args.users} users (encode)", [
+        ("json.dumps(indent=2)  [old artifacts]", lambda: len(json.dumps(roadmaps, indent=2))),
+        ("json.dumps compact", lambda: len(json.dumps(roadmaps, separators=(",", ":"), ensure_ascii=False))),
+        ("serialization.dumps(pretty=True)", lambda: len(dumps(roadmaps, pretty=True))),
+        ("serialization.dumps", lambda: len(dumps(roadmaps, pretty=False))),
+    ], args.repeat)
+    report(f"roadmap.json x {args.users} users (decode)", [
+        ("json.loads", lambda: json.loads(encoded) and len(encoded)),
+        ("serialization.loads", lambda: loads(encoded) and len(encoded)),
+    ], args.repeat)
+    report(f"CourseRecommendations x {args.users} users, {args.courses} courses each", [
+        ("json.dumps(model_dump())", lambda: sum(len(json.dumps(r.model_dump())) for r in recs)),
+        ("serialization.dumps([model_dump()])", lambda: len(dumps([r.model_dump() for r in recs], pretty=False))),
+        ("serialization.dump_model", lambda: sum(len(dump_model(r, pretty=False)) for r in recs)),
+    ], args.repeat)
+
+
+if __name__ == "__main__":
+    main()
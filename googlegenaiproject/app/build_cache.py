@@ -0,0 +1,122 @@
+"""Content-hash cache for pipeline stages.
+
+A stage's key is sha256 over everything that can change its output:
+
+- the bytes of each declared input in outputs/ (so a stage re-runs only when an
+  upstream stage actually produced something different),
+- its external `sources` as resolved for the active run (the uploaded or
+  sample résumé, quiz answers, the persona table),
+- the agent module's source code and the spec's `version` (prompt changes),
+- the environment variables in `CONFIG_ENV` plus the spec's own `env`,
+- whether an LLM API key is set (agents fall back to heuristics without one).
+
+Outputs of a successful run are copied to `BUILD_CACHE_DIR/<agent>/<key>/`
+(default `.build_cache/` in the project root, outside the shared outputs
+directory). On a hit they are copied back atomically and the agent is not run.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import importlib.util
+import json
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from typing import Optional
+
+from .agents.registry import AgentSpec
+from .config import get_config
+from .workspace import atomic_write_text, source_path
+
+# Settings that change what every LLM-backed agent produces
+CONFIG_ENV = ("GENAI_MODEL", "LLM_CACHE_MODE", "LLM_ROUTES")
+
+
+def _file_digest(path: Path) -> str:
+    if not path.exists():
+        return "missing"
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _module_digest(module: str) -> str:
+    try:
+        spec = importlib.util.find_spec(module)
+    except (ImportError, ValueError):
+        spec = None
+    origin = getattr(spec, "origin", None)
+    return _file_digest(Path(origin)) if origin else "builtin"
+
+
+def _copy_atomic(src: Path, dest: Path) -> None:
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=str(dest.parent), prefix="." + dest.name, suffix=".tmp")
+    os.close(fd)
+    try:
+        shutil.copyfile(src, tmp)
+        os.replace(tmp, dest)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+class StageCache:
+    def __init__(self, root: Optional[Path] = None) -> None:
+        self.root = Path(root or get_config().build_cache_dir)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, spec: AgentSpec, outputs_dir: Path) -> str:
+        parts = {
+            "agent": spec.name,
+            "version": spec.version,
+            "code": _module_digest(spec.module),
+            "inputs": {name: _file_digest(Path(outputs_dir) / name) for name in spec.inputs},
+            "sources": {src: _file_digest(source_path(src)) for src in spec.sources},
+            "env": {name: os.getenv(name, "") for name in (*CONFIG_ENV, *spec.env)},
+            "llm": bool(os.getenv("GEMINI_API_KEY") or os.getenv("GENAI_API_KEY")),  # never the key itself
+        }
+        blob = json.dumps(parts, sort_keys=True)
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    def _entry(self, spec: AgentSpec, key: str) -> Path:
+        return self.root / spec.name / key
+
+    def has(self, spec: AgentSpec, key: str) -> bool:
+        return (self._entry(spec, key) / "manifest.json").exists()
+
+    def restore(self, spec: AgentSpec, key: str, outputs_dir: Path) -> bool:
+        """Copy cached outputs for `key` into `outputs_dir`; False on a miss."""
+        entry = self._entry(spec, key)
+        manifest = entry / "manifest.json"
+        try:
+            files = json.loads(manifest.read_text(encoding="utf-8"))["files"]
+            for name in files:
+                _copy_atomic(entry / name, Path(outputs_dir) / name)
+        except (OSError, ValueError, KeyError):
+            with self._lock:
+                self.misses += 1
+            return False
+        with self._lock:
+            self.hits += 1
+        return True
+
+    def store(self, spec: AgentSpec, key: str, outputs_dir: Path) -> None:
+        """Save the outputs a finished stage wrote; the manifest goes last so a torn entry is a miss."""
+        entry = self._entry(spec, key)
+        files = [name for name in spec.outputs if (Path(outputs_dir) / name).exists()]
+        if not files:
+            return
+        for name in files:
+            _copy_atomic(Path(outputs_dir) / name, entry / name)
+        atomic_write_text(entry / "manifest.json", json.dumps({"agent": spec.name, "files": files}))
+
+    def clear(self) -> None:
+        shutil.rmtree(self.root, ignore_errors=True)
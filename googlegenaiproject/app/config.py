@@ -38,6 +38,38 @@ class AppConfig:
     youtube_api_key: Optional[str]
     rapidapi_key: Optional[str]
     rapidapi_udemy_host: Optional[str]
+    llm_max_retries: int
+    llm_backoff_base: float
+    llm_backoff_max: float
+    llm_cache_mode: str
+    llm_cache_dir: str
+    llm_fake_latency_ms: float
+    llm_fake_latency_jitter: float
+    llm_router: bool
+    llm_routes: str
+    llm_hedge_percentile: float
+    llm_hedge_after_s: float
+    llm_rpm: float
+    llm_tpm: float
+    llm_quota_shared: bool
+    llm_quota_db: str
+    agent_execution: str
+    agent_workers: int
+    build_cache: bool
+    build_cache_dir: str
+    runs_dir: str
+    runs_keep: int
+    runs_max_age_days: float
+    job_workers: int
+    job_queue_depth: int
+    upload_max_bytes: int
+    json_pretty: bool
+    firestore_write_behind: bool
+    firestore_flush_ms: float
+    firestore_batch_size: int
+    firestore_cache_size: int
+    firestore_backend: str
+    firestore_local_db: str
 
 
 def get_config() -> AppConfig:
@@ -51,6 +83,38 @@ def get_config() -> AppConfig:
         youtube_api_key=os.getenv("YOUTUBE_API_KEY"),
         rapidapi_key=os.getenv("RAPIDAPI_KEY"),
         rapidapi_udemy_host=os.getenv("RAPIDAPI_UDEMY_HOST"),
+        llm_max_retries=int(os.getenv("LLM_MAX_RETRIES", "3")),
+        llm_backoff_base=float(os.getenv("LLM_BACKOFF_BASE", "1.0")),
+        llm_backoff_max=float(os.getenv("LLM_BACKOFF_MAX", "20.0")),
+        llm_cache_mode=os.getenv("LLM_CACHE_MODE", "off").lower(),
+        llm_cache_dir=os.getenv("LLM_CACHE_DIR", str(PROJECT_ROOT / ".llm_cache")),
+        llm_fake_latency_ms=float(os.getenv("LLM_FAKE_LATENCY_MS", "500")),
+        llm_fake_latency_jitter=float(os.getenv("LLM_FAKE_LATENCY_JITTER", "0.2")),
+        llm_router=os.getenv("LLM_ROUTER", "on").lower() in ("1", "on", "true", "yes"),
+        llm_routes=os.getenv("LLM_ROUTES", ""),
+        llm_hedge_percentile=float(os.getenv("LLM_HEDGE_PERCENTILE", "0.9")),
+        llm_hedge_after_s=float(os.getenv("LLM_HEDGE_AFTER_S", "10")),
+        llm_rpm=float(os.getenv("LLM_RPM", "0")),
+        llm_tpm=float(os.getenv("LLM_TPM", "0")),
+        llm_quota_shared=os.getenv("LLM_QUOTA_SHARED", "on").lower() in ("1", "on", "true", "yes"),
+        llm_quota_db=os.getenv("LLM_QUOTA_DB", str(PROJECT_ROOT / ".llm_quota.sqlite")),
+        agent_execution=os.getenv("AGENT_EXECUTION", "inprocess").lower(),
+        agent_workers=int(os.getenv("AGENT_WORKERS", "4")),
+        build_cache=os.getenv("BUILD_CACHE", "on").lower() in ("1", "on", "true", "yes"),
+        build_cache_dir=os.getenv("BUILD_CACHE_DIR", str(PROJECT_ROOT / ".build_cache")),
+        runs_dir=os.getenv("RUNS_DIR", str(PROJECT_ROOT / "runs")),
+        runs_keep=int(os.getenv("RUNS_KEEP", "200")),
+        runs_max_age_days=float(os.getenv("RUNS_MAX_AGE_DAYS", "7")),
+        job_workers=int(os.getenv("JOB_WORKERS", "2")),
+        job_queue_depth=int(os.getenv("JOB_QUEUE_DEPTH", "8")),
+        upload_max_bytes=int(os.getenv("UPLOAD_MAX_BYTES", str(10 * 1024 * 1024))),
+        json_pretty=os.getenv("JSON_PRETTY", "off").lower() in ("1", "on", "true", "yes"),
+        firestore_write_behind=os.getenv("FIRESTORE_WRITE_BEHIND", "on").lower() in ("1", "on", "true", "yes"),
+        firestore_flush_ms=float(os.getenv("FIRESTORE_FLUSH_MS", "250")),
+        firestore_batch_size=int(os.getenv("FIRESTORE_BATCH_SIZE", "500")),
+        firestore_cache_size=int(os.getenv("FIRESTORE_CACHE_SIZE", "1024")),
+        firestore_backend=os.getenv("FIRESTORE_BACKEND", "auto").lower(),
+        firestore_local_db=os.getenv("FIRESTORE_LOCAL_DB", str(PROJECT_ROOT / ".firestore_local.sqlite")),
     )
 
 
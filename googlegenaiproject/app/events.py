@@ -0,0 +1,168 @@
+"""Per-run progress events, published by the pipeline and streamed over SSE.
+
+`run_all.main` publishes through `pipeline_listener` (the `PipelineExecutor`
+callback), so clients see stages as the orchestrator schedules them instead
+of polling outputs/:
+
+    run_queued      {"job_id"}   published by /api/runall
+    run_started     {"stages": [...], "deps": {...}}
+    stage_started   {"stage", "start_s"}
+    stage_finished  {"stage", "status", "start_s", "duration_s", "error"}
+    artifact_ready  {"stage", "name", "bytes", "payload"}   payload omitted if large
+    partial         {"stage", ...}   e.g. one roadmap week as it is generated
+    run_finished    {"ok", "wall_s", "critical_path"}
+
+Each run keeps its full event log in memory (the newest `MAX_RUNS` runs), so a
+late subscriber replays from the start or from a `Last-Event-ID`. `follow` is
+an async generator: a subscriber waits on the event loop, woken through
+`call_soon_threadsafe` by publishers on pipeline threads, so an open stream
+holds no worker thread.
+Agents publish `partial` events with `publish_partial`, a no-op outside a run.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from .agents.registry import get_agent
+from .serialization import dumps_text, loads
+from .workspace import RunContext, current_run
+
+MAX_RUNS = 200
+MAX_PAYLOAD_BYTES = 64 * 1024
+TERMINAL = "run_finished"
+
+
+@dataclass(frozen=True)
+class Event:
+    id: int
+    kind: str
+    data: Dict[str, Any]
+    ts: float
+
+    def sse(self) -> str:
+        # one line per event: never pretty-printed
+        return f"id: {self.id}\nevent: {self.kind}\ndata: {dumps_text(self.data, pretty=False, default=str)}\n\n"
+
+
+class RunEventLog:
+    def __init__(self, run_id: str) -> None:
+        self.run_id = run_id
+        self.events: List[Event] = []
+        self._lock = threading.Lock()
+        self._subscribers: List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = []
+
+    @property
+    def finished(self) -> bool:
+        return bool(self.events) and self.events[-1].kind == TERMINAL
+
+    def publish(self, kind: str, data: Dict[str, Any]) -> Event:
+        with self._lock:
+            event = Event(len(self.events) + 1, kind, {"run_id": self.run_id, **data}, time.time())
+            self.events.append(event)
+            subscribers = list(self._subscribers)
+        for loop, wake in subscribers:
+            try:
+                loop.call_soon_threadsafe(wake.set)
+            except RuntimeError:  # subscriber's loop already closed
+                pass
+        return event
+
+    async def follow(self, after: int = 0, heartbeat_s: float = 15.0) -> AsyncIterator[Optional[Event]]:
+        """Events with id > `after`, then live ones until run_finished; None marks an idle heartbeat."""
+        subscriber = (asyncio.get_running_loop(), asyncio.Event())
+        wake = subscriber[1]
+        with self._lock:
+            self._subscribers.append(subscriber)
+        try:
+            while True:
+                wake.clear()  # before reading, so a publish in between still wakes us
+                with self._lock:
+                    fresh = self.events[after:]
+                    if not fresh and self.finished:
+                        return
+                if not fresh:
+                    try:
+                        await asyncio.wait_for(wake.wait(), heartbeat_s)
+                    except asyncio.TimeoutError:
+                        yield None
+                    continue
+                for event in fresh:
+                    after = event.id
+                    yield event
+                    if event.kind == TERMINAL:
+                        return
+        finally:
+            with self._lock:
+                self._subscribers.remove(subscriber)
+
+
+class EventBus:
+    def __init__(self, max_runs: int = MAX_RUNS) -> None:
+        self._logs: "OrderedDict[str, RunEventLog]" = OrderedDict()
+        self._max_runs = max_runs
+        self._lock = threading.Lock()
+
+    def log(self, run_id: str, create: bool = False) -> Optional[RunEventLog]:
+        with self._lock:
+            log = self._logs.get(run_id)
+            if log is None and create:
+                log = self._logs[run_id] = RunEventLog(run_id)
+                while len(self._logs) > self._max_runs:
+                    self._logs.popitem(last=False)
+            return log
+
+    def publish(self, run_id: str, kind: str, **data: Any) -> Event:
+        return self.log(run_id, create=True).publish(kind, data)
+
+    def discard(self, run_id: str) -> None:
+        with self._lock:
+            self._logs.pop(run_id, None)
+
+
+bus = EventBus()
+
+
+def publish_partial(stage: str, **data: Any) -> None:
+    """Progress from inside an agent (e.g. a finished roadmap week); ignored outside a run."""
+    run = current_run()
+    if run is not None:
+        bus.publish(run.run_id, "partial", stage=stage, **data)
+
+
+def _artifact(path) -> Dict[str, Any]:
+    size = path.stat().st_size
+    info: Dict[str, Any] = {"name": path.name, "bytes": size}
+    if size <= MAX_PAYLOAD_BYTES:
+        try:
+            info["payload"] = loads(path.read_bytes())
+        except ValueError:
+            pass
+    return info
+
+
+def pipeline_listener(run: RunContext, then: Optional[Callable] = None) -> Callable:
+    """`PipelineExecutor.run(on_event=...)` callback publishing to the run's event log."""
+
+    def on_event(kind: str, result) -> None:
+        if kind == "start":
+            bus.publish(run.run_id, "stage_started", stage=result.name, start_s=result.start_s)
+        else:
+            bus.publish(
+                run.run_id, "stage_finished", stage=result.name, status=result.status,
+                start_s=result.start_s, duration_s=result.duration_s, error=result.error,
+            )
+        if kind in ("ok", "cached"):
+            for name in get_agent(result.name).outputs:
+                path = run.outputs_dir / name
+                if path.exists():
+                    bus.publish(run.run_id, "artifact_ready", stage=result.name, **_artifact(path))
+        if then:
+            then(kind, result)
+
+    return on_event
@@ -1,41 +1,443 @@
-"""Gemini 2.0 Flash client factory and helpers using official Google SDK.
+"""Shared Gemini client used by every agent and the Backend ML service.
 
 Notes:
-- Requires `google-genai`.
-- We keep a small wrapper to allow easy mocking in tests.
+- Built on `google-generativeai`, the SDK all agents already call.
+- `genai.configure` runs once per process and `GenerativeModel` handles are
+  cached per model name, so the underlying gRPC channel is reused across calls.
+- Transient failures (429, quota, 5xx, deadline) are retried with full-jitter
+  exponential backoff; limits come from `AppConfig`.
+- Per-agent call, latency and token counters are kept in-process; see
+  `LLMClient.stats()`.
+- An optional `rate_limiter` (see `app.ratelimit`) is consulted before every
+  attempt, including retries. `LLM_RPM`/`LLM_TPM` enable one by default, shared
+  across agent processes through a SQLite file unless `LLM_QUOTA_SHARED=off`.
+- `LLMClient.stream` yields text chunks for long outputs (see the roadmap agent).
+- With `LLM_ROUTER` on (default), agents that have alternate models are
+  routed by rolling latency and hedged on slow calls; see `app.routing`.
+- `LLM_CACHE_MODE` enables the record/replay/cache/fake layer from
+  `app.llm_cache`; in `replay` and `fake` no API key is needed.
+- `model_factory` and `sleep` are injectable to allow easy mocking in tests.
 """
 
 from __future__ import annotations
 
-from typing import Any, Dict, Optional
-
-from tenacity import retry, stop_after_attempt, wait_exponential
+import os
+import random
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional
 
 try:
-    # Official SDK import style as of 2025
-    from google import genai
+    import google.generativeai as genai  # type: ignore
 except Exception:  # pragma: no cover - allows tests without SDK
     genai = None  # type: ignore
 
 from .config import get_config
+from .llm_cache import CACHE_MODES, CachedResponse, FakeBackend, ResponseStore, cache_key
+from .prompting import count_tokens
+from .ratelimit import SharedQuotaLimiter, TokenBucketLimiter
+from .routing import HedgeCancelled, ModelRouter, parse_routes
+
+
+TRANSIENT_MARKERS = (
+    "429",
+    "rate limit",
+    "resource exhausted",
+    "quota",
+    "500",
+    "503",
+    "unavailable",
+    "deadline",
+    "timed out",
+)
+
+
+def is_transient_error(exc: BaseException) -> bool:
+    msg = str(exc).lower()
+    return any(marker in msg for marker in TRANSIENT_MARKERS)
+
+
+def normalize_model_name(name: str) -> str:
+    """`gemini-2.0-flash` and `models/gemini-2.0-flash` share one cached handle."""
+    if name.startswith(("models/", "tunedModels/")):
+        return name
+    return f"models/{name}"
+
+
+@dataclass
+class AgentStats:
+    calls: int = 0
+    errors: int = 0
+    retries: int = 0
+    latency_s: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    rate_limit_wait_s: float = 0.0
+    cache_hits: int = 0
+
 
+class BoundModel:
+    """Model handle tied to one agent; drop-in for `GenerativeModel.generate_content`."""
 
-class GenAIFactory:
-    _client: Optional["genai.Client"] = None
+    def __init__(self, client: "LLMClient", model_name: str, agent: str) -> None:
+        self.client = client
+        self.model_name = model_name
+        self.agent = agent
 
-    @classmethod
-    def get_client(cls) -> "genai.Client":
+    def generate_content(self, prompt: Any, **kwargs: Any) -> Any:
+        return self.client.generate_response(prompt, model=self.model_name, agent=self.agent, **kwargs)
+
+    def generate(self, prompt: Any, **kwargs: Any) -> str:
+        return self.client.generate(prompt, model=self.model_name, agent=self.agent, **kwargs)
+
+
+class LLMClient:
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        default_model: Optional[str] = None,
+        max_retries: Optional[int] = None,
+        backoff_base: Optional[float] = None,
+        backoff_max: Optional[float] = None,
+        model_factory: Optional[Callable[[str], Any]] = None,
+        sleep: Callable[[float], None] = time.sleep,
+        rate_limiter: Optional[Any] = None,
+        completion_token_reserve: int = 1024,
+        cache_mode: Optional[str] = None,
+        response_store: Optional[ResponseStore] = None,
+        fake_backend: Optional[FakeBackend] = None,
+        router: Optional[ModelRouter] = None,
+    ) -> None:
         cfg = get_config()
-        if cls._client is None:
-            if genai is None:
-                raise RuntimeError(
-                    "google-genai SDK not available. Please install requirements."
-                )
-            cls._client = genai.Client(api_key=cfg.genai_api_key)
-        return cls._client
+        self.api_key = api_key or os.getenv("GEMINI_API_KEY") or cfg.genai_api_key
+        self.default_model = default_model or cfg.genai_model
+        self.max_retries = cfg.llm_max_retries if max_retries is None else max_retries
+        self.backoff_base = cfg.llm_backoff_base if backoff_base is None else backoff_base
+        self.backoff_max = cfg.llm_backoff_max if backoff_max is None else backoff_max
+        self._model_factory = model_factory
+        self._sleep = sleep
+        if rate_limiter is None and cfg.llm_rpm > 0:
+            if cfg.llm_quota_shared:
+                rate_limiter = SharedQuotaLimiter(Path(cfg.llm_quota_db), rpm=cfg.llm_rpm, tpm=cfg.llm_tpm or None)
+            else:
+                rate_limiter = TokenBucketLimiter(rpm=cfg.llm_rpm, tpm=cfg.llm_tpm or None)
+        self.rate_limiter = rate_limiter
+        self.completion_token_reserve = completion_token_reserve
+        self.cache_mode = (cache_mode or cfg.llm_cache_mode).lower()
+        if self.cache_mode not in CACHE_MODES:
+            raise ValueError(f"LLM_CACHE_MODE must be one of {CACHE_MODES}, got {self.cache_mode!r}")
+        self.response_store = response_store or ResponseStore(Path(cfg.llm_cache_dir))
+        self.fake_backend = fake_backend or FakeBackend(
+            latency_s=cfg.llm_fake_latency_ms / 1000.0,
+            jitter=cfg.llm_fake_latency_jitter,
+            sleep=sleep,
+        )
+        if router is None and cfg.llm_router:
+            router = ModelRouter(
+                alternates=parse_routes(cfg.llm_routes) if cfg.llm_routes else None,
+                hedge_percentile=cfg.llm_hedge_percentile,
+                hedge_after_s=cfg.llm_hedge_after_s,
+                retryable=is_transient_error,
+                normalize=normalize_model_name,
+            )
+        self.router = router
+        self._models: Dict[str, Any] = {}
+        self._stats: Dict[str, AgentStats] = {}
+        self._lock = threading.Lock()
+        self._configured = False
+
+    # ------------------------
+    # Model handles
+    # ------------------------
+    def _configure(self) -> None:
+        if self._configured or self._model_factory is not None:
+            return
+        if genai is None:
+            raise RuntimeError("google-generativeai SDK not available. Please install requirements.")
+        if not self.api_key:
+            raise RuntimeError("GEMINI_API_KEY (or GENAI_API_KEY) not found in environment.")
+        genai.configure(api_key=self.api_key)
+        self._configured = True
+
+    def model(self, name: Optional[str] = None) -> Any:
+        """Return the cached SDK model handle for `name` (created on first use)."""
+        key = normalize_model_name(name or self.default_model)
+        with self._lock:
+            handle = self._models.get(key)
+            if handle is None:
+                self._configure()
+                factory = self._model_factory or genai.GenerativeModel
+                handle = factory(key)
+                self._models[key] = handle
+            return handle
+
+    def for_agent(self, agent: str, model: Optional[str] = None) -> BoundModel:
+        return BoundModel(self, model or self.default_model, agent)
+
+    # ------------------------
+    # Calls
+    # ------------------------
+    def _estimate_tokens(self, prompt: Any, kwargs: Optional[Dict[str, Any]] = None) -> int:
+        """Prompt tokens plus the completion cap (`max_output_tokens`) or the default reserve."""
+        config = (kwargs or {}).get("generation_config") or {}
+        max_out = config.get("max_output_tokens") if isinstance(config, dict) else getattr(config, "max_output_tokens", None)
+        return count_tokens(str(prompt)) + (max_out or self.completion_token_reserve)
+
+    def _backoff(self, attempt: int, base: float) -> float:
+        # Full jitter: uniform(0, min(cap, base * 2^attempt))
+        return random.uniform(0, min(self.backoff_max, base * (2 ** attempt)))
+
+    def _retry_wait(self, wait: float) -> None:
+        if self.rate_limiter is not None and hasattr(self.rate_limiter, "pause"):
+            # Back off everyone sharing the quota; the next acquire() does the waiting
+            self.rate_limiter.pause(wait)
+        else:
+            self._sleep(wait)
+
+    def generate_response(
+        self,
+        prompt: Any,
+        model: Optional[str] = None,
+        agent: str = "default",
+        max_retries: Optional[int] = None,
+        backoff_base: Optional[float] = None,
+        **kwargs: Any,
+    ) -> Any:
+        """Call `generate_content` with retries and return the raw SDK response."""
+        model_name = normalize_model_name(model or self.default_model)
+        key = None
+        if self.cache_mode in ("record", "replay", "cache") and not kwargs.get("stream"):
+            key = cache_key(model_name, prompt, kwargs)
+        if self.cache_mode in ("replay", "cache"):
+            cached = self.response_store.get(key)
+            if cached is not None:
+                self._record(agent, 0.0, response=cached, cache_hit=True)
+                return cached
+            if self.cache_mode == "replay":
+                raise LookupError(f"No recorded LLM response for agent '{agent}' (key {key[:12]}); record it first.")
+        retries = self.max_retries if max_retries is None else max_retries
+        base = self.backoff_base if backoff_base is None else backoff_base
+
+        def call(name: str, cancelled: Optional[threading.Event] = None) -> Any:
+            return self._call_model(prompt, name, agent, retries, base, kwargs, cancelled)
+
+        if self.router is not None and self.router.routes(agent):
+            response = self.router.call(agent, model_name, call)
+        else:
+            response = call(model_name)
+        if key is not None:
+            self.response_store.put(key, model_name, agent, response)
+        return response
+
+    def _call_model(
+        self,
+        prompt: Any,
+        model_name: str,
+        agent: str,
+        retries: int,
+        base: float,
+        kwargs: Dict[str, Any],
+        cancelled: Optional[threading.Event] = None,
+    ) -> Any:
+        """One model, with rate limiting and retries (or the fake backend).
+
+        `cancelled` (set by the router once a hedged sibling won) stops the retry loop.
+        """
+        if self.cache_mode == "fake":
+            start = time.perf_counter()
+            response = self.fake_backend.generate(model_name, agent, prompt)
+            self._record(agent, time.perf_counter() - start, response=response)
+            return response
+
+        handle = self.model(model_name)
+        reserved = self._estimate_tokens(prompt, kwargs)
+        attempt = 0
+        while True:
+            if cancelled is not None and cancelled.is_set():
+                raise HedgeCancelled(f"{model_name}: another model already answered")
+            if self.rate_limiter is not None:
+                waited = self.rate_limiter.acquire(reserved)
+                with self._lock:
+                    self._stats.setdefault(agent, AgentStats()).rate_limit_wait_s += waited
+            start = time.perf_counter()
+            try:
+                response = handle.generate_content(prompt, **kwargs)
+            except Exception as e:
+                self._record(agent, time.perf_counter() - start, error=True)
+                if attempt >= retries or not is_transient_error(e):
+                    raise
+                if cancelled is not None and cancelled.is_set():
+                    raise  # a hedged sibling already answered: don't retry
+                wait = self._backoff(attempt, base)
+                attempt += 1
+                with self._lock:
+                    self._stats[agent].retries += 1
+                print(f"[llm:{agent}] transient error ({e}); retry {attempt}/{retries} in {wait:.1f}s")
+                self._retry_wait(wait)
+                continue
+            used = self._record(agent, time.perf_counter() - start, response=response)
+            if self.rate_limiter is not None:
+                self.rate_limiter.settle(reserved, used)
+            return response
+
+    def stream(
+        self,
+        prompt: Any,
+        model: Optional[str] = None,
+        agent: str = "default",
+        chunk_chars: int = 64,
+        **kwargs: Any,
+    ) -> Iterator[str]:
+        """Yield response text as it arrives (`generate_content(stream=True)`).
+
+        Transient errors are only retried before the first chunk is yielded; after
+        that the caller already holds partial output and the error propagates.
+        Cache modes store and serve the concatenated text under the same key as a
+        non-streamed call, replaying it in `chunk_chars` pieces.
+        """
+        model_name = normalize_model_name(model or self.default_model)
+        key = None
+        if self.cache_mode in ("record", "replay", "cache"):
+            key = cache_key(model_name, prompt, kwargs)
+        if self.cache_mode in ("replay", "cache"):
+            cached = self.response_store.get(key)
+            if cached is not None:
+                self._record(agent, 0.0, response=cached, cache_hit=True)
+                for i in range(0, len(cached.text), chunk_chars):
+                    yield cached.text[i:i + chunk_chars]
+                return
+            if self.cache_mode == "replay":
+                raise LookupError(f"No recorded LLM response for agent '{agent}' (key {key[:12]}); record it first.")
+        # Streams are not hedged (chunks are already flowing); just take the best-ranked model
+        served_by = self.router.rank(agent, model_name)[0] if self.router is not None else model_name
+        if self.cache_mode == "fake":
+            start = time.perf_counter()
+            parts = []
+            for chunk in self.fake_backend.stream(served_by, agent, prompt, chunk_chars=chunk_chars):
+                parts.append(chunk)
+                yield chunk
+            text = "".join(parts)
+            response = CachedResponse(text, len(str(prompt)) // 4, len(text) // 4, source="fake")
+            self._record(agent, time.perf_counter() - start, response=response)
+            return
+
+        handle = self.model(served_by)
+        reserved = self._estimate_tokens(prompt, kwargs)
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                waited = self.rate_limiter.acquire(reserved)
+                with self._lock:
+                    self._stats.setdefault(agent, AgentStats()).rate_limit_wait_s += waited
+            start = time.perf_counter()
+            parts = []
+            try:
+                response = handle.generate_content(prompt, stream=True, **kwargs)
+                for chunk in response:
+                    text = getattr(chunk, "text", None)
+                    if text:
+                        parts.append(text)
+                        yield text
+            except Exception as e:
+                self._record(agent, time.perf_counter() - start, error=True)
+                if self.router is not None:
+                    self.router.observe(served_by, time.perf_counter() - start, ok=False)
+                if parts or attempt >= self.max_retries or not is_transient_error(e):
+                    raise
+                wait = self._backoff(attempt, self.backoff_base)
+                attempt += 1
+                with self._lock:
+                    self._stats[agent].retries += 1
+                print(f"[llm:{agent}] transient error ({e}); retry {attempt}/{self.max_retries} in {wait:.1f}s")
+                self._retry_wait(wait)
+                continue
+            # usage_metadata is populated once the stream has been fully consumed
+            used = self._record(agent, time.perf_counter() - start, response=response)
+            if self.router is not None:
+                self.router.observe(served_by, time.perf_counter() - start, ok=True)
+            if self.rate_limiter is not None:
+                self.rate_limiter.settle(reserved, used)
+            if key is not None:
+                usage = getattr(response, "usage_metadata", None)
+                self.response_store.put(key, model_name, agent, CachedResponse(
+                    "".join(parts),
+                    int(getattr(usage, "prompt_token_count", 0) or 0),
+                    int(getattr(usage, "candidates_token_count", 0) or 0),
+                    source="live",
+                ))
+            return
+
+    def generate(self, prompt: Any, model: Optional[str] = None, agent: str = "default", **kwargs: Any) -> str:
+        """Text generation helper for agent prompts."""
+        response = self.generate_response(prompt, model=model, agent=agent, **kwargs)
+        text = getattr(response, "text", None)
+        return text if text is not None else str(response)
+
+    # ------------------------
+    # Counters
+    # ------------------------
+    def _record(
+        self, agent: str, latency: float, response: Any = None, error: bool = False, cache_hit: bool = False
+    ) -> int:
+        """Update counters; returns the total tokens reported for the call (0 if unknown)."""
+        usage = getattr(response, "usage_metadata", None)
+        prompt_tokens = int(getattr(usage, "prompt_token_count", 0) or 0)
+        completion_tokens = int(getattr(usage, "candidates_token_count", 0) or 0)
+        with self._lock:
+            s = self._stats.setdefault(agent, AgentStats())
+            s.calls += 1
+            s.latency_s += latency
+            if error:
+                s.errors += 1
+            if cache_hit:
+                s.cache_hits += 1
+                return 0
+            s.prompt_tokens += prompt_tokens
+            s.completion_tokens += completion_tokens
+        return prompt_tokens + completion_tokens
+
+    @property
+    def offline(self) -> bool:
+        """True when calls are served without Gemini (no API key required)."""
+        return self.cache_mode in ("replay", "fake")
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            out = {}
+            for agent, s in self._stats.items():
+                row = asdict(s)
+                row["avg_latency_s"] = round(s.latency_s / s.calls, 4) if s.calls else 0.0
+                out[agent] = row
+            return out
+
+    def log_stats(self, agent: str) -> None:
+        row = self.stats().get(agent)
+        if row:
+            print(
+                f"[llm:{agent}] {row['calls']} calls ({row['errors']} errors, {row['retries']} retries), "
+                f"avg {row['avg_latency_s']}s, tokens in/out {row['prompt_tokens']}/{row['completion_tokens']}, "
+                f"quota wait {row['rate_limit_wait_s']:.1f}s"
+            )
+        routed = self.router.stats()["agents"].get(agent) if self.router is not None else None
+        if routed:
+            print(f"[llm:{agent}] {routed['hedges']} hedged ({routed['hedge_wins']} won), {routed['failovers']} failovers")
+
+
+_client: Optional[LLMClient] = None
+_client_lock = threading.Lock()
+
+
+def get_llm_client(api_key: Optional[str] = None) -> LLMClient:
+    """Process-wide shared client. The first caller's `api_key` (or the env) wins."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = LLMClient(api_key=api_key)
+        return _client
 
 
-@retry(wait=wait_exponential(multiplier=0.5, max=8), stop=stop_after_attempt(3))
 def generate_text(prompt: str, system_instruction: Optional[str] = None, **kwargs: Any) -> str:
     """Simple text generation helper for agent prompts.
 
@@ -44,18 +446,9 @@ def generate_text(prompt: str, system_instruction: Optional[str] = None, **kwarg
     prompt : str
         The user/content prompt.
     system_instruction : Optional[str]
-        System prompt to anchor the model behavior.
+        System prompt prepended to the content.
     kwargs : Any
-        Additional options passed to the SDK.
+        Additional options passed to `LLMClient.generate`.
     """
-    cfg = get_config()
-    client = GenAIFactory.get_client()
-    response = client.models.generate_content(
-        model=cfg.genai_model,
-        contents=prompt,
-        config={"system_instruction": system_instruction, **kwargs},
-    )
-    # `response.text` is typical; adapt if SDK changes structure
-    return getattr(response, "text", str(response))
-
-
+    contents = [system_instruction, prompt] if system_instruction else prompt
+    return get_llm_client().generate(contents, **kwargs)
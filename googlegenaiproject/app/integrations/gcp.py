@@ -9,11 +9,57 @@ Firestore collections (by user_id):
 - recommendations/{user_id}
 - mentor/{user_id}
 - profiler_payload/{user_id}
+
+Writes are buffered (write-behind) unless FIRESTORE_WRITE_BEHIND=off:
+
+- a document written several times before a flush is sent once, with its
+  latest data (last write wins);
+- pending documents go out as Firestore batched writes of at most
+  FIRESTORE_BATCH_SIZE operations (Firestore's limit is 500);
+- the buffer flushes when it reaches the batch size, FIRESTORE_FLUSH_MS after
+  its first pending write, on an explicit `flush()` and at interpreter exit.
+  Flushes are serialized, so a document's writes land in order.
+
+Roadmaps and course recommendations are saved as deltas: milestones (items)
+are stored as a map keyed by id plus an order list, the new document is diffed
+against the last persisted copy (the cache entry) and only the changed
+top-level fields and milestones go out, as field-path updates. A save equal to
+what is stored is dropped, and a roadmap that changed gets
+`version = max(its version, stored version + 1)`. With no persisted copy at
+hand (not cached, first save) the whole document is set. Deltas assume this
+client is the only writer of its users' roadmaps: nothing checks that the
+stored document still matches the base.
+
+`write_stats()` reports requested writes, coalesced ones, documents written
+(how many as deltas, how many field paths), unchanged saves and commit
+round-trips.
+
+Documents live in a storage backend (app/integrations/storage.py). With
+FIRESTORE_BACKEND=auto (default) that is Firestore when the client library and
+credentials are available (FIRESTORE_EMULATOR_HOST points it at the emulator),
+otherwise the local SQLite store at FIRESTORE_LOCAL_DB;
+FIRESTORE_BACKEND=firestore|sqlite forces one.
+
+Reads (`get_roadmap`, ... one per collection, `get_many` across users,
+`get_user_state` across collections) see the client's own pending writes
+first, then a bounded LRU cache of documents (FIRESTORE_CACHE_SIZE), and only
+then the store; misses are fetched with one backend `get_many` per
+READ_BATCH_SIZE documents. Every write invalidates the cached copy (roadmaps and
+recommendations: replaces it once committed), and a fetch that raced a write
+is not cached. Writes by other processes are not seen until the entry
+is evicted.
 """
 
 from __future__ import annotations
 
-from typing import Any, Dict
+import atexit
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Type
+
+from pydantic import BaseModel
 
 try:  # pragma: no cover - allow running without GCP deps
     from google.cloud import firestore  # type: ignore
@@ -30,60 +76,366 @@ from ..schemas import (
     SkillGraph,
     PCP,
 )
+from ..config import AppConfig, get_config
+from ..serialization import to_document
+from .storage import DELETE, FieldPath, FirestoreBackend, Key, SQLiteBackend, StorageBackend
 
+READ_BATCH_SIZE = 100
 
-class FirestoreClient:
-    def __init__(self) -> None:
-        # If Firestore client is unavailable, fallback to in-memory store for CLI demo
-        if firestore is None:
-            self.client = None
-            self._memory: Dict[str, Dict[str, Any]] = {}
+COLLECTIONS: Dict[str, Type[BaseModel]] = {
+    "profiles": ResumeProfile,
+    "skill_graphs": SkillGraph,
+    "pcps": PCP,
+    "roadmaps": Roadmap,
+    "market_signals": MarketSignals,
+    "recommendations": CourseRecommendations,
+    "mentor": MentorSummary,
+    "profiler_payload": ProfilerPayload,
+}
+
+# Collections saved as field-path deltas: list field -> id of each item. The list
+# is stored as a map {id: item} plus "<field>_order", so one item is one field path.
+KEYED_LISTS: Dict[str, Tuple[str, Callable[[Dict[str, Any]], str]]] = {
+    "roadmaps": ("milestones", lambda m: m["id"]),
+    "recommendations": ("items", lambda i: f"{i['provider']}:{i['course_id']}"),
+}
+ORDER_SUFFIX = "_order"
+_MISSING = object()
+
+
+def _encode(collection: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    name, item_id = KEYED_LISTS[collection]
+    items = data.get(name)
+    if not isinstance(items, list):
+        return data
+    ids = [item_id(item) for item in items]
+    if len(set(ids)) != len(ids):
+        return data  # not addressable by id: kept (and rewritten) as a list
+    return {**data, name: dict(zip(ids, items)), name + ORDER_SUFFIX: ids}
+
+
+def _decode(collection: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    if collection not in KEYED_LISTS:
+        return data
+    name, _ = KEYED_LISTS[collection]
+    items = data.get(name)
+    if not isinstance(items, dict):
+        return data  # list form, written before delta saves
+    doc = {k: v for k, v in data.items() if k != name + ORDER_SUFFIX}
+    doc[name] = [items[item] for item in data.get(name + ORDER_SUFFIX, items)]
+    return doc
+
+
+def _delta(collection: str, base: Dict[str, Any], data: Dict[str, Any]) -> Dict[FieldPath, Any]:
+    """Field paths that turn the stored `base` into `data` (DELETE for removed ones)."""
+    keyed = KEYED_LISTS[collection][0]
+    changes: Dict[FieldPath, Any] = {}
+    for name in [*data, *(n for n in base if n not in data)]:
+        old, new = base.get(name, _MISSING), data.get(name, _MISSING)
+        if old == new:
+            continue
+        if new is _MISSING:
+            changes[(name,)] = DELETE
+        elif name == keyed and isinstance(old, dict) and isinstance(new, dict):
+            for item in [*new, *(i for i in old if i not in new)]:
+                if old.get(item, _MISSING) != new.get(item, _MISSING):
+                    changes[(name, item)] = new.get(item, DELETE)
         else:
-            try:
-                self.client = firestore.Client()
-                self._memory = {}
-            except Exception:
-                # Fallback if ADC/emulator not configured
-                self.client = None
-                self._memory = {}
-
-    def _doc(self, collection: str, user_id: str) -> Any:
-        if self.client is None:
-            key = f"{collection}/{user_id}"
-            # Represent a minimal doc-like interface
-            class _Doc:
-                def __init__(self, store: Dict[str, Dict[str, Any]], k: str) -> None:
-                    self.store = store
-                    self.k = k
-
-                def set(self, data: Dict[str, Any]) -> None:
-                    self.store[self.k] = data
-
-            return _Doc(self._memory, key)
-        return self.client.collection(collection).document(user_id)
+            changes[(name,)] = new
+    return changes
+
+
+@dataclass
+class WriteStats:
+    requested: int = 0  # save_* calls
+    coalesced: int = 0  # replaced a pending write to the same document
+    written: int = 0  # documents sent to the store
+    delta_writes: int = 0  # of those, sent as field-path updates
+    fields_updated: int = 0  # field paths in those updates
+    unchanged: int = 0  # saves equal to the stored document, not sent
+    commits: int = 0  # round-trips (batch commits or direct sets)
+    failed_commits: int = 0
+    flushes: Dict[str, int] = field(default_factory=lambda: {"size": 0, "time": 0, "explicit": 0})
+
+
+@dataclass
+class _Write:
+    data: Dict[str, Any]  # the whole document after this write
+    base: Optional[Dict[str, Any]] = None  # stored copy to diff against; None sends a full set
+
+
+@dataclass
+class ReadStats:
+    hits: int = 0  # served from pending writes or the cache
+    misses: int = 0
+    round_trips: int = 0
+
+
+def _default_backend(cfg: AppConfig) -> StorageBackend:
+    if cfg.firestore_backend != "sqlite" and firestore is not None:
+        try:
+            return FirestoreBackend(firestore.Client())
+        except Exception:
+            # ADC/emulator not configured
+            if cfg.firestore_backend == "firestore":
+                raise
+    elif cfg.firestore_backend == "firestore":
+        raise RuntimeError("FIRESTORE_BACKEND=firestore but google-cloud-firestore is not installed")
+    return SQLiteBackend(Path(cfg.firestore_local_db))
+
+
+class FirestoreClient:
+    def __init__(
+        self,
+        client: Any = None,
+        backend: Optional[StorageBackend] = None,
+        write_behind: Optional[bool] = None,
+        flush_interval_s: Optional[float] = None,
+        batch_size: Optional[int] = None,
+        cache_size: Optional[int] = None,
+    ) -> None:
+        cfg = get_config()
+        if backend is None:
+            backend = FirestoreBackend(client) if client is not None else _default_backend(cfg)
+        self.backend = backend
+        self.client = backend.client if isinstance(backend, FirestoreBackend) else None
+        self.write_behind = cfg.firestore_write_behind if write_behind is None else write_behind
+        self.flush_interval_s = cfg.firestore_flush_ms / 1000.0 if flush_interval_s is None else flush_interval_s
+        self.batch_size = max(1, min(500, cfg.firestore_batch_size if batch_size is None else batch_size))
+        self._pending: "OrderedDict[Key, _Write]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._stats = WriteStats()
+        self._inflight: Dict[Key, _Write] = {}  # being committed by flush()
+        self._cache: "OrderedDict[Key, Dict[str, Any]]" = OrderedDict()  # as stored
+        self._cache_size = cfg.firestore_cache_size if cache_size is None else cache_size
+        self._generation = 0  # bumped whenever stored data changes
+        self._read_stats = ReadStats()
+        if self.write_behind:
+            atexit.register(self.flush)
+
+    def _set(self, collection: str, user_id: str, data: Dict[str, Any]) -> Optional[int]:
+        """Queue a document (or, without write-behind, write it now); returns its stored version."""
+        key = (collection, user_id)
+        delta = collection in KEYED_LISTS
+        previous: Optional[Dict[str, Any]] = None
+        if delta:
+            data = _encode(collection, data)
+        with self._lock:
+            self._stats.requested += 1
+            entry = self._pending.get(key) or self._inflight.get(key)
+            if delta:
+                # the cache holds the last persisted copy: the base to diff against
+                previous = entry.data if entry else self._cache.get(key)
+                if previous is not None:
+                    same = {**previous, "version": None} == {**data, "version": None}
+                    if same and data.get("version", 0) <= previous.get("version", 0):
+                        self._stats.unchanged += 1
+                        return previous.get("version")
+                    if "version" in data:
+                        data = {**data, "version": max(data["version"], previous.get("version", 0) + 1)}
+            else:
+                self._cache.pop(key, None)
+                self._generation += 1
+            if key in self._pending:
+                self._stats.coalesced += 1
+                self._pending[key].data = data  # still diffed against the base it was queued with
+            else:
+                self._pending[key] = _Write(data, previous)
+            full = len(self._pending) >= self.batch_size
+            if self.write_behind and not full and self._timer is None and self.flush_interval_s > 0:
+                self._timer = threading.Timer(self.flush_interval_s, self._flush_on_timer)
+                self._timer.daemon = True
+                self._timer.start()
+        if not self.write_behind:
+            self.flush(reason="write_through")
+        elif full:
+            self.flush(reason="size")
+        return data.get("version")
+
+    def _flush_on_timer(self) -> None:
+        try:
+            self.flush(reason="time")
+        except Exception as e:
+            print(f"[Warning] Firestore write-behind flush failed, will retry: {e}")
+            with self._lock:
+                if self._pending and self._timer is None:
+                    self._timer = threading.Timer(self.flush_interval_s, self._flush_on_timer)
+                    self._timer.daemon = True
+                    self._timer.start()
+
+    def flush(self, reason: str = "explicit") -> int:
+        """Send every pending write as batched commits; returns the number of documents written."""
+        with self._flush_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                pending, self._pending = self._pending, OrderedDict()
+                self._inflight = dict(pending)
+                if pending:
+                    self._stats.flushes[reason] = self._stats.flushes.get(reason, 0) + 1
+            items = list(pending.items())
+            written = 0
+            for start in range(0, len(items), self.batch_size):
+                chunk = items[start:start + self.batch_size]
+                sets: List[Tuple[Key, Dict[str, Any]]] = []
+                updates: List[Tuple[Key, Dict[FieldPath, Any]]] = []
+                for key, entry in chunk:
+                    if entry.base is None:
+                        sets.append((key, entry.data))
+                    else:
+                        changes = _delta(key[0], entry.base, entry.data)
+                        if changes:
+                            updates.append((key, changes))
+                try:
+                    if sets or updates:
+                        self.backend.write_many(sets, updates)
+                except Exception:
+                    with self._lock:
+                        self._inflight = {}
+                        self._stats.failed_commits += 1
+                        # re-queue what was not written; a newer write queued against
+                        # this data must now be diffed against what is really stored
+                        for key, entry in items[start:]:
+                            if key not in self._pending:
+                                self._pending[key] = entry
+                            else:
+                                self._pending[key].base = entry.base
+                    raise
+                written += len(sets) + len(updates)
+                with self._lock:
+                    for key, entry in chunk:
+                        self._inflight.pop(key, None)
+                        if key[0] in KEYED_LISTS:
+                            self._remember(key, entry.data)
+                        else:
+                            self._cache.pop(key, None)
+                    self._generation += 1
+                    self._stats.written += len(sets) + len(updates)
+                    self._stats.delta_writes += len(updates)
+                    self._stats.fields_updated += sum(len(changes) for _, changes in updates)
+                    self._stats.unchanged += len(chunk) - len(sets) - len(updates)
+                    self._stats.commits += 1 if sets or updates else 0
+            return written
+
+    def _remember(self, key: Key, data: Dict[str, Any]) -> None:
+        # caller holds self._lock
+        if self._cache_size <= 0:
+            return
+        self._cache[key] = data
+        self._cache.move_to_end(key)
+        while len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+
+    def pending_writes(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def write_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = asdict(self._stats)
+            stats["pending"] = len(self._pending)
+            return stats
+
+    def _get_documents(self, keys: Iterable[Key]) -> Dict[Key, Optional[Dict[str, Any]]]:
+        keys = list(dict.fromkeys(keys))
+        found: Dict[Key, Optional[Dict[str, Any]]] = {}
+        missing: List[Key] = []
+        with self._lock:
+            generation = self._generation
+            for key in keys:
+                if key in self._pending:
+                    found[key] = self._pending[key].data
+                elif key in self._inflight:
+                    found[key] = self._inflight[key].data
+                elif key in self._cache:
+                    self._cache.move_to_end(key)
+                    found[key] = self._cache[key]
+                else:
+                    missing.append(key)
+            self._read_stats.hits += len(keys) - len(missing)
+            self._read_stats.misses += len(missing)
+        for start in range(0, len(missing), READ_BATCH_SIZE):
+            fetched = self.backend.get_many(missing[start:start + READ_BATCH_SIZE])
+            found.update(fetched)
+            with self._lock:
+                self._read_stats.round_trips += 1
+                if self._generation != generation:
+                    continue  # a write landed meanwhile; don't cache what may be stale
+                for key, data in fetched.items():
+                    if data is not None:
+                        self._remember(key, data)
+        return {key: None if data is None else _decode(key[0], data) for key, data in found.items()}
+
+    def get(self, collection: str, user_id: str) -> Optional[BaseModel]:
+        return self.get_many(collection, [user_id])[user_id]
+
+    def get_many(self, collection: str, user_ids: Iterable[str]) -> Dict[str, Optional[BaseModel]]:
+        """One collection for many users (e.g. a dashboard); missing documents map to None."""
+        model = COLLECTIONS[collection]
+        docs = self._get_documents((collection, user_id) for user_id in user_ids)
+        return {user_id: None if data is None else model.model_validate(data) for (_, user_id), data in docs.items()}
+
+    def get_user_state(self, user_id: str) -> Dict[str, Optional[BaseModel]]:
+        """Every collection's document for one user, fetched together."""
+        docs = self._get_documents((collection, user_id) for collection in COLLECTIONS)
+        return {c: None if data is None else COLLECTIONS[c].model_validate(data) for (c, _), data in docs.items()}
+
+    def read_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = asdict(self._read_stats)
+            stats["cached"] = len(self._cache)
+            return stats
+
+    def get_resume_profile(self, user_id: str) -> Optional[ResumeProfile]:
+        return self.get("profiles", user_id)
+
+    def get_skill_graph(self, user_id: str) -> Optional[SkillGraph]:
+        return self.get("skill_graphs", user_id)
+
+    def get_pcp(self, user_id: str) -> Optional[PCP]:
+        return self.get("pcps", user_id)
+
+    def get_roadmap(self, user_id: str) -> Optional[Roadmap]:
+        return self.get("roadmaps", user_id)
+
+    def get_market_signals(self, user_id: str) -> Optional[MarketSignals]:
+        return self.get("market_signals", user_id)
+
+    def get_course_recommendations(self, user_id: str) -> Optional[CourseRecommendations]:
+        return self.get("recommendations", user_id)
+
+    def get_mentor_summary(self, user_id: str) -> Optional[MentorSummary]:
+        return self.get("mentor", user_id)
+
+    def get_profiler_payload(self, user_id: str) -> Optional[ProfilerPayload]:
+        return self.get("profiler_payload", user_id)
 
     def save_resume_profile(self, profile: ResumeProfile) -> None:
-        self._doc("profiles", profile.user_id).set(profile.model_dump())
+        self._set("profiles", profile.user_id, to_document(profile))
 
     def save_skill_graph(self, user_id: str, graph: SkillGraph) -> None:
-        self._doc("skill_graphs", user_id).set(graph.model_dump())
+        self._set("skill_graphs", user_id, to_document(graph))
 
     def save_pcp(self, pcp: PCP) -> None:
-        self._doc("pcps", pcp.user_id).set(pcp.model_dump())
+        self._set("pcps", pcp.user_id, to_document(pcp))
 
-    def save_roadmap(self, roadmap: Roadmap) -> None:
-        self._doc("roadmaps", roadmap.user_id).set(roadmap.model_dump())
+    def save_roadmap(self, roadmap: Roadmap) -> int:
+        """Writes only the fields and milestones that changed; returns the stored version."""
+        return self._set("roadmaps", roadmap.user_id, to_document(roadmap))
 
     def save_market_signals(self, signals: MarketSignals) -> None:
-        self._doc("market_signals", signals.user_id).set(signals.model_dump())
+        self._set("market_signals", signals.user_id, to_document(signals))
 
     def save_course_recommendations(self, recs: CourseRecommendations) -> None:
-        self._doc("recommendations", recs.user_id).set(recs.model_dump())
+        self._set("recommendations", recs.user_id, to_document(recs))
 
     def save_mentor_summary(self, summary: MentorSummary) -> None:
-        self._doc("mentor", summary.user_id).set(summary.model_dump())
+        self._set("mentor", summary.user_id, to_document(summary))
 
     def save_profiler_payload(self, user_id: str, payload: ProfilerPayload) -> None:
-        self._doc("profiler_payload", user_id).set(payload.model_dump())
+        self._set("profiler_payload", user_id, to_document(payload))
 
 
@@ -14,6 +14,7 @@ shared `CourseItem` schema used by the Course Recommender Agent.
 
 from __future__ import annotations
 
+import asyncio
 from dataclasses import dataclass
 from typing import Any, Dict, List, Optional
 
@@ -51,15 +52,40 @@ class UdemyRapidAPI:
             items.extend(normalised[:max_results_per_skill])
         return items
 
-    def _fetch_course_by_name(self, query: str) -> Any:
-        url = f"https://{self.host}/course-name"
-        headers = {
-            "X-RapidAPI-Key": self.api_key,
-            "X-RapidAPI-Host": self.host,
+    async def asearch_courses(self, skills: List[str], max_results_per_skill: int = 3) -> List[CourseItem]:
+        """Like `search_courses`, with the per-skill lookups in flight together."""
+        if not (self.api_key and self.host):
+            return []
+
+        skills = [s.strip() for s in skills if s.strip()]
+        async with httpx.AsyncClient(timeout=10.0) as client:
+            payloads = await asyncio.gather(*(self._afetch_course_by_name(client, s) for s in skills))
+        items: List[CourseItem] = []
+        for skill, response_data in zip(skills, payloads):
+            items.extend(self._normalise_results(response_data, skill)[:max_results_per_skill])
+        return items
+
+    def _request_args(self, query: str) -> Dict[str, Any]:
+        return {
+            "url": f"https://{self.host}/course-name",
+            "headers": {
+                "X-RapidAPI-Key": self.api_key,
+                "X-RapidAPI-Host": self.host,
+            },
+            "params": {"query": query},
         }
-        params = {"query": query}
+
+    def _fetch_course_by_name(self, query: str) -> Any:
+        try:
+            response = httpx.get(**self._request_args(query), timeout=10.0)
+            response.raise_for_status()
+            return response.json()
+        except Exception:
+            return {}
+
+    async def _afetch_course_by_name(self, client: httpx.AsyncClient, query: str) -> Any:
         try:
-            response = httpx.get(url, headers=headers, params=params, timeout=10.0)
+            response = await client.get(**self._request_args(query))
             response.raise_for_status()
             return response.json()
         except Exception:
@@ -0,0 +1,222 @@
+"""Storage backends for `FirestoreClient` (app/integrations/gcp.py).
+
+A backend stores JSON documents addressed by (collection, user_id) and only
+needs two bulk operations, which `FirestoreClient` already batches for:
+
+- `get_many(keys)`    -> {key: document or None}
+- `write_many(sets, updates)`   in one commit, replace each document in `sets`
+  (Firestore `set`) and apply each {field path: value} in `updates` to an
+  existing document (Firestore `update`; `DELETE` removes the field)
+
+`FirestoreBackend` wraps a `google.cloud.firestore.Client` (or the emulator).
+`SQLiteBackend` is the local store for offline and on-prem deployments: one
+WAL-mode SQLite file, a `WITHOUT ROWID` table keyed by (collection, user_id),
+so lookups by collection and user are index seeks and `user_ids()` pages
+through a collection in key order. Each `write_many` is one transaction;
+field-path updates are applied to the stored JSON (read, patch, write back).
+Memory stays bounded by SQLite's page cache (`cache_kib` per connection), not
+by the number of users.
+"""
+
+from __future__ import annotations
+
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from ..serialization import dumps, loads
+
+Key = Tuple[str, str]  # (collection, user_id)
+FieldPath = Tuple[str, ...]  # ("milestones", "m2") is milestones.m2
+
+
+class _Delete:
+    def __repr__(self) -> str:
+        return "DELETE"
+
+
+DELETE: Any = _Delete()  # update value that removes the field
+
+SQLITE_MAX_VARS = 500
+
+
+class StorageBackend:
+    def get_many(self, keys: Sequence[Key]) -> Dict[Key, Optional[Dict[str, Any]]]:
+        raise NotImplementedError
+
+    def write_many(
+        self,
+        sets: Sequence[Tuple[Key, Dict[str, Any]]],
+        updates: Sequence[Tuple[Key, Dict[FieldPath, Any]]] = (),
+    ) -> None:
+        raise NotImplementedError
+
+    def upsert_many(self, items: Sequence[Tuple[Key, Dict[str, Any]]]) -> None:
+        self.write_many(items)
+
+    def close(self) -> None:
+        pass
+
+
+class FirestoreBackend(StorageBackend):
+    def __init__(self, client: Any) -> None:
+        self.client = client
+
+    def _doc(self, key: Key) -> Any:
+        return self.client.collection(key[0]).document(key[1])
+
+    def get_many(self, keys: Sequence[Key]) -> Dict[Key, Optional[Dict[str, Any]]]:
+        found: Dict[Key, Optional[Dict[str, Any]]] = dict.fromkeys(keys)
+        refs = [self._doc(key) for key in keys]
+        by_path = {ref.path: key for ref, key in zip(refs, keys)}
+        for snapshot in self.client.get_all(refs):
+            if snapshot.exists:
+                found[by_path[snapshot.reference.path]] = snapshot.to_dict()
+        return found
+
+    def write_many(
+        self,
+        sets: Sequence[Tuple[Key, Dict[str, Any]]],
+        updates: Sequence[Tuple[Key, Dict[FieldPath, Any]]] = (),
+    ) -> None:
+        batch = self.client.batch()
+        for key, data in sets:
+            batch.set(self._doc(key), data)
+        for key, changes in updates:
+            batch.update(self._doc(key), {field_path(path): _firestore_value(value) for path, value in changes.items()})
+        batch.commit()
+
+
+_SIMPLE_SEGMENT = re.compile(r"[_a-zA-Z][_a-zA-Z0-9]*")
+
+
+def field_path(path: FieldPath) -> str:
+    """Firestore field path string; segments that aren't identifiers are backtick-quoted."""
+    return ".".join(
+        part if _SIMPLE_SEGMENT.fullmatch(part) else "`" + part.replace("\\", "\\\\").replace("`", "\\`") + "`"
+        for part in path
+    )
+
+
+def _firestore_value(value: Any) -> Any:
+    if value is DELETE:
+        from google.cloud import firestore  # type: ignore
+
+        return firestore.DELETE_FIELD
+    return value
+
+
+def apply_update(data: Dict[str, Any], changes: Dict[FieldPath, Any]) -> Dict[str, Any]:
+    """`data` with field-path `changes` applied, like a Firestore update (missing maps are created)."""
+    data = dict(data)
+    for path, value in changes.items():
+        node = data
+        for part in path[:-1]:
+            child = node.get(part)
+            node[part] = child = dict(child) if isinstance(child, dict) else {}
+            node = child
+        if value is DELETE:
+            node.pop(path[-1], None)
+        else:
+            node[path[-1]] = value
+    return data
+
+
+class SQLiteBackend(StorageBackend):
+    def __init__(self, db_path: Path, cache_kib: int = 8192) -> None:
+        self.db_path = Path(db_path)
+        self.cache_kib = cache_kib
+        self._local = threading.local()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn().execute(
+            """
+            CREATE TABLE IF NOT EXISTS documents (
+                collection TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                data BLOB NOT NULL,
+                updated REAL NOT NULL,
+                PRIMARY KEY (collection, user_id)
+            ) WITHOUT ROWID
+            """
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")  # with WAL: never corrupt, may lose the last commits on power loss
+            conn.execute(f"PRAGMA cache_size=-{int(self.cache_kib)}")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def get_many(self, keys: Sequence[Key]) -> Dict[Key, Optional[Dict[str, Any]]]:
+        found: Dict[Key, Optional[Dict[str, Any]]] = dict.fromkeys(keys)
+        by_collection: Dict[str, List[str]] = {}
+        for collection, user_id in keys:
+            by_collection.setdefault(collection, []).append(user_id)
+        conn = self._conn()
+        for collection, user_ids in by_collection.items():
+            for start in range(0, len(user_ids), SQLITE_MAX_VARS):
+                chunk = user_ids[start:start + SQLITE_MAX_VARS]
+                rows = conn.execute(
+                    f"SELECT user_id, data FROM documents WHERE collection = ? AND user_id IN ({','.join('?' * len(chunk))})",
+                    (collection, *chunk),
+                )
+                for user_id, data in rows:
+                    found[(collection, user_id)] = loads(data)
+        return found
+
+    def write_many(
+        self,
+        sets: Sequence[Tuple[Key, Dict[str, Any]]],
+        updates: Sequence[Tuple[Key, Dict[FieldPath, Any]]] = (),
+    ) -> None:
+        now = time.time()
+        rows = [(collection, user_id, dumps(data, pretty=False), now) for (collection, user_id), data in sets]
+        with self._transaction() as db:
+            for (collection, user_id), changes in updates:
+                row = db.execute(
+                    "SELECT data FROM documents WHERE collection = ? AND user_id = ?", (collection, user_id)
+                ).fetchone()
+                data = apply_update(loads(row[0]) if row else {}, changes)
+                rows.append((collection, user_id, dumps(data, pretty=False), now))
+            db.executemany(
+                "INSERT INTO documents (collection, user_id, data, updated) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (collection, user_id) DO UPDATE SET data = excluded.data, updated = excluded.updated",
+                rows,
+            )
+
+    def user_ids(self, collection: str, after: str = "", limit: int = 1000) -> List[str]:
+        """User ids in `collection` sorted, starting after `after` (keyset pagination)."""
+        rows = self._conn().execute(
+            "SELECT user_id FROM documents WHERE collection = ? AND user_id > ? ORDER BY user_id LIMIT ?",
+            (collection, after, limit),
+        )
+        return [user_id for (user_id,) in rows]
+
+    def count(self, collection: Optional[str] = None) -> int:
+        if collection is None:
+            return self._conn().execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+        return self._conn().execute("SELECT COUNT(*) FROM documents WHERE collection = ?", (collection,)).fetchone()[0]
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
@@ -0,0 +1,191 @@
+"""Bounded background job queue for API-triggered pipeline and agent runs.
+
+- A fixed pool of `workers` threads takes jobs from a FIFO of at most
+  `max_depth` waiting jobs. `submit` raises `QueueFull` instead of growing the
+  queue, so the API can answer 429 and a burst of clicks cannot fork dozens of
+  pipelines.
+- Every job keeps its status (queued -> running -> done | failed), timestamps
+  and result; the newest `history` jobs stay queryable by id.
+- `metrics()` reports depth, busy workers, status counts and queue-wait / run
+  time summaries over recent jobs.
+- Jobs run in a copy of the submitting thread's context, like `AgentRunner`.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Optional
+
+from .config import get_config
+
+
+def new_job_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+class QueueFull(RuntimeError):
+    def __init__(self, depth: int) -> None:
+        super().__init__(f"Job queue is full ({depth} waiting)")
+        self.depth = depth
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    fn: Callable[[], Any] = field(repr=False)
+    meta: Dict[str, Any] = field(default_factory=dict)
+    status: str = "queued"
+    enqueued: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    result: Any = field(default=None, repr=False)
+    error: Optional[str] = None
+    future: "Future[Any]" = field(default_factory=Future, repr=False)
+
+    @property
+    def queue_wait_s(self) -> Optional[float]:
+        return None if self.started is None else self.started - self.enqueued
+
+    @property
+    def run_s(self) -> Optional[float]:
+        return None if self.started is None or self.finished is None else self.finished - self.started
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            **self.meta,
+            "status": self.status,
+            "enqueued": self.enqueued,
+            "started": self.started,
+            "finished": self.finished,
+            "queue_wait_s": self.queue_wait_s,
+            "run_s": self.run_s,
+            "error": self.error,
+        }
+
+
+def _summary(samples: Deque[float]) -> Dict[str, Optional[float]]:
+    if not samples:
+        return {"count": 0, "mean": None, "p50": None, "p95": None, "max": None}
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {
+        "count": len(ordered),
+        "mean": sum(ordered) / len(ordered),
+        "p50": pick(0.5),
+        "p95": pick(0.95),
+        "max": ordered[-1],
+    }
+
+
+class JobQueue:
+    def __init__(self, workers: int = 2, max_depth: int = 8, history: int = 500, window: int = 200) -> None:
+        self.workers = workers
+        self.max_depth = max_depth
+        self._queue: "queue.Queue[Job]" = queue.Queue(maxsize=max_depth)
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._history = history
+        self._lock = threading.Lock()
+        self._busy = 0
+        self._rejected = 0
+        self._waits: Deque[float] = deque(maxlen=window)
+        self._runs: Deque[float] = deque(maxlen=window)
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"job-{i}", daemon=True) for i in range(workers)
+        ]
+        for t in self._threads:
+            t.start()
+
+    def submit(self, kind: str, fn: Callable[[], Any], job_id: Optional[str] = None, **meta: Any) -> Job:
+        """Queue `fn`; pass `job_id` (from `new_job_id`) to announce the job before it can start."""
+        ctx = contextvars.copy_context()
+        job = Job(job_id or new_job_id(), kind, lambda: ctx.run(fn), meta)
+        with self._lock:
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                self._rejected += 1
+                raise QueueFull(self._queue.qsize()) from None
+            self._jobs[job.id] = job
+            while len(self._jobs) > self._history:
+                oldest = next(iter(self._jobs.values()))
+                if oldest.status in ("queued", "running"):
+                    break
+                self._jobs.popitem(last=False)
+        return job
+
+    def get(self, job_id: str) -> Job:
+        with self._lock:
+            return self._jobs[job_id]
+
+    def has_active(self, kind: str, run_id: str) -> bool:
+        """True if a `kind` job for `run_id` is queued or running in this process."""
+        with self._lock:
+            return any(
+                job.kind == kind and job.meta.get("run_id") == run_id and job.status in ("queued", "running")
+                for job in self._jobs.values()
+            )
+
+    def _worker(self) -> None:
+        while True:
+            job = self._queue.get()
+            with self._lock:
+                self._busy += 1
+                job.started = time.time()
+                job.status = "running"
+                self._waits.append(job.queue_wait_s)
+            try:
+                job.result = job.fn()
+                job.status = "done"
+            except Exception as e:
+                job.error = f"{type(e).__name__}: {e}"
+                job.status = "failed"
+            finally:
+                with self._lock:
+                    job.finished = time.time()
+                    self._busy -= 1
+                    self._runs.append(job.run_s)
+                self._queue.task_done()
+            if job.status == "done":
+                job.future.set_result(job.result)
+            else:
+                job.future.set_exception(RuntimeError(job.error))
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            counts: Dict[str, int] = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            return {
+                "workers": self.workers,
+                "busy": self._busy,
+                "depth": self._queue.qsize(),
+                "max_depth": self.max_depth,
+                "rejected": self._rejected,
+                "jobs": counts,
+                "queue_wait_s": _summary(self._waits),
+                "run_s": _summary(self._runs),
+            }
+
+
+_job_queue: Optional[JobQueue] = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """Process-wide queue sized by JOB_WORKERS / JOB_QUEUE_DEPTH."""
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            cfg = get_config()
+            _job_queue = JobQueue(workers=cfg.job_workers, max_depth=cfg.job_queue_depth)
+        return _job_queue
@@ -0,0 +1,105 @@
+"""Incremental JSON parsing for streamed LLM output.
+
+`JSONArrayStreamParser` is fed raw text chunks as they arrive and yields each
+element object of the payload's list as soon as its closing brace is seen.
+It accepts either a top-level array (`[{...}, ...]`) or an array one level
+inside the top-level object (`{"roadmap": [{...}, ...]}`), and ignores
+anything outside the JSON such as ```json fences or chatter. The payload
+starts at the first `{` followed by a key (`{"`) or `[` followed by an object
+or `]`, so braces in prose before it (`{your} plan`, `[1]`) are skipped, and
+nothing after the payload closes is parsed.
+
+Element objects that fail to parse are retried once with trailing commas
+removed; anything after the last complete element (a truncated or malformed
+tail) is simply not emitted, so callers keep every element that did close.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, Dict, Iterator, List, Optional
+
+
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+_NON_SPACE = re.compile(r"\S")
+# What must follow an opening bracket for it to start the payload
+_PAYLOAD_START = {"{": '"', "[": "{]"}
+
+
+def loads_lenient(text: str) -> Optional[Any]:
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+    try:
+        return json.loads(_TRAILING_COMMA.sub(r"\1", text))
+    except json.JSONDecodeError:
+        return None
+
+
+class JSONArrayStreamParser:
+    def __init__(self) -> None:
+        self._pos = 0          # offset of the next unscanned character in _text
+        self._stack: List[str] = []  # open containers: "{" or "["
+        self._in_string = False
+        self._escape = False
+        self._element_start: Optional[int] = None
+        self._element_depth = 0
+        self._text = ""
+        self.skipped = 0       # element objects that could not be parsed
+        self.complete = False  # True once the outermost container has closed
+
+    def _is_element_level(self) -> bool:
+        # Inside a top-level array, or an array directly inside the top-level object
+        return self._stack in (["["], ["{", "["])
+
+    def feed(self, chunk: str) -> Iterator[Dict[str, Any]]:
+        self._text += chunk
+        text = self._text
+        while self._pos < len(text) and not self.complete:
+            ch = text[self._pos]
+            if ch in _PAYLOAD_START and not self._stack:
+                nxt = _NON_SPACE.search(text, self._pos + 1)
+                if nxt is None:
+                    break  # can't tell payload from prose until more text arrives
+                if nxt.group() not in _PAYLOAD_START[ch]:
+                    self._pos += 1
+                    continue
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                if self._stack:
+                    self._in_string = True
+            elif ch in "{[":
+                if ch == "{" and self._element_start is None and self._is_element_level():
+                    self._element_start = self._pos
+                    self._element_depth = len(self._stack) + 1
+                self._stack.append(ch)
+            elif ch in "}]":
+                if self._stack:
+                    self._stack.pop()
+                    self.complete = not self._stack
+                if ch == "}" and self._element_start is not None and len(self._stack) == self._element_depth - 1:
+                    raw = text[self._element_start:self._pos + 1]
+                    self._element_start = None
+                    parsed = loads_lenient(raw)
+                    if isinstance(parsed, dict):
+                        yield parsed
+                    else:
+                        self.skipped += 1
+            self._pos += 1
+        if self.complete:
+            self._pos = len(text)  # trailing chatter is never parsed
+        # Drop consumed text that no open element still needs
+        keep_from = self._element_start if self._element_start is not None else self._pos
+        if keep_from > 0:
+            self._text = text[keep_from:]
+            self._pos -= keep_from
+            if self._element_start is not None:
+                self._element_start = 0
@@ -0,0 +1,265 @@
+"""Content-addressed LLM response store and a deterministic fake backend.
+
+Modes (`LLM_CACHE_MODE`, used by `app.genai.LLMClient`):
+- off    : always call Gemini.
+- record : call Gemini and save every response.
+- replay : serve saved responses only; a miss raises `LookupError`.
+- cache  : serve saved responses, call Gemini (and save) on a miss.
+- fake   : never call Gemini; return schema-valid synthetic JSON per agent
+           after a configurable latency.
+
+Responses are keyed by sha256 over (model, prompt, params) and stored one JSON
+file per key under `LLM_CACHE_DIR`, so recordings can be committed or shared
+between machines for reproducible performance runs.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+
+CACHE_MODES = ("off", "record", "replay", "cache", "fake")
+
+
+class CachedResponse:
+    """Minimal stand-in for an SDK response: `.text`, `.parts`, `.usage_metadata`."""
+
+    def __init__(self, text: str, prompt_tokens: int = 0, completion_tokens: int = 0, source: str = "cache") -> None:
+        self.text = text
+        self.parts = [text] if text else []
+        self.usage_metadata = SimpleNamespace(
+            prompt_token_count=prompt_tokens,
+            candidates_token_count=completion_tokens,
+        )
+        self.source = source
+
+
+def cache_key(model: str, prompt: Any, params: Optional[Dict[str, Any]] = None) -> str:
+    blob = json.dumps({"model": model, "prompt": prompt, "params": params or {}}, sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class ResponseStore:
+    def __init__(self, root: Path) -> None:
+        self.root = Path(root)
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        path = self._path(key)
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        return CachedResponse(
+            entry["text"],
+            entry.get("prompt_tokens", 0),
+            entry.get("completion_tokens", 0),
+            source="cache",
+        )
+
+    def put(self, key: str, model: str, agent: str, response: Any) -> None:
+        text = getattr(response, "text", None)
+        if text is None:
+            return
+        usage = getattr(response, "usage_metadata", None)
+        entry = {
+            "model": model,
+            "agent": agent,
+            "text": text,
+            "prompt_tokens": int(getattr(usage, "prompt_token_count", 0) or 0),
+            "completion_tokens": int(getattr(usage, "candidates_token_count", 0) or 0),
+            "recorded_at": datetime.now().isoformat(),
+        }
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # write-then-rename so concurrent readers never see a partial file
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+
+# ------------------------
+# Fake backend
+# ------------------------
+SKILL_POOL = [
+    "python", "sql", "pandas", "docker", "kubernetes", "pytorch", "tensorflow",
+    "react", "typescript", "aws", "gcp", "git", "mlops", "statistics", "fastapi",
+]
+
+
+def _fake_quiz(rng: random.Random, prompt: str) -> Dict[str, Any]:
+    per_question = {
+        str(q): {"choice": rng.choice("abcd"), "interpretation": "synthetic", "score": rng.randint(2, 5)}
+        for q in range(1, 11)
+    }
+    total = sum(v["score"] for v in per_question.values())
+    return {
+        "score_percent": round(total / 50 * 100, 1),
+        "per_question": per_question,
+        "persona": rng.choice(["Startup Builder", "Big-Tech Aspirant", "Explorer", "Money Seeker"]),
+        "summary": "Synthetic quiz evaluation for offline runs.",
+        "recommendations": rng.sample(["Build a portfolio project", "Follow a structured course",
+                                       "Contribute to open source", "Practice interviews"], 2),
+    }
+
+
+def _fake_market(rng: random.Random, prompt: str) -> Dict[str, Any]:
+    skills = rng.sample(SKILL_POOL, 8)
+    return {
+        "trending_skills": skills,
+        "top_roles": [{"role": "Machine Learning Engineer", "demand_reason": "synthetic", "skill_priority": skills[:3]}],
+        "top_tools": skills[3:7],
+        "salary_insights": [{"location": "Bengaluru", "median_inr": rng.randint(8, 25) * 100000, "notes": "synthetic"}],
+        "hiring_signals": [{"source": "synthetic", "signal": "steady demand", "confidence": round(rng.random(), 2)}],
+        "action_recommendations": ["Ship one end-to-end project"],
+    }
+
+
+# fake roadmaps start on a fixed date so responses don't change with the wall clock
+FAKE_START_DATE = date(2025, 1, 6)
+
+
+def _fake_roadmap(rng: random.Random, prompt: str) -> Dict[str, Any]:
+    today = FAKE_START_DATE
+    return {
+        "roadmap": [
+            {
+                "week": week,
+                "start_date": (today + timedelta(weeks=week - 1)).isoformat(),
+                "focus": rng.choice(SKILL_POOL),
+                "resources": ["https://example.com/course"],
+                "outcome": "synthetic outcome",
+            }
+            for week in range(1, 9)
+        ]
+    }
+
+
+def _fake_enrichment(rng: random.Random, prompt: str) -> Dict[str, Any]:
+    return {"extracted_skills": rng.sample(SKILL_POOL, 5)}
+
+
+def _fake_career_paths(rng: random.Random, prompt: str) -> Dict[str, Any]:
+    m = re.search(r"starting role of '([^']+)'", prompt)
+    role = m.group(1) if m else "Engineer"
+    return {f"Senior {role}": 0.6, f"Lead {role}": 0.3, "Engineering Manager": 0.1}
+
+
+def _fake_synthetic_roles(rng: random.Random, prompt: str) -> Dict[str, Any]:
+    m = re.search(r"JSON for '([^']+)' at '([^']+)'", prompt)
+    role, company = (m.group(1), m.group(2)) if m else ("Software Engineer", "Acme")
+    return {
+        "Standard_Title": role,
+        "CompanyName": company,
+        "avg_salary_inr": rng.randint(6, 40) * 100000,
+        "skills_list": rng.sample(SKILL_POOL, 10),
+    }
+
+
+def _fake_skill_graphs(rng: random.Random, prompt: str) -> Dict[str, Any]:
+    return {
+        "Programming Languages": rng.sample(["Python", "Java", "Go", "TypeScript"], 2),
+        "Cloud Platforms": rng.sample(["AWS", "GCP", "Azure"], 1),
+        "Soft Skills": ["Communication"],
+    }
+
+
+def _fake_quiz_options(rng: random.Random, prompt: str) -> Dict[str, Any]:
+    scores = {}
+    for qid, opts in re.findall(r"^(\d+)\. .*? (\{.*\})$", prompt, flags=re.M):
+        scores[qid] = {
+            opt: {"score": rng.randint(2, 5), "interpretation": "synthetic"} for opt in json.loads(opts)
+        }
+    return scores
+
+
+def _fake_quiz_persona(rng: random.Random, prompt: str) -> Dict[str, Any]:
+    return {
+        "persona": rng.choice(["Startup Builder", "Big-Tech Aspirant", "Explorer", "Money Seeker"]),
+        "summary": "Synthetic persona summary for offline runs.",
+    }
+
+
+def _fake_quiz_plan(rng: random.Random, prompt: str) -> Dict[str, Any]:
+    return {"recommendations": rng.sample(["Build a portfolio project", "Follow a structured course",
+                                           "Contribute to open source", "Practice interviews"], 3)}
+
+
+def _fake_quiz_bulk(rng: random.Random, prompt: str) -> Any:
+    users = re.findall(r"^(\S+): 1=", prompt, flags=re.M)
+    return [{"user_id": user_id, **_fake_quiz(rng, prompt)} for user_id in users]
+
+
+FAKE_RESPONDERS: Dict[str, Callable[[random.Random, str], Any]] = {
+    "quiz": _fake_quiz,
+    "quiz_bulk": _fake_quiz_bulk,
+    "quiz_options": _fake_quiz_options,
+    "quiz_persona": _fake_quiz_persona,
+    "quiz_plan": _fake_quiz_plan,
+    "market": _fake_market,
+    "roadmap": _fake_roadmap,
+    "enrichment": _fake_enrichment,
+    "career_paths": _fake_career_paths,
+    "synthetic_roles": _fake_synthetic_roles,
+    "skill_graphs": _fake_skill_graphs,
+}
+
+
+class FakeBackend:
+    """Deterministic per (model, prompt): the same input always yields the same JSON."""
+
+    def __init__(
+        self,
+        latency_s: float = 0.5,
+        jitter: float = 0.2,
+        model_latency_s: Optional[Dict[str, float]] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.latency_s = latency_s
+        self.jitter = jitter
+        self.model_latency_s = model_latency_s or {}
+        self._sleep = sleep
+
+    def _render(self, model: str, agent: str, prompt: Any) -> Tuple[str, float, int]:
+        """Returns (response text, simulated latency, prompt length in characters)."""
+        text_prompt = prompt if isinstance(prompt, str) else json.dumps(prompt, default=str)
+        rng = random.Random(cache_key(model, text_prompt))
+        base = self.model_latency_s.get(model, self.latency_s)
+        delay = base * (1 + self.jitter * (2 * rng.random() - 1))
+        responder = FAKE_RESPONDERS.get(agent)
+        payload = responder(rng, text_prompt) if responder else {"text": "synthetic response"}
+        return json.dumps(payload, ensure_ascii=False), delay, len(text_prompt)
+
+    def generate(self, model: str, agent: str, prompt: Any) -> CachedResponse:
+        text, delay, prompt_chars = self._render(model, agent, prompt)
+        if delay > 0:
+            self._sleep(delay)
+        return CachedResponse(text, prompt_chars // 4, len(text) // 4, source="fake")
+
+    def stream(self, model: str, agent: str, prompt: Any, chunk_chars: int = 64) -> Iterator[str]:
+        """Same text as `generate`, yielded in chunks with the latency spread across them."""
+        text, delay, _ = self._render(model, agent, prompt)
+        chunks = [text[i:i + chunk_chars] for i in range(0, len(text), chunk_chars)]
+        for chunk in chunks:
+            if delay > 0:
+                self._sleep(delay / len(chunks))
+            yield chunk
@@ -2,11 +2,28 @@
 
 Coordinates agent execution in-order and handles feedback loops. Firestore is
 used for persistence. This module provides a simple API for a CLI driver.
+
+`AsyncOrchestrator` has the same handlers as coroutines:
+
+- steps that do not depend on each other run concurrently (sync agents in
+  worker threads via `asyncio.to_thread`);
+- Firestore saves start in the background as soon as their data exists; the
+  handler awaits them all once at the end. Saves to the same document are
+  chained, so the latest version always lands last;
+- both orchestrators `flush()` the store once per handler, so with the
+  client's write-behind buffer a handler's documents go out as one batched
+  commit and repeated saves of a document are coalesced;
+- course provider searches are awaited together (`CourseRecommenderAgent.arecommend`);
+- every step is timed into a `PipelineReport` (see app/pipeline.py), kept in
+  `reports`, so latency can be compared against the critical path.
 """
 
 from __future__ import annotations
 
-from typing import Any, Dict, Tuple
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Tuple
 
 from .schemas import (
     CourseRecommendations,
@@ -18,32 +35,61 @@ from .schemas import (
     ProfilerPayload,
     SkillGraph,
 )
-from .agents.resume import ResumeIntelligenceAgent
-from .agents.quiz import CareerQuizAgent
-from .agents.roadmap import RoadmapGeneratorAgent
-from .agents.market import MarketIntelligenceAgent
-from .agents.courses import CourseRecommenderAgent
-from .agents.mentor import MentorAgent
-from .integrations.courses_api import CourseraAPI, YouTubeAPI
-from .integrations.rapidapi_udemy import UdemyRapidAPI
 from .integrations.gcp import FirestoreClient
+from .pipeline import PipelineReport, StageResult
+
+AGENT_ATTRS = ("resume_agent", "quiz_agent", "roadmap_agent", "market_agent", "course_agent", "mentor_agent")
+
+
+def _default_agents() -> Dict[str, Any]:
+    from .agents.resume import ResumeIntelligenceAgent
+    from .agents.quiz import CareerQuizAgent
+    from .agents.roadmap import RoadmapGeneratorAgent
+    from .agents.market import MarketIntelligenceAgent
+    from .agents.courses import CourseRecommenderAgent
+    from .agents.mentor import MentorAgent
+    from .integrations.local_courses import CourseraAPI, YouTubeAPI
+    from .integrations.rapidapi_udemy import UdemyRapidAPI
+
+    return {
+        "resume_agent": ResumeIntelligenceAgent(),
+        "quiz_agent": CareerQuizAgent(),
+        "roadmap_agent": RoadmapGeneratorAgent(),
+        "market_agent": MarketIntelligenceAgent(),
+        "course_agent": CourseRecommenderAgent(CourseraAPI(), YouTubeAPI(), UdemyRapidAPI()),
+        "mentor_agent": MentorAgent(),
+    }
 
 
-class Orchestrator:
-    def __init__(self, firestore: FirestoreClient) -> None:
+def _resource_map(recs: CourseRecommendations) -> Dict[str, list[str]]:
+    # Attach resources to milestones (map by milestone id)
+    return {
+        "m1": [i.url for i in recs.items[:3]],
+        "m2": [i.url for i in recs.items[3:6]],
+        "m3": [i.url for i in recs.items[6:9]],
+    }
+
+
+class _BaseOrchestrator:
+    def __init__(self, firestore: FirestoreClient, **agents: Any) -> None:
+        """Agents default to the standard set; pass e.g. `course_agent=...` to replace one."""
+        unknown = set(agents) - set(AGENT_ATTRS)
+        if unknown:
+            raise TypeError(f"Unknown agents: {', '.join(sorted(unknown))}")
+        if len(agents) < len(AGENT_ATTRS):
+            agents = {**_default_agents(), **agents}
         self.firestore = firestore
-        self.resume_agent = ResumeIntelligenceAgent()
-        self.quiz_agent = CareerQuizAgent()
-        self.roadmap_agent = RoadmapGeneratorAgent()
-        self.market_agent = MarketIntelligenceAgent()
-        self.course_agent = CourseRecommenderAgent(CourseraAPI(), YouTubeAPI(), UdemyRapidAPI())
-        self.mentor_agent = MentorAgent()
+        for name in AGENT_ATTRS:
+            setattr(self, name, agents[name])
+
 
+class Orchestrator(_BaseOrchestrator):
     def handle_resume_upload(self, user_id: str, file_path: str) -> Tuple[ResumeProfile, SkillGraph, ProfilerPayload]:
         profile, skill_graph, payload = self.resume_agent.parse_and_extract(user_id, file_path)
         self.firestore.save_resume_profile(profile)
         self.firestore.save_skill_graph(user_id, skill_graph)
         self.firestore.save_profiler_payload(user_id, payload)
+        self.firestore.flush()
         return profile, skill_graph, payload
 
     def handle_quiz_complete(self, user_id: str, profile: ResumeProfile, skill_graph: SkillGraph) -> Tuple[PCP, Roadmap, CourseRecommendations, MentorSummary]:
@@ -52,17 +98,12 @@ class Orchestrator:
         roadmap = self.roadmap_agent.generate(pcp, skill_graph)
         self.firestore.save_roadmap(roadmap)
         recs = self.course_agent.recommend(pcp, skill_graph, roadmap)
-        # Attach resources to milestones (map by milestone id)
-        resource_map: Dict[str, list[str]] = {
-            "m1": [i.url for i in recs.items[:3]],
-            "m2": [i.url for i in recs.items[3:6]],
-            "m3": [i.url for i in recs.items[6:9]],
-        }
-        roadmap = self.roadmap_agent.attach_resources(roadmap, resource_map)
+        roadmap = self.roadmap_agent.attach_resources(roadmap, _resource_map(recs))
         self.firestore.save_roadmap(roadmap)
         self.firestore.save_course_recommendations(recs)
         mentor = self.mentor_agent.schedule_checkins(user_id, roadmap)
         self.firestore.save_mentor_summary(mentor)
+        self.firestore.flush()
         return pcp, roadmap, recs, mentor
 
     def scheduled_market_scan(self, pcp: PCP, roadmap: Roadmap, skill_graph: SkillGraph) -> Tuple[MarketSignals, Roadmap, CourseRecommendations]:
@@ -74,7 +115,131 @@ class Orchestrator:
             self.firestore.save_roadmap(roadmap)
             recs = self.course_agent.recommend(pcp, skill_graph, roadmap)
             self.firestore.save_course_recommendations(recs)
+            self.firestore.flush()
             return market, roadmap, recs
+        self.firestore.flush()
         return market, roadmap, CourseRecommendations(user_id=pcp.user_id, items=[])
 
 
+class _StepRun:
+    """Timing and background saves for one handler call."""
+
+    def __init__(self) -> None:
+        self.report = PipelineReport({}, {})
+        self._t0 = time.perf_counter()
+        self._saves: List["asyncio.Task[None]"] = []
+        self._last_save: Dict[str, Tuple[str, "asyncio.Task[None]"]] = {}
+
+    async def step(self, name: str, work: Callable[[], Awaitable[Any]], needs: Iterable[str] = ()) -> Any:
+        result = StageResult(name, "running", start_s=time.perf_counter() - self._t0)
+        self.report.stages[name] = result  # recorded at start, so the order stays topological
+        self.report.deps[name] = set(needs)
+        try:
+            value = await work()
+            result.status = "ok"
+            return value
+        except Exception as e:
+            result.status = "failed"
+            result.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            result.duration_s = time.perf_counter() - self._t0 - result.start_s
+
+    def call(self, name: str, fn: Callable[..., Any], *args: Any, needs: Iterable[str] = (), **kwargs: Any) -> Awaitable[Any]:
+        """Time a sync call run in a worker thread."""
+        return self.step(name, lambda: asyncio.to_thread(fn, *args, **kwargs), needs)
+
+    def save(self, name: str, doc: str, fn: Callable[..., None], *args: Any, needs: Iterable[str] = ()) -> None:
+        """Start a Firestore save without waiting for it; saves to `doc` run in order."""
+        previous = self._last_save.get(doc)
+        needs = [*needs, previous[0]] if previous else needs
+
+        async def write() -> None:
+            if previous is not None:
+                await asyncio.wait([previous[1]])  # ordering only; its error is reported by finish()
+            await self.call(name, fn, *args, needs=needs)
+
+        task = asyncio.create_task(write())
+        self._saves.append(task)
+        self._last_save[doc] = (name, task)
+
+    async def finish(self, flush: Optional[Callable[[], Any]] = None) -> PipelineReport:
+        """Wait for every save and `flush` the store, then raise the first failure, if any."""
+        results = await asyncio.gather(*self._saves, return_exceptions=True)
+        try:
+            if flush is not None and self._saves:
+                await self.call("flush", flush, needs=[name for name, _ in self._last_save.values()])
+        finally:
+            self.report.wall_s = time.perf_counter() - self._t0
+        for outcome in results:
+            if isinstance(outcome, BaseException):
+                raise outcome
+        return self.report
+
+
+class AsyncOrchestrator(_BaseOrchestrator):
+    def __init__(self, firestore: FirestoreClient, history: int = 100, **agents: Any) -> None:
+        super().__init__(firestore, **agents)
+        self.reports: Deque[Tuple[str, PipelineReport]] = deque(maxlen=history)
+
+    async def _finish(self, handler: str, run: _StepRun, pending: Iterable["asyncio.Future[Any]"] = ()) -> None:
+        try:
+            await run.finish(flush=self.firestore.flush)
+        finally:
+            for fut in pending:
+                if fut.done() and not fut.cancelled():
+                    fut.exception()  # retrieved: the handler already raised its own error
+                else:
+                    fut.cancel()
+            self.reports.append((handler, run.report))
+
+    async def handle_resume_upload(self, user_id: str, file_path: str) -> Tuple[ResumeProfile, SkillGraph, ProfilerPayload]:
+        run = _StepRun()
+        try:
+            profile, skill_graph, payload = await run.call("parse", self.resume_agent.parse_and_extract, user_id, file_path)
+            run.save("save_profile", f"profiles/{user_id}", self.firestore.save_resume_profile, profile, needs=["parse"])
+            run.save("save_skill_graph", f"skill_graphs/{user_id}", self.firestore.save_skill_graph, user_id, skill_graph, needs=["parse"])
+            run.save("save_profiler_payload", f"profiler_payload/{user_id}", self.firestore.save_profiler_payload, user_id, payload, needs=["parse"])
+        finally:
+            await self._finish("resume_upload", run)
+        return profile, skill_graph, payload
+
+    async def handle_quiz_complete(self, user_id: str, profile: ResumeProfile, skill_graph: SkillGraph) -> Tuple[PCP, Roadmap, CourseRecommendations, MentorSummary]:
+        run = _StepRun()
+        mentor_task: Optional["asyncio.Task[MentorSummary]"] = None
+        try:
+            pcp = await run.call("quiz", self.quiz_agent.simulate_quiz, user_id=user_id, resume_profile=profile)
+            run.save("save_pcp", f"pcps/{user_id}", self.firestore.save_pcp, pcp, needs=["quiz"])
+            draft = await run.call("roadmap", self.roadmap_agent.generate, pcp, skill_graph, needs=["quiz"])
+            run.save("save_roadmap_draft", f"roadmaps/{user_id}", self.firestore.save_roadmap, draft, needs=["roadmap"])
+            # Check-ins are keyed by milestone id, which attaching resources does not
+            # change, so the mentor schedule is built while courses are searched.
+            mentor_task = asyncio.create_task(
+                run.call("mentor", self.mentor_agent.schedule_checkins, user_id, draft, needs=["roadmap"])
+            )
+            recs = await run.step("courses", lambda: self.course_agent.arecommend(pcp, skill_graph, draft), needs=["roadmap"])
+            run.save("save_recommendations", f"recommendations/{user_id}", self.firestore.save_course_recommendations, recs, needs=["courses"])
+            roadmap = await run.call("attach_resources", self.roadmap_agent.attach_resources, draft, _resource_map(recs), needs=["courses"])
+            run.save("save_roadmap", f"roadmaps/{user_id}", self.firestore.save_roadmap, roadmap, needs=["attach_resources"])
+            mentor = await mentor_task
+            run.save("save_mentor", f"mentor/{user_id}", self.firestore.save_mentor_summary, mentor, needs=["mentor"])
+        finally:
+            await self._finish("quiz_complete", run, [mentor_task] if mentor_task else [])
+        return pcp, roadmap, recs, mentor
+
+    async def scheduled_market_scan(self, pcp: PCP, roadmap: Roadmap, skill_graph: SkillGraph) -> Tuple[MarketSignals, Roadmap, CourseRecommendations]:
+        run = _StepRun()
+        user_id = pcp.user_id
+        try:
+            market = await run.call("market_scan", self.market_agent.scan, pcp)
+            run.save("save_market", f"market_signals/{user_id}", self.firestore.save_market_signals, market, needs=["market_scan"])
+            skills = self.market_agent.threshold_exceeded(market)
+            recs = CourseRecommendations(user_id=user_id, items=[])
+            if skills:
+                roadmap = await run.call("roadmap_update", self.roadmap_agent.update_with_market, roadmap, skills, needs=["market_scan"])
+                run.save("save_roadmap", f"roadmaps/{user_id}", self.firestore.save_roadmap, roadmap, needs=["roadmap_update"])
+                recs = await run.step("courses", lambda: self.course_agent.arecommend(pcp, skill_graph, roadmap), needs=["roadmap_update"])
+                run.save("save_recommendations", f"recommendations/{user_id}", self.firestore.save_course_recommendations, recs, needs=["courses"])
+        finally:
+            await self._finish("market_scan", run)
+        return market, roadmap, recs
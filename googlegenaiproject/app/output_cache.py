@@ -0,0 +1,155 @@
+"""In-memory cache for serving output files with conditional GET and gzip.
+
+Each entry holds the pre-encoded JSON body of one file (or of one directory
+listing), its ETag, Last-Modified and a lazily built gzip copy. Entries are
+validated on every request with a single `stat`: a file is re-read only when
+its mtime or size changed, a listing only when the directory's mtime changed
+(atomic writes rename into the directory, which bumps it). Least recently
+used entries are evicted beyond `max_entries`.
+
+`respond()` turns an entry into a 304 when If-None-Match matches, and serves
+the gzip copy when the client accepts it and the body is large enough.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from email.utils import formatdate
+from pathlib import Path
+from typing import Any, Callable, Optional, Tuple
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from .serialization import dumps, loads
+
+GZIP_MIN_BYTES = 1024
+
+
+@dataclass
+class CachedBody:
+    version: Tuple[int, int]  # (mtime_ns, size) of the source when loaded
+    body: bytes
+    etag: str
+    last_modified: str
+    _gzipped: Optional[bytes] = None
+
+    def gzipped(self) -> bytes:
+        if self._gzipped is None:
+            self._gzipped = gzip.compress(self.body, compresslevel=6)
+        return self._gzipped
+
+
+def _file_payload(path: Path) -> Any:
+    raw = path.read_bytes()
+    try:
+        return loads(raw)
+    except ValueError:
+        return {"name": path.name, "content": raw.decode("utf-8")}
+
+
+def _listing(path: Path) -> Any:
+    # skip temp files of in-flight atomic writes
+    return [{"name": p.name, "path": str(p)} for p in sorted(path.iterdir()) if not p.name.startswith(".")]
+
+
+class OutputCache:
+    def __init__(self, max_entries: int = 512) -> None:
+        self._entries: "OrderedDict[Tuple[str, str], CachedBody]" = OrderedDict()
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+
+    def _get(self, kind: str, path: Path, load: Callable[[Path], Any]) -> CachedBody:
+        st = path.stat()  # FileNotFoundError -> caller's 404
+        version = (st.st_mtime_ns, st.st_size)
+        key = (kind, str(path))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.version == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+        body = dumps(load(path))
+        entry = CachedBody(
+            version,
+            body,
+            '"' + hashlib.sha256(body).hexdigest()[:32] + '"',
+            formatdate(st.st_mtime, usegmt=True),
+        )
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+            self.loads += 1
+        return entry
+
+    def file(self, path: Path) -> CachedBody:
+        return self._get("file", path, _file_payload)
+
+    def listing(self, path: Path, run_id: Optional[str] = None) -> CachedBody:
+        return self._get("dir", path, lambda p: {"run_id": run_id, "outputs": _listing(p)})
+
+    def invalidate(self, path: Path) -> None:
+        with self._lock:
+            for kind in ("file", "dir"):
+                self._entries.pop((kind, str(path)), None)
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    tags = [t.strip() for t in header.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+def _accepts_gzip(header: Optional[str]) -> bool:
+    """Accept-Encoding allows gzip with q > 0 (an explicit "gzip" entry overrides "*")."""
+    qvalues = {}
+    for part in (header or "").split(","):
+        coding, _, params = part.partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qvalues[coding.strip().lower()] = q
+    return qvalues.get("gzip", qvalues.get("*", 0.0)) > 0
+
+
+def _gzip_etag(etag: str) -> str:
+    # strong validators must differ per content-coding
+    return etag[:-1] + '-gz"'
+
+
+def respond(request: Request, entry: CachedBody) -> Response:
+    """JSON response for `entry` with validators, 304 and gzip."""
+    use_gzip = len(entry.body) >= GZIP_MIN_BYTES and _accepts_gzip(request.headers.get("accept-encoding"))
+    etag = _gzip_etag(entry.etag) if use_gzip else entry.etag
+    headers = {
+        "ETag": etag,
+        "Last-Modified": entry.last_modified,
+        "Cache-Control": "no-cache",  # always revalidate; 304s are cheap
+        "Vary": "Accept-Encoding",
+    }
+    # either coding's validator means the client's copy is current
+    if_none_match = request.headers.get("if-none-match")
+    if _etag_matches(if_none_match, entry.etag) or _etag_matches(if_none_match, _gzip_etag(entry.etag)):
+        return Response(status_code=304, headers=headers)
+    content = entry.body
+    if use_gzip:
+        content = entry.gzipped()
+        headers["Content-Encoding"] = "gzip"
+    return Response(content, media_type="application/json", headers=headers)
+
+
+output_cache = OutputCache()
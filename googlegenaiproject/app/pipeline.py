@@ -0,0 +1,199 @@
+"""Dependency-aware pipeline executor for the agent registry.
+
+Edges come from the `inputs`/`outputs` declared on each `AgentSpec`: a stage
+depends on whichever stage produces one of the files it reads. Inputs nobody
+in the pipeline produces are treated as external (the agent decides whether
+they are optional).
+
+- Stages whose dependencies have all succeeded are submitted together to the
+  `AgentRunner` pool, so independent agents (resume / quiz, mentor / market)
+  overlap.
+- With a `StageCache`, a ready stage whose inputs hash to a cached entry has
+  its outputs restored instead of running (status "cached"). Outputs an agent
+  reports as `FALLBACK` are not stored, so a transient LLM failure is retried
+  on the next run.
+- A stage fails if its entrypoint raises or if it returns without writing its
+  primary output (several agents report missing inputs by printing and
+  returning). Everything downstream of a failed stage is skipped.
+- `PipelineReport.format()` prints a per-stage timing table plus wall time,
+  summed stage time and the critical path.
+"""
+
+from __future__ import annotations
+
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+from .agents.registry import AgentError, AgentRunner, AgentSpec, get_agent
+from .build_cache import StageCache
+from .workspace import outputs_dir
+
+
+@dataclass
+class StageResult:
+    name: str
+    status: str = "pending"  # ok | cached | failed | skipped
+    start_s: float = 0.0  # offset from pipeline start
+    duration_s: float = 0.0
+    error: Optional[str] = None
+    fallback: bool = False  # ok, but output came from a fallback path (not cached)
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("ok", "cached")
+
+
+@dataclass
+class PipelineReport:
+    stages: Dict[str, StageResult]
+    deps: Dict[str, Set[str]]
+    wall_s: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return all(r.done for r in self.stages.values())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "ok": self.ok,
+            "wall_s": self.wall_s,
+            "critical_path": self.critical_path(),
+            "stages": {name: {**asdict(r), "needs": sorted(self.deps[name])} for name, r in self.stages.items()},
+        }
+
+    def critical_path(self) -> List[str]:
+        """Longest chain of dependent stages by measured duration."""
+        finish: Dict[str, float] = {}
+        prev: Dict[str, Optional[str]] = {}
+        for name in self.stages:  # stages are kept in topological order
+            before = max(self.deps[name], key=lambda d: finish[d], default=None)
+            prev[name] = before
+            finish[name] = (finish[before] if before else 0.0) + self.stages[name].duration_s
+        if not finish:
+            return []
+        node: Optional[str] = max(finish, key=finish.get)
+        path = []
+        while node:
+            path.append(node)
+            node = prev[node]
+        return path[::-1]
+
+    def format(self) -> str:
+        w = max([10, *(len(name) for name in self.stages)])
+        lines = [f"{'Stage':<{w}} {'Status':<8} {'Start':>7} {'Duration':>9}  Needs"]
+        for r in self.stages.values():
+            needs = ", ".join(sorted(self.deps[r.name])) or "-"
+            lines.append(f"{r.name:<{w}} {r.status:<8} {r.start_s:>6.1f}s {r.duration_s:>8.1f}s  {needs}")
+            if r.error:
+                lines.append(f"{'':<{w}} {r.error}")
+        path = self.critical_path()
+        total = sum(r.duration_s for r in self.stages.values())
+        critical = sum(self.stages[n].duration_s for n in path)
+        lines.append(
+            f"Wall {self.wall_s:.1f}s | sum of stages {total:.1f}s | "
+            f"critical path {' -> '.join(path)} ({critical:.1f}s)"
+        )
+        return "\n".join(lines)
+
+
+def build_graph(specs: Sequence[AgentSpec]) -> Dict[str, Set[str]]:
+    """Map each stage to the stages producing its inputs, in topological order."""
+    producers: Dict[str, str] = {}
+    for spec in specs:
+        for filename in spec.outputs:
+            producers.setdefault(filename, spec.name)
+    deps = {
+        spec.name: {producers[f] for f in spec.inputs if f in producers and producers[f] != spec.name}
+        for spec in specs
+    }
+    ordered: Dict[str, Set[str]] = {}
+    while len(ordered) < len(deps):
+        ready = [n for n, d in deps.items() if n not in ordered and d <= ordered.keys()]
+        if not ready:
+            raise ValueError(f"Dependency cycle between agents: {', '.join(n for n in deps if n not in ordered)}")
+        for name in ready:
+            ordered[name] = deps[name]
+    return ordered
+
+
+def _primary_output_written(spec: AgentSpec, since: float) -> bool:
+    if not spec.outputs:
+        return True
+    path = outputs_dir() / spec.outputs[0]
+    return path.exists() and path.stat().st_mtime >= since - 1.0
+
+
+class PipelineExecutor:
+    def __init__(self, runner: AgentRunner, agents: Sequence[str], cache: Optional[StageCache] = None) -> None:
+        self.runner = runner
+        self.cache = cache
+        self.specs = {spec.name: spec for spec in (get_agent(a) for a in agents)}
+        self.deps = build_graph(list(self.specs.values()))
+
+    def _downstream(self, name: str) -> Set[str]:
+        out: Set[str] = set()
+        frontier = {name}
+        while frontier:
+            frontier = {n for n, d in self.deps.items() if d & frontier and n not in out}
+            out |= frontier
+        return out
+
+    def run(self, on_event=None) -> PipelineReport:
+        """Run every stage as soon as its dependencies succeed.
+
+        `on_event(kind, result)` is called with "start", "ok", "cached", "failed" or "skipped".
+        """
+        emit = on_event or (lambda kind, result: None)
+        results = {name: StageResult(name) for name in self.deps}
+        report = PipelineReport(results, self.deps)
+        t0 = time.perf_counter()
+        started: Dict[str, float] = {}
+        running: Dict[Future, str] = {}
+        keys: Dict[str, str] = {}
+
+        def submit_ready() -> None:
+            # deps are in topological order, so a cache hit unblocks later stages in the same pass
+            for name, needs in self.deps.items():
+                r = results[name]
+                if r.status == "pending" and name not in started and all(results[d].done for d in needs):
+                    started[name] = time.time()
+                    r.start_s = time.perf_counter() - t0
+                    if self.cache:
+                        keys[name] = self.cache.key(self.specs[name], outputs_dir())
+                        if self.cache.restore(self.specs[name], keys[name], outputs_dir()):
+                            r.status = "cached"
+                            r.duration_s = time.perf_counter() - t0 - r.start_s
+                            emit("cached", r)
+                            continue
+                    emit("start", r)
+                    running[self.runner.submit(name)] = name
+
+        submit_ready()
+        while running:
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                r = results[name]
+                r.duration_s = time.perf_counter() - t0 - r.start_s
+                try:
+                    result = future.result()
+                    if not _primary_output_written(self.specs[name], started[name]):
+                        raise AgentError(f"Agent {name} did not write {self.specs[name].outputs[0]}")
+                    r.status = "ok"
+                    r.fallback = result.fallback
+                    if self.cache and not r.fallback:
+                        self.cache.store(self.specs[name], keys[name], outputs_dir())
+                except AgentError as e:
+                    r.status, r.error = "failed", str(e)
+                emit(r.status, r)
+                if r.status == "failed":
+                    for skipped in sorted(self._downstream(name)):
+                        if results[skipped].status == "pending":
+                            results[skipped].status = "skipped"
+                            results[skipped].error = f"upstream {name} failed"
+                            emit("skipped", results[skipped])
+            submit_ready()
+        report.wall_s = time.perf_counter() - t0
+        return report
@@ -0,0 +1,155 @@
+"""Compact prompt building under per-agent token budgets.
+
+- `compact_json` serializes data without indentation or spaces.
+- `count_tokens` uses tiktoken's cl100k_base as a proxy for Gemini's tokenizer;
+  if the encoding cannot be loaded (e.g. offline) it falls back to ~4 chars/token.
+- `PromptBuilder` assembles an agent prompt from fixed instruction text and
+  prioritized data sections. When the prompt exceeds the agent's input budget
+  it drops optional keys, then shortens lists, then drops whole sections,
+  always starting with the lowest-priority section.
+- `PromptBudget.generation_config()` caps completion length per agent.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+try:
+    import tiktoken  # type: ignore
+except Exception:  # pragma: no cover - falls back to the char heuristic
+    tiktoken = None  # type: ignore
+
+
+def compact_json(data: Any) -> str:
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+_encoding = None
+_encoding_failed = False
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    global _encoding, _encoding_failed
+    with _encoding_lock:
+        if _encoding is None and not _encoding_failed:
+            try:
+                _encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception:
+                # No tiktoken or no cached BPE file and no network
+                _encoding_failed = True
+        return _encoding
+
+
+def count_tokens(text: Any) -> int:
+    text = text if isinstance(text, str) else compact_json(text)
+    encoding = _get_encoding()
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+@dataclass(frozen=True)
+class PromptBudget:
+    input_tokens: int
+    output_tokens: int
+
+    def generation_config(self) -> Dict[str, int]:
+        return {"max_output_tokens": self.output_tokens}
+
+
+AGENT_BUDGETS: Dict[str, PromptBudget] = {
+    "quiz": PromptBudget(input_tokens=700, output_tokens=900),
+    "quiz_bulk": PromptBudget(input_tokens=6000, output_tokens=8192),
+    "market": PromptBudget(input_tokens=600, output_tokens=1500),
+    "roadmap": PromptBudget(input_tokens=1200, output_tokens=2500),
+}
+DEFAULT_BUDGET = PromptBudget(input_tokens=2000, output_tokens=2048)
+
+
+def budget_for(agent: str) -> PromptBudget:
+    return AGENT_BUDGETS.get(agent, DEFAULT_BUDGET)
+
+
+@dataclass
+class _Section:
+    label: Optional[str]
+    data: Any
+    priority: int = 0  # 0 = never trimmed; higher numbers are trimmed first
+    optional_keys: Sequence[str] = ()
+    is_text: bool = False
+
+    def render(self) -> str:
+        body = self.data if self.is_text else compact_json(self.data)
+        return f"{self.label}: {body}" if self.label else body
+
+
+@dataclass
+class PromptBuilder:
+    agent: str
+    budget: Optional[PromptBudget] = None
+    sections: List[_Section] = field(default_factory=list)
+    trimmed: List[str] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        if self.budget is None:
+            self.budget = budget_for(self.agent)
+
+    def text(self, text: str) -> "PromptBuilder":
+        """Fixed instruction text; never trimmed."""
+        self.sections.append(_Section(None, text.strip(), is_text=True))
+        return self
+
+    def data(self, label: str, data: Any, priority: int = 1, optional_keys: Sequence[str] = ()) -> "PromptBuilder":
+        """A compact-JSON data section. `optional_keys` are dropped first when over budget."""
+        self.sections.append(_Section(label, data, priority, optional_keys))
+        return self
+
+    def render(self) -> str:
+        return "\n".join(s.render() for s in self.sections)
+
+    def _trim_once(self, section: _Section) -> bool:
+        data = section.data
+        if isinstance(data, dict):
+            for key in section.optional_keys:
+                if key in data:
+                    section.data = {k: v for k, v in data.items() if k != key}
+                    self.trimmed.append(f"{section.label}.{key}")
+                    return True
+            lists = [(len(v), k) for k, v in data.items() if isinstance(v, list) and len(v) > 1]
+            if lists:
+                _, key = max(lists)
+                section.data = {**data, key: data[key][:-1]}
+                self.trimmed.append(f"{section.label}.{key}[-1]")
+                return True
+        elif isinstance(data, list) and len(data) > 1:
+            section.data = data[:-1]
+            self.trimmed.append(f"{section.label}[-1]")
+            return True
+        return False
+
+    def build(self) -> str:
+        prompt = self.render()
+        tokens = count_tokens(prompt)
+        before = tokens
+        trimmable = sorted((s for s in self.sections if s.priority > 0), key=lambda s: -s.priority)
+        for section in trimmable:
+            while tokens > self.budget.input_tokens and self._trim_once(section):
+                prompt = self.render()
+                tokens = count_tokens(prompt)
+        for section in trimmable:
+            if tokens <= self.budget.input_tokens:
+                break
+            self.sections.remove(section)
+            self.trimmed.append(f"{section.label} (dropped)")
+            prompt = self.render()
+            tokens = count_tokens(prompt)
+        note = f", trimmed {before}->{tokens}: {', '.join(self.trimmed)}" if self.trimmed else ""
+        print(f"[prompt:{self.agent}] {tokens} tokens (budget {self.budget.input_tokens}, max out {self.budget.output_tokens}){note}")
+        return prompt
+
+    def generation_config(self) -> Dict[str, int]:
+        return self.budget.generation_config()
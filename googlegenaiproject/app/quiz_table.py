@@ -0,0 +1,334 @@
+"""Precomputed quiz persona table.
+
+Questions 1-9 have 5*4*3*4*3*3*4*2*4 = 69,120 answer combinations and question
+10 (salary) is bucketed, so quiz evaluation is a lookup instead of an LLM call.
+The table is built offline from clusters rather than every combination:
+
+- option_scores : score (1-5) + interpretation for every (question, option),
+                  salary buckets included                       -> 1 LLM call
+- personas      : persona + summary per (goal, motivator, 5-year preference,
+                  environment) = questions 1/2/3/7               -> 240 calls
+- plans         : recommendations per (time, learning style, confidence)
+                  = questions 4/5/6                              -> 36 calls
+
+Cluster answers are packed into a mixed-radix index (option order stored in the
+table), which points into deduplicated persona/plan lists.
+
+Build (from googlegenaiproject/):
+    python -m app.quiz_table              # LLM-built (respects LLM_CACHE_MODE)
+    python -m app.quiz_table --rules      # deterministic heuristics, no API key
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from itertools import product
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from .config import PROJECT_ROOT
+
+TABLE_PATH = PROJECT_ROOT / "app" / "data" / "quiz_persona_table.json"
+TABLE_VERSION = 1
+
+PERSONA_QUESTIONS = ("1", "2", "3", "7")
+PLAN_QUESTIONS = ("4", "5", "6")
+SALARY_QUESTION = "10"
+# Upper bounds (INR) of the salary buckets; anything above the last is "high"
+SALARY_BUCKETS = (("low", 1000000), ("mid", 2000000), ("high", None))
+SALARY_UNKNOWN = "unknown"
+
+
+def salary_bucket(value: Any) -> str:
+    try:
+        salary = int(str(value).replace(",", "").replace(" ", ""))
+    except ValueError:
+        return SALARY_UNKNOWN
+    for name, upper in SALARY_BUCKETS:
+        if upper is None or salary <= upper:
+            return name
+    return SALARY_UNKNOWN
+
+
+def _pack(answers: Dict[str, str], qids: Sequence[str], options: Dict[str, List[str]]) -> Optional[int]:
+    """Mixed-radix index of the answers to `qids`; None if any answer is not a known option."""
+    index = 0
+    for qid in qids:
+        opts = options[qid]
+        try:
+            pos = opts.index(answers.get(qid, "").lower())
+        except ValueError:
+            return None
+        index = index * len(opts) + pos
+    return index
+
+
+class QuizPersonaTable:
+    def __init__(self, data: Dict[str, Any]) -> None:
+        if data.get("version") != TABLE_VERSION:
+            raise ValueError(f"Unsupported quiz table version {data.get('version')!r}")
+        self.data = data
+        self.source: str = data.get("source", "rules")  # "llm" or "rules" (heuristic build)
+        self.options: Dict[str, List[str]] = data["options"]
+        self.option_scores: Dict[str, Dict[str, Dict[str, Any]]] = data["option_scores"]
+        self.personas: List[Dict[str, Any]] = data["personas"]
+        self.persona_index: List[int] = data["persona_index"]
+        self.plans: List[Dict[str, Any]] = data["plans"]
+        self.plan_index: List[int] = data["plan_index"]
+
+    @classmethod
+    def load(cls, path: Path = TABLE_PATH) -> Optional["QuizPersonaTable"]:
+        try:
+            return cls(json.loads(Path(path).read_text(encoding="utf-8")))
+        except (FileNotFoundError, json.JSONDecodeError, KeyError, ValueError) as e:
+            print(f"[quiz_table] not using {path}: {e}")
+            return None
+
+    def lookup(self, answers: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        """Report for normalized answers ("1".."10" -> value); None if any choice is off-table."""
+        persona_idx = _pack(answers, PERSONA_QUESTIONS, self.options)
+        plan_idx = _pack(answers, PLAN_QUESTIONS, self.options)
+        if persona_idx is None or plan_idx is None:
+            return None
+        per_question = {}
+        total = 0
+        for qid, scores in self.option_scores.items():
+            raw = answers.get(qid, "")
+            key = salary_bucket(raw) if qid == SALARY_QUESTION else raw.lower()
+            entry = scores.get(key)
+            if entry is None:
+                return None
+            per_question[qid] = {"choice": raw, "interpretation": entry["interpretation"], "score": entry["score"]}
+            total += entry["score"]
+        persona = self.personas[self.persona_index[persona_idx]]
+        plan = self.plans[self.plan_index[plan_idx]]
+        return {
+            "score_percent": round(total / (5 * len(per_question)) * 100, 1),
+            "per_question": per_question,
+            "persona": persona["persona"],
+            "summary": persona["summary"],
+            "recommendations": list(plan["recommendations"]),
+            "source": "table",
+        }
+
+
+_table: Optional[QuizPersonaTable] = None
+_table_loaded = False
+
+
+def get_table() -> Optional[QuizPersonaTable]:
+    """Process-wide table, loaded once (None if missing or invalid)."""
+    global _table, _table_loaded
+    if not _table_loaded:
+        _table = QuizPersonaTable.load()
+        _table_loaded = True
+    return _table
+
+
+# ------------------------
+# Offline builder
+# ------------------------
+def _option_text(questions: Dict[str, Any], qid: str, opt: str) -> str:
+    return questions[qid]["options"][opt]
+
+
+def _rules_option_scores(questions: Dict[str, Any]) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    # Same heuristics as quiz._deterministic_evaluator
+    scores: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for qid, q in questions.items():
+        if q["options"]:
+            scores[qid] = {
+                opt: {"score": 4 if opt in ("a", "b", "c") else 3, "interpretation": text}
+                for opt, text in q["options"].items()
+            }
+    scores[SALARY_QUESTION] = {
+        "low": {"score": 5, "interpretation": "Salary expectation up to 10 LPA."},
+        "mid": {"score": 4, "interpretation": "Salary expectation of 10-20 LPA."},
+        "high": {"score": 3, "interpretation": "Salary expectation above 20 LPA."},
+        SALARY_UNKNOWN: {"score": 3, "interpretation": "No salary expectation given."},
+    }
+    return scores
+
+
+RULE_PERSONAS = {
+    "a": "Money Seeker",
+    "b": "Big-Tech Aspirant",
+    "c": "Startup Builder",
+    "d": "Balanced Professional",
+    "e": "Explorer",
+}
+RULE_TRACKS = {"a": "a deep technical track", "b": "a people-leadership track", "c": "a founder track"}
+RULE_STYLES = {
+    "a": "Prioritize project-based learning and capstone projects.",
+    "b": "Follow a structured course roadmap with checkpoints.",
+    "c": "Use docs and hands-on experiments; supplement with projects.",
+}
+RULE_PACE = {
+    "a": "Keep a steady 1-3 hour weekly habit focused on one skill at a time.",
+    "b": "Use 4-6 weekly hours to alternate learning and a small project.",
+    "c": "Use 7-10 weekly hours to ship one portfolio project per month.",
+    "d": "Use 10+ weekly hours for an intensive, portfolio-first plan.",
+}
+RULE_LEVEL = {
+    "a": "Start with fundamentals before specializing.",
+    "b": "Fill intermediate gaps with targeted practice.",
+    "c": "Go deep: contribute to open source or mentor others.",
+}
+
+
+def _rules_persona(questions: Dict[str, Any], answers: Dict[str, str]) -> Dict[str, Any]:
+    persona = RULE_PERSONAS[answers["1"]]
+    motivator = _option_text(questions, "2", answers["2"]).lower()
+    environment = _option_text(questions, "7", answers["7"]).lower()
+    return {
+        "persona": persona,
+        "summary": f"{persona} motivated by {motivator}, aiming for {RULE_TRACKS[answers['3']]}. "
+                   f"Best fit: {environment}.",
+    }
+
+
+def _rules_plan(questions: Dict[str, Any], answers: Dict[str, str]) -> Dict[str, Any]:
+    return {"recommendations": [RULE_STYLES[answers["5"]], RULE_PACE[answers["4"]], RULE_LEVEL[answers["6"]]]}
+
+
+def _llm_json(prompt: str, agent: str) -> Any:
+    from .genai import get_llm_client
+    from .prompting import budget_for
+
+    raw = get_llm_client().generate(prompt, agent=agent, generation_config=budget_for(agent).generation_config())
+    raw = raw.strip().removeprefix("```json").removeprefix("```").removesuffix("```").strip()
+    return json.loads(raw)
+
+
+def _describe(questions: Dict[str, Any], qids: Sequence[str], answers: Dict[str, str]) -> str:
+    return "\n".join(
+        f"- [{questions[q]['section']}] {questions[q]['text']} -> {_option_text(questions, q, answers[q])}" for q in qids
+    )
+
+
+def _llm_option_scores(questions: Dict[str, Any]) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    lines = []
+    for qid, q in questions.items():
+        if q["options"]:
+            lines.append(f"{qid}. {q['text']} " + json.dumps(q["options"], separators=(",", ":")))
+    buckets = {"low": "<= 10 LPA", "mid": "10-20 LPA", "high": "> 20 LPA", SALARY_UNKNOWN: "not given"}
+    lines.append(f"{SALARY_QUESTION}. {questions[SALARY_QUESTION]['text']} " + json.dumps(buckets, separators=(",", ":")))
+    prompt = (
+        "You are an expert career coach scoring a fixed career quiz. For EVERY question and EVERY option below, "
+        "give a career-readiness score 1-5 and a one-sentence interpretation.\n"
+        + "\n".join(lines)
+        + '\nReturn ONLY JSON: {"<question id>": {"<option>": {"score": <1-5>, "interpretation": "<text>"}}}'
+    )
+    scores = _llm_json(prompt, "quiz_options")
+    expected = _rules_option_scores(questions)
+    for qid, opts in expected.items():
+        missing = set(opts) - set(scores.get(qid, {}))
+        if missing:
+            raise ValueError(f"LLM option scores missing question {qid} options {sorted(missing)}")
+    return {qid: {opt: scores[qid][opt] for opt in opts} for qid, opts in expected.items()}
+
+
+def _llm_persona(questions: Dict[str, Any], answers: Dict[str, str]) -> Dict[str, Any]:
+    prompt = (
+        "You are an expert career coach. A user answered these career-quiz questions:\n"
+        + _describe(questions, PERSONA_QUESTIONS, answers)
+        + '\nReturn ONLY JSON: {"persona": "<2-4 word label>", "summary": "<2-3 sentences addressed to the user>"}'
+    )
+    result = _llm_json(prompt, "quiz_persona")
+    return {"persona": str(result["persona"]), "summary": str(result["summary"])}
+
+
+def _llm_plan(questions: Dict[str, Any], answers: Dict[str, str]) -> Dict[str, Any]:
+    prompt = (
+        "You are an expert career coach. A user answered these career-quiz questions:\n"
+        + _describe(questions, PLAN_QUESTIONS, answers)
+        + '\nReturn ONLY JSON: {"recommendations": ["<short action item>", "... (3-4 items)"]}'
+    )
+    result = _llm_json(prompt, "quiz_plan")
+    return {"recommendations": [str(r) for r in result["recommendations"]][:4]}
+
+
+def _build_clusters(
+    questions: Dict[str, Any],
+    qids: Sequence[str],
+    options: Dict[str, List[str]],
+    evaluate: Callable[[Dict[str, Any], Dict[str, str]], Dict[str, Any]],
+    workers: int,
+):
+    """Evaluate every combination of `qids`; returns (deduplicated entries, index list)."""
+    combos = [dict(zip(qids, choice)) for choice in product(*(options[q] for q in qids))]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(lambda answers: evaluate(questions, answers), combos))
+    entries: List[Dict[str, Any]] = []
+    seen: Dict[str, int] = {}
+    index: List[int] = []
+    # product() enumerates in the same mixed-radix order _pack computes
+    for result in results:
+        key = json.dumps(result, sort_keys=True)
+        if key not in seen:
+            seen[key] = len(entries)
+            entries.append(result)
+        index.append(seen[key])
+    return entries, index
+
+
+def build_table(questions: Dict[str, Any], use_llm: bool = True, workers: int = 4) -> Dict[str, Any]:
+    options = {qid: list(q["options"]) for qid, q in questions.items() if q["options"]}
+    option_scores = _llm_option_scores(questions) if use_llm else _rules_option_scores(questions)
+    personas, persona_index = _build_clusters(
+        questions, PERSONA_QUESTIONS, options, _llm_persona if use_llm else _rules_persona, workers
+    )
+    plans, plan_index = _build_clusters(
+        questions, PLAN_QUESTIONS, options, _llm_plan if use_llm else _rules_plan, workers
+    )
+    return {
+        "version": TABLE_VERSION,
+        "built_at": datetime.now().isoformat(timespec="seconds"),
+        "source": "llm" if use_llm else "rules",
+        "options": options,
+        "option_scores": option_scores,
+        "personas": personas,
+        "persona_index": persona_index,
+        "plans": plans,
+        "plan_index": plan_index,
+    }
+
+
+def save_table(data: Dict[str, Any], path: Path = TABLE_PATH) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, path)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from .agents.quiz import QUIZ_QUESTIONS
+
+    parser = argparse.ArgumentParser(description="Build the precomputed quiz persona table.")
+    parser.add_argument("--rules", action="store_true", help="Use deterministic heuristics instead of the LLM.")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent LLM calls.")
+    parser.add_argument("--out", type=Path, default=TABLE_PATH)
+    args = parser.parse_args(argv)
+
+    data = build_table(QUIZ_QUESTIONS, use_llm=not args.rules, workers=args.workers)
+    save_table(data, args.out)
+    print(
+        f"Saved {data['source']} quiz table to {args.out}: {len(data['personas'])} personas "
+        f"over {len(data['persona_index'])} clusters, {len(data['plans'])} plans over {len(data['plan_index'])} clusters"
+    )
+    if not args.rules:
+        from .genai import get_llm_client
+
+        for agent in ("quiz_options", "quiz_persona", "quiz_plan"):
+            get_llm_client().log_stats(agent)
+
+
+if __name__ == "__main__":
+    main()
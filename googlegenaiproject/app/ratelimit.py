@@ -0,0 +1,365 @@
+"""Request/token rate limiting for Gemini calls.
+
+`TokenBucketLimiter` enforces a requests-per-minute and a tokens-per-minute
+budget inside one process. Callers reserve an estimated token cost before a
+call and settle it with the real usage afterwards, so the TPM bucket tracks
+what the API actually counts.
+
+`SharedQuotaLimiter` has the same interface but keeps the bucket in a SQLite
+file, so every agent subprocess (run_all, /api/agent/...) shares one quota:
+- waiters take a ticket and are served round-robin across runs, FIFO within a
+  run, so one big pipeline cannot starve another. The run is resolved per
+  call: `quota_run()` (set by `AgentRunner` around each agent), else
+  `LLM_RUN_ID`, else the process id;
+- `pause(seconds)` after a 429 holds back every process, not just the caller,
+  so a quota blip does not become a herd of independent retries;
+- queue waits are recorded per run; see `python -m app.ratelimit --report`.
+
+Both limiters support `pause`; `app.genai.LLMClient` uses it instead of a
+private sleep when a limiter is configured.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+
+class TokenBucketLimiter:
+    def __init__(
+        self,
+        rpm: float,
+        tpm: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        if rpm <= 0:
+            raise ValueError("rpm must be positive")
+        self.rpm = float(rpm)
+        self.tpm = float(tpm) if tpm else None
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        # Buckets start full so a fresh run can burst up to one minute of quota
+        self._requests = self.rpm
+        self._tokens = self.tpm if self.tpm else 0.0
+        self._updated = clock()
+        self._paused_until = 0.0
+        self.total_wait_s = 0.0
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60.0)
+        if self.tpm:
+            self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60.0)
+
+    def _wait_time(self, tokens: int) -> float:
+        wait = max(0.0, self._paused_until - self._clock())
+        if self._requests < 1:
+            wait = max(wait, (1 - self._requests) * 60.0 / self.rpm)
+        if self.tpm:
+            # A single call larger than the whole bucket only needs a full bucket
+            needed = min(tokens, self.tpm)
+            if self._tokens < needed:
+                wait = max(wait, (needed - self._tokens) * 60.0 / self.tpm)
+        return wait
+
+    def acquire(self, tokens: int = 0) -> float:
+        """Block until one request and `tokens` tokens are available. Returns seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill(self._clock())
+                wait = self._wait_time(tokens)
+                if wait <= 0:
+                    self._requests -= 1
+                    if self.tpm:
+                        self._tokens -= tokens
+                    self.total_wait_s += waited
+                    return waited
+            self._sleep(wait)
+            waited += wait
+
+    def settle(self, reserved: int, actual: int) -> None:
+        """Correct the TPM bucket once the real token usage of a call is known."""
+        if not self.tpm or actual <= 0:
+            return
+        with self._lock:
+            self._tokens = min(self.tpm, self._tokens + reserved - actual)
+
+    def pause(self, seconds: float) -> None:
+        """Hold back every caller of this limiter for `seconds` (e.g. after a 429)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, self._clock() + seconds)
+
+
+def _wait_for_bucket(requests: float, tokens_left: float, rpm: float, tpm: Optional[float], tokens: int) -> float:
+    wait = 0.0
+    if requests < 1:
+        wait = (1 - requests) * 60.0 / rpm
+    if tpm:
+        needed = min(tokens, tpm)
+        if tokens_left < needed:
+            wait = max(wait, (needed - tokens_left) * 60.0 / tpm)
+    return wait
+
+
+_quota_run: ContextVar[Optional[str]] = ContextVar("quota_run", default=None)
+
+
+@contextmanager
+def quota_run(run_id: Optional[str]) -> Iterator[Optional[str]]:
+    """Charge `SharedQuotaLimiter` waits in this context to `run_id` (None keeps the default)."""
+    token = _quota_run.set(run_id)
+    try:
+        yield run_id
+    finally:
+        _quota_run.reset(token)
+
+
+class SharedQuotaLimiter:
+    """Cross-process token bucket + fair queue in a SQLite file.
+
+    Uses wall-clock time (shared between processes). Waiters poll the queue
+    head with a read-only query and take the write lock only when they are
+    at the head or to refresh their heartbeat (every `stale_s / 3`). Tickets
+    whose owner has not heartbeat for `stale_s` (crashed process) are skipped
+    and dropped; per-run stats rows idle for `run_ttl_s` are pruned.
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        rpm: float,
+        tpm: Optional[float] = None,
+        run_id: Optional[str] = None,
+        poll_s: float = 0.05,
+        stale_s: float = 30.0,
+        run_ttl_s: float = 24 * 3600.0,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        if rpm <= 0:
+            raise ValueError("rpm must be positive")
+        self.db_path = Path(db_path)
+        self.rpm = float(rpm)
+        self.tpm = float(tpm) if tpm else None
+        self.run_id = run_id or os.getenv("LLM_RUN_ID") or f"pid-{os.getpid()}"  # when no quota_run() is active
+        self.poll_s = poll_s
+        self.stale_s = stale_s
+        self.heartbeat_s = stale_s / 3
+        self.run_ttl_s = run_ttl_s
+        self._clock = clock
+        self._sleep = sleep
+        self._local = threading.local()
+        self.total_wait_s = 0.0
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # executescript() commits on its own, so the schema goes outside _transaction()
+        self._conn().executescript(
+            """
+            CREATE TABLE IF NOT EXISTS bucket (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                requests REAL, tokens REAL, updated REAL, paused_until REAL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS queue (
+                ticket INTEGER PRIMARY KEY AUTOINCREMENT,
+                run_id TEXT NOT NULL, enqueued REAL NOT NULL, heartbeat REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY, last_served REAL DEFAULT 0,
+                grants INTEGER DEFAULT 0, total_wait_s REAL DEFAULT 0, max_wait_s REAL DEFAULT 0,
+                tokens INTEGER DEFAULT 0
+            );
+            """
+        )
+        with self._transaction() as db:
+            # Buckets start full, like TokenBucketLimiter
+            db.execute(
+                "INSERT OR IGNORE INTO bucket (id, requests, tokens, updated) VALUES (1, ?, ?, ?)",
+                (self.rpm, self.tpm or 0.0, self._clock()),
+            )
+            self._purge(db, self._clock())
+
+    # ------------------------
+    # SQLite plumbing
+    # ------------------------
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")  # one writer at a time across processes
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _refill(self, db: sqlite3.Connection, now: float):
+        requests, tokens, updated, paused_until = db.execute(
+            "SELECT requests, tokens, updated, paused_until FROM bucket WHERE id = 1"
+        ).fetchone()
+        elapsed = max(0.0, now - updated)
+        requests = min(self.rpm, requests + elapsed * self.rpm / 60.0)
+        if self.tpm:
+            tokens = min(self.tpm, tokens + elapsed * self.tpm / 60.0)
+        return requests, tokens, paused_until
+
+    def _head(self, db: sqlite3.Connection, now: float) -> Optional[int]:
+        """Oldest live ticket of the run served least recently (round-robin across runs). Read-only."""
+        row = db.execute(
+            """
+            SELECT q.ticket FROM queue q LEFT JOIN runs r ON r.run_id = q.run_id
+            WHERE q.ticket = (SELECT MIN(ticket) FROM queue WHERE run_id = q.run_id AND heartbeat >= :live)
+            ORDER BY COALESCE(r.last_served, -1), q.ticket LIMIT 1
+            """,
+            {"live": now - self.stale_s},
+        ).fetchone()
+        return row[0] if row else None
+
+    def _purge(self, db: sqlite3.Connection, now: float) -> None:
+        """Drop crashed waiters' tickets and stats of runs idle for `run_ttl_s`."""
+        db.execute("DELETE FROM queue WHERE heartbeat < ?", (now - self.stale_s,))
+        db.execute(
+            "DELETE FROM runs WHERE last_served < ? AND run_id NOT IN (SELECT run_id FROM queue)",
+            (now - self.run_ttl_s,),
+        )
+
+    def _beat(self, db: sqlite3.Connection, ticket: int, run_id: str, now: float) -> int:
+        """Refresh `ticket`'s heartbeat; re-queue (new ticket) if it was dropped as stale meanwhile."""
+        if db.execute("UPDATE queue SET heartbeat = ? WHERE ticket = ?", (now, ticket)).rowcount:
+            return ticket
+        return db.execute(
+            "INSERT INTO queue (run_id, enqueued, heartbeat) VALUES (?, ?, ?)", (run_id, now, now)
+        ).lastrowid
+
+    # ------------------------
+    # Limiter interface
+    # ------------------------
+    def acquire(self, tokens: int = 0) -> float:
+        """Queue fairly, then block until one request and `tokens` tokens are free. Returns seconds waited."""
+        run_id = _quota_run.get() or self.run_id
+        start = self._clock()
+        with self._transaction() as db:
+            ticket = db.execute(
+                "INSERT INTO queue (run_id, enqueued, heartbeat) VALUES (?, ?, ?)", (run_id, start, start)
+            ).lastrowid
+        last_beat = start
+        try:
+            while True:
+                now = self._clock()
+                if self._head(self._conn(), now) != ticket:
+                    if now - last_beat >= self.heartbeat_s:
+                        with self._transaction() as db:
+                            ticket = self._beat(db, ticket, run_id, now)
+                            self._purge(db, now)
+                        last_beat = now
+                    self._sleep(self.poll_s)
+                    continue
+                with self._transaction() as db:
+                    now = self._clock()
+                    ticket = self._beat(db, ticket, run_id, now)
+                    last_beat = now
+                    if self._head(db, now) == ticket:  # still the head under the write lock
+                        requests, tokens_left, paused_until = self._refill(db, now)
+                        wait = max(paused_until - now,
+                                   _wait_for_bucket(requests, tokens_left, self.rpm, self.tpm, tokens))
+                        if wait <= 0:
+                            db.execute(
+                                "UPDATE bucket SET requests = ?, tokens = ?, updated = ? WHERE id = 1",
+                                (requests - 1, tokens_left - tokens if self.tpm else tokens_left, now),
+                            )
+                            db.execute("DELETE FROM queue WHERE ticket = ?", (ticket,))
+                            waited = now - start
+                            db.execute(
+                                """
+                                INSERT INTO runs (run_id, last_served, grants, total_wait_s, max_wait_s, tokens)
+                                VALUES (?, ?, 1, ?, ?, ?)
+                                ON CONFLICT(run_id) DO UPDATE SET
+                                    last_served = excluded.last_served, grants = grants + 1,
+                                    total_wait_s = total_wait_s + excluded.total_wait_s,
+                                    max_wait_s = MAX(max_wait_s, excluded.max_wait_s),
+                                    tokens = tokens + excluded.tokens
+                                """,
+                                (run_id, now, waited, waited, tokens),
+                            )
+                            ticket = None
+                            self.total_wait_s += waited
+                            return waited
+                    else:
+                        wait = self.poll_s
+                # Re-check at least every second: settle() may free tokens early
+                self._sleep(min(wait, 1.0))
+        finally:
+            if ticket is not None:  # interrupted while queued
+                with self._transaction() as db:
+                    db.execute("DELETE FROM queue WHERE ticket = ?", (ticket,))
+
+    def settle(self, reserved: int, actual: int) -> None:
+        """Correct the shared TPM bucket once the real token usage of a call is known."""
+        if not self.tpm or actual <= 0:
+            return
+        with self._transaction() as db:
+            requests, tokens_left, _ = self._refill(db, self._clock())
+            db.execute(
+                "UPDATE bucket SET requests = ?, tokens = ?, updated = ? WHERE id = 1",
+                (requests, min(self.tpm, tokens_left + reserved - actual), self._clock()),
+            )
+
+    def pause(self, seconds: float) -> None:
+        """Hold back every process sharing this quota for `seconds` (e.g. after a 429)."""
+        with self._transaction() as db:
+            db.execute(
+                "UPDATE bucket SET paused_until = MAX(paused_until, ?) WHERE id = 1", (self._clock() + seconds,)
+            )
+
+    def report(self) -> List[Dict[str, float]]:
+        """Per-run grants and queue wait times, busiest first."""
+        rows = self._conn().execute(
+            "SELECT run_id, grants, total_wait_s, max_wait_s, tokens FROM runs ORDER BY grants DESC"
+        ).fetchall()
+        return [
+            {
+                "run_id": run_id,
+                "grants": grants,
+                "avg_wait_s": round(total / grants, 3) if grants else 0.0,
+                "max_wait_s": round(max_wait, 3),
+                "tokens": tokens,
+            }
+            for run_id, grants, total, max_wait, tokens in rows
+        ]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from .config import get_config
+
+    parser = argparse.ArgumentParser(description="Inspect the shared LLM quota coordinator.")
+    parser.add_argument("--report", action="store_true", help="Print per-run queue wait times.")
+    args = parser.parse_args(argv)
+    cfg = get_config()
+    limiter = SharedQuotaLimiter(Path(cfg.llm_quota_db), rpm=cfg.llm_rpm or 1, tpm=cfg.llm_tpm)
+    if args.report:
+        for row in limiter.report():
+            print(
+                f"{row['run_id']}: {row['grants']} calls, avg wait {row['avg_wait_s']}s, "
+                f"max wait {row['max_wait_s']}s, {row['tokens']} tokens reserved"
+            )
+
+
+if __name__ == "__main__":
+    main()
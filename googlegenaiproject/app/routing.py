@@ -0,0 +1,220 @@
+"""Latency-aware model routing with hedged requests.
+
+Each agent calls with its preferred model; `ModelRouter` may also use the
+alternates configured for that agent (`LLM_ROUTES`, default `DEFAULT_ALTERNATES`).
+
+- Every attempt's latency and outcome go into a rolling window per model.
+- Candidates are ranked by median latency among *acceptable* models (error rate
+  under `max_error_rate`). Models without enough samples keep their configured
+  order behind measured ones, so the preferred model wins until data says otherwise.
+- If the primary has not answered by its `hedge_percentile` latency (or
+  `hedge_after_s` while it has no history), one hedged duplicate is sent to the
+  next candidate. The first success wins. A loser that has not started is
+  cancelled; one already in flight sees the call's `cancelled` event set, so
+  its retry loop gives up (raising `HedgeCancelled`) instead of spending quota.
+- A primary that fails with a retryable error fails over to the next candidate.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+
+class HedgeCancelled(RuntimeError):
+    """Raised by `fn` when it stops early because another candidate already answered."""
+
+
+DEFAULT_ALTERNATES: Dict[str, List[str]] = {
+    "quiz": ["gemini-2.0-flash-lite"],
+    "market": ["gemini-2.0-flash-lite"],
+    "roadmap": ["gemini-2.0-flash-lite"],
+    "enrichment": ["gemini-2.0-flash"],
+}
+
+
+def parse_routes(spec: str) -> Dict[str, List[str]]:
+    """`quiz=gemini-2.0-flash-lite;roadmap=m1,m2` -> {"quiz": [...], "roadmap": ["m1", "m2"]}"""
+    routes: Dict[str, List[str]] = {}
+    for entry in filter(None, (part.strip() for part in spec.split(";"))):
+        agent, _, models = entry.partition("=")
+        routes[agent.strip()] = [m.strip() for m in models.split(",") if m.strip()]
+    return routes
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+    return ordered[idx]
+
+
+class ModelWindow:
+    """Rolling (latency, ok) samples for one model."""
+
+    def __init__(self, size: int) -> None:
+        self.samples: Deque[Tuple[float, bool]] = deque(maxlen=size)
+
+    def add(self, latency: float, ok: bool) -> None:
+        self.samples.append((latency, ok))
+
+    @property
+    def latencies(self) -> List[float]:
+        return [lat for lat, ok in self.samples if ok]
+
+    @property
+    def error_rate(self) -> float:
+        if not self.samples:
+            return 0.0
+        return sum(1 for _, ok in self.samples if not ok) / len(self.samples)
+
+    def percentile(self, q: float) -> Optional[float]:
+        latencies = self.latencies
+        return _percentile(latencies, q) if latencies else None
+
+
+class ModelRouter:
+    def __init__(
+        self,
+        alternates: Optional[Dict[str, List[str]]] = None,
+        window: int = 50,
+        min_samples: int = 5,
+        max_error_rate: float = 0.5,
+        hedge_percentile: float = 0.9,
+        hedge_after_s: float = 10.0,
+        hedge_min_s: float = 1.0,
+        retryable: Callable[[BaseException], bool] = lambda e: True,
+        normalize: Callable[[str], str] = lambda name: name,
+        max_workers: int = 32,
+    ) -> None:
+        self._normalize = normalize
+        self.alternates = {
+            agent: [normalize(m) for m in models]
+            for agent, models in (DEFAULT_ALTERNATES if alternates is None else alternates).items()
+        }
+        self.window = window
+        self.min_samples = min_samples
+        self.max_error_rate = max_error_rate
+        self.hedge_percentile = hedge_percentile
+        self.hedge_after_s = hedge_after_s
+        self.hedge_min_s = hedge_min_s
+        self.retryable = retryable
+        self._windows: Dict[str, ModelWindow] = {}
+        self._counters: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-route")
+
+    # ------------------------
+    # Stats & ranking
+    # ------------------------
+    def _window(self, model: str) -> ModelWindow:
+        win = self._windows.get(model)
+        if win is None:
+            win = self._windows[model] = ModelWindow(self.window)
+        return win
+
+    def observe(self, model: str, latency: float, ok: bool) -> None:
+        with self._lock:
+            self._window(model).add(latency, ok)
+
+    def _count(self, agent: str, name: str) -> None:
+        with self._lock:
+            counters = self._counters.setdefault(agent, {"hedges": 0, "hedge_wins": 0, "failovers": 0})
+            counters[name] += 1
+
+    def routes(self, agent: str) -> bool:
+        return bool(self.alternates.get(agent))
+
+    def rank(self, agent: str, model: str) -> List[str]:
+        """Candidate models for one call, best first."""
+        configured = [model] + [m for m in self.alternates.get(agent, []) if m != model]
+        with self._lock:
+            windows = {m: self._window(m) for m in configured}
+            measured = {m: len(w.samples) >= self.min_samples for m, w in windows.items()}
+            acceptable = [m for m in configured if not measured[m] or windows[m].error_rate <= self.max_error_rate]
+
+            def key(m: str) -> Tuple[float, int]:
+                p50 = windows[m].percentile(0.5) if measured[m] else None
+                return (p50 if p50 is not None else float("inf"), configured.index(m))
+
+            ranked = sorted(acceptable or configured, key=key)
+        # Models over the error budget stay reachable as a last resort
+        return ranked + [m for m in configured if m not in ranked]
+
+    def hedge_after(self, model: str) -> float:
+        with self._lock:
+            win = self._window(model)
+            if len(win.latencies) < self.min_samples:
+                return self.hedge_after_s
+            return max(self.hedge_min_s, win.percentile(self.hedge_percentile) or 0.0)
+
+    # ------------------------
+    # Calls
+    # ------------------------
+    def _timed(self, model: str, fn: Callable[[str, threading.Event], Any], cancelled: threading.Event) -> Any:
+        start = time.perf_counter()
+        try:
+            result = fn(model, cancelled)
+        except HedgeCancelled:
+            raise  # stopped for a sibling: says nothing about this model
+        except BaseException:
+            self.observe(model, time.perf_counter() - start, ok=False)
+            raise
+        self.observe(model, time.perf_counter() - start, ok=True)
+        return result
+
+    def call(self, agent: str, model: str, fn: Callable[[str, threading.Event], Any]) -> Any:
+        """Run `fn(model_name, cancelled)` on the best candidate, hedging or failing over as needed.
+
+        `cancelled` is set once one candidate has succeeded; `fn` should check it
+        between retries and raise `HedgeCancelled`.
+        """
+        queue = self.rank(agent, self._normalize(model))
+        primary = queue.pop(0)
+        cancelled = threading.Event()
+        pending: Dict[Future, str] = {self._executor.submit(self._timed, primary, fn, cancelled): primary}
+        timeout: Optional[float] = self.hedge_after(primary) if queue else None
+        last_exc: Optional[BaseException] = None
+        while pending:
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                # Primary is past its tail latency: send one hedged duplicate
+                hedge = queue.pop(0)
+                pending[self._executor.submit(self._timed, hedge, fn, cancelled)] = hedge
+                self._count(agent, "hedges")
+                timeout = None
+                continue
+            for future in done:
+                served_by = pending.pop(future)
+                exc = future.exception()
+                if exc is None:
+                    cancelled.set()
+                    for loser in pending:
+                        loser.cancel()
+                    if served_by != primary:
+                        self._count(agent, "hedge_wins")
+                    return future.result()
+                last_exc = exc
+            if not pending and queue and last_exc is not None and self.retryable(last_exc):
+                nxt = queue.pop(0)
+                pending[self._executor.submit(self._timed, nxt, fn, cancelled)] = nxt
+                self._count(agent, "failovers")
+                timeout = self.hedge_after(nxt) if queue else None
+        assert last_exc is not None
+        raise last_exc
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            models = {}
+            for name, win in self._windows.items():
+                if not win.samples:
+                    continue
+                models[name] = {
+                    "samples": len(win.samples),
+                    "error_rate": round(win.error_rate, 3),
+                    "p50_s": round(win.percentile(0.5) or 0.0, 4),
+                    "p90_s": round(win.percentile(0.9) or 0.0, 4),
+                }
+            return {"models": models, "agents": {a: dict(c) for a, c in self._counters.items()}}
@@ -1,55 +1,87 @@
-import subprocess
+import argparse
 import os
-import time
+import sys
 
-# Paths
-BASE_DIR = os.path.dirname(__file__)
-OUTPUT_DIR = os.path.join(BASE_DIR, "outputs")
+if __package__ in (None, ""):
+    # allow `python app/run_all.py` as well as `python -m app.run_all`
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# Agents in order
+from app.agents.registry import AgentRunner
+from app.build_cache import StageCache
+from app.config import get_config
+from app.events import bus, pipeline_listener
+from app.pipeline import PipelineExecutor
+from app.workspace import new_run, use_run
+
+# Pipeline agents (registry names, see app/agents/registry.py). Run order comes
+# from each agent's declared inputs/outputs, not from this list.
 AGENTS = [
-    ("Resume Agent", "app.agents.resume"),
-    ("Quiz Agent", "app.agents.quiz"),
-    ("SkillGap Agent", "app.agents.skill_gap_agent"),
-    ("Mentor Agent", "app.agents.mentor"),
-    ("Roadmap Agent", "app.agents.roadmap"),  # ✅ ensure roadmap runs last
+    ("Resume Agent", "resume"),
+    ("Quiz Agent", "quiz"),
+    ("SkillGap Agent", "skillgap"),
+    ("Mentor Agent", "mentor"),
+    ("Market Agent", "market"),
+    ("Roadmap Agent", "roadmap"),
 ]
+DISPLAY_NAMES = {agent: name for name, agent in AGENTS}
 
-def clear_outputs():
-    """Clear old JSON files before new run."""
-    print("\n🧹 Clearing old output files...")
-    if os.path.exists(OUTPUT_DIR):
-        for file in os.listdir(OUTPUT_DIR):
-            if file.endswith(".json"):
-                os.remove(os.path.join(OUTPUT_DIR, file))
-                print(f"  Deleted: {file}")
+def print_event(kind, result):
+    """Show stage progress as the DAG executor reports it."""
+    name = DISPLAY_NAMES.get(result.name, result.name)
+    if kind == "start":
+        print(f"🚀 Running {name}...")
+    elif kind == "cached":
+        print(f"♻️  {name} inputs unchanged, reused cached output.\n")
+    elif kind == "ok":
+        print(f"✅ {name} completed successfully in {result.duration_s:.1f}s.\n")
+    elif kind == "failed":
+        print(f"❌ Error in {name}: {result.error}\n")
     else:
-        os.makedirs(OUTPUT_DIR)
-        print("  Created outputs directory.")
-    print("✅ Output cleanup done.\n")
-
-def run_agent(name, module):
-    """Run each agent and show progress."""
-    print(f"🚀 Running {name}...")
-    try:
-        subprocess.run(["python", "-m", module], check=True)
-        print(f"✅ {name} completed successfully.\n")
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Error in {name}: {e}\n")
+        print(f"⏭️  Skipped {name}: {result.error}\n")
 
-def main():
+def main(mode=None, use_cache=None, run=None):
+    """Run the pipeline in `run`'s workspace (a new one by default) and return the report."""
     print("\n==============================")
     print("🧠  AI Career Roadmap Pipeline")
     print("==============================\n")
 
-    clear_outputs()
-
-    for name, module in AGENTS:
-        run_agent(name, module)
-        time.sleep(1)  # brief delay for readability
+    # Each run writes to its own workspace, so concurrent pipelines never share files.
+    run = run or new_run()
+    print(f"🗂️  Run {run.run_id}: {run.outputs_dir}\n")
+    # The shared LLM quota coordinator (app/ratelimit.py) queues fairly between
+    # run ids; subprocess agents inherit this one.
+    runner = AgentRunner(mode=mode, workers=len(AGENTS), run_id=os.getenv("LLM_RUN_ID") or run.run_id)
+    if use_cache is None:
+        use_cache = get_config().build_cache
+    cache = StageCache() if use_cache else None
 
-    print("\n🎯 Pipeline completed! Check your /outputs folder for the latest roadmap.json.\n")
+    report = None
+    try:
+        executor = PipelineExecutor(runner, [agent for _, agent in AGENTS], cache=cache)
+        bus.publish(run.run_id, "run_started", stages=list(executor.deps), deps={k: sorted(v) for k, v in executor.deps.items()})
+        with use_run(run):
+            report = executor.run(on_event=pipeline_listener(run, then=print_event))
+    finally:
+        runner.shutdown()
+        if report is not None:
+            bus.publish(run.run_id, "run_finished", ok=report.ok, wall_s=report.wall_s, critical_path=report.critical_path())
+        else:
+            bus.publish(run.run_id, "run_finished", ok=False, error="pipeline aborted")
+    print("\n⏱️  Stage timings\n" + report.format())
+    if report.ok:
+        print(f"\n🎯 Pipeline completed! Roadmap: {run.outputs_dir / 'roadmap.json'}\n")
+    else:
+        print("\n⚠️  Pipeline finished with failures; see the report above.\n")
+    return report
 
 if __name__ == "__main__":
-    main()
-
+    parser = argparse.ArgumentParser(description="Run the full agent pipeline.")
+    parser.add_argument("--subprocess", action="store_true", help="Run each agent in its own Python process.")
+    parser.add_argument("--no-cache", action="store_true", help="Re-run every stage even if its inputs are unchanged.")
+    parser.add_argument("--run-id", help="Workspace id for this run (default: generated).")
+    args = parser.parse_args()
+    main(
+        mode="subprocess" if args.subprocess else None,
+        use_cache=False if args.no_cache else None,
+        run=new_run(args.run_id) if args.run_id else None,
+    )
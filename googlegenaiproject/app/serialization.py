@@ -0,0 +1,85 @@
+"""Shared JSON serialization built on orjson.
+
+Everything that turns data into JSON goes through here: agent artifacts
+(`workspace.atomic_write_json`), FastAPI responses (`ORJSONResponse` is the
+app's default response class), the served-output cache, SSE/NDJSON streams,
+the Flask ML endpoints and Firestore documents.
+
+- Output is compact UTF-8 bytes. Pretty-printing (2-space indent) is opt-in
+  for debugging: set JSON_PRETTY=on, or pass `pretty=True`. Line-delimited
+  formats (SSE, NDJSON) always pass `pretty=False`.
+- Pydantic models are encoded by pydantic itself (`model_dump_json`), which
+  skips building an intermediate dict. Paths, sets and numpy values are
+  handled too.
+- `python -m app.bench_serialization` compares this against stdlib `json`
+  on real payloads.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+import orjson
+from pydantic import BaseModel
+from starlette.responses import JSONResponse
+
+from .config import get_config
+
+PRETTY = get_config().json_pretty
+
+_BASE_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, Path):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any, pretty: Optional[bool] = None, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+    """JSON bytes for `obj`; `default` is tried for types neither orjson nor `_default` knows."""
+    if pretty is None:
+        pretty = PRETTY
+    if isinstance(obj, BaseModel):
+        return dump_model(obj, pretty=pretty)
+    option = _BASE_OPTIONS | orjson.OPT_INDENT_2 if pretty else _BASE_OPTIONS
+    if default is None:
+        return orjson.dumps(obj, default=_default, option=option)
+
+    def fallback(value: Any) -> Any:
+        try:
+            return _default(value)
+        except TypeError:
+            return default(value)
+
+    return orjson.dumps(obj, default=fallback, option=option)
+
+
+def dumps_text(obj: Any, pretty: Optional[bool] = None, default: Optional[Callable[[Any], Any]] = None) -> str:
+    return dumps(obj, pretty=pretty, default=default).decode("utf-8")
+
+
+def loads(data: Any) -> Any:
+    """Parse JSON from bytes, bytearray, memoryview or str."""
+    return orjson.loads(data)
+
+
+def dump_model(model: BaseModel, pretty: Optional[bool] = None) -> bytes:
+    if pretty is None:
+        pretty = PRETTY
+    return model.model_dump_json(indent=2 if pretty else None).encode("utf-8")
+
+
+def to_document(model: BaseModel) -> Dict[str, Any]:
+    """Plain JSON-safe dict for document stores; the same shape the API serves."""
+    return model.model_dump(mode="json")
+
+
+class ORJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
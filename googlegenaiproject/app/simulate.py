@@ -12,6 +12,7 @@ Run: python -m app.simulate path/to/resume.txt
 
 from __future__ import annotations
 
+import asyncio
 import sys
 from pathlib import Path
 from typing import Tuple
@@ -19,19 +20,19 @@ from typing import Tuple
 from rich import print
 
 from .integrations.gcp import FirestoreClient
-from .orchestrator import Orchestrator
+from .orchestrator import AsyncOrchestrator
 from .schemas import PCP, ResumeProfile, Roadmap, SkillGraph, ProfilerPayload
 
 
-def simulate(user_id: str, resume_file: str) -> None:
+async def simulate(user_id: str, resume_file: str) -> None:
     store = FirestoreClient()
-    orch = Orchestrator(store)
+    orch = AsyncOrchestrator(store)
 
     print("[bold cyan]1) Parsing resume...[/bold cyan]")
-    profile, graph, payload = orch.handle_resume_upload(user_id, resume_file)
+    profile, graph, payload = await orch.handle_resume_upload(user_id, resume_file)
 
     print("[bold cyan]2) Running career quiz (simulated)...[/bold cyan]")
-    pcp, roadmap, recs, mentor = orch.handle_quiz_complete(user_id, profile, graph)
+    pcp, roadmap, recs, mentor = await orch.handle_quiz_complete(user_id, profile, graph)
 
     print("[bold cyan]3) Initial outputs:[/bold cyan]")
     print({
@@ -43,13 +44,17 @@ def simulate(user_id: str, resume_file: str) -> None:
     })
 
     print("[bold cyan]4) Market scan and roadmap update...[/bold cyan]")
-    market, updated_roadmap, new_recs = orch.scheduled_market_scan(pcp, roadmap, graph)
+    market, updated_roadmap, new_recs = await orch.scheduled_market_scan(pcp, roadmap, graph)
     print({
         "market": market.model_dump(),
         "roadmap_updated": updated_roadmap.model_dump(),
         "new_recommendations": [i.model_dump() for i in new_recs.items],
     })
 
+    print("[bold cyan]Step timings:[/bold cyan]")
+    for handler, report in orch.reports:
+        print(f"{handler}\n{report.format()}\n")
+
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
@@ -59,6 +64,6 @@ if __name__ == "__main__":
     if not path.exists():
         print(f"File not found: {path}")
         sys.exit(1)
-    simulate(user_id="demo-user", resume_file=str(path))
+    asyncio.run(simulate(user_id="demo-user", resume_file=str(path)))
 
 
@@ -0,0 +1,81 @@
+"""Content-addressed résumé uploads.
+
+`save_upload` streams an `UploadFile` to disk in chunks (file writes run in
+the threadpool, so the event loop never blocks), hashing as it goes and
+aborting once `max_bytes` is exceeded. The file is stored as
+`<sha256><suffix>`: re-uploading the same bytes reuses the existing file, and
+because the stage cache (app/build_cache.py) keys the résumé agent on the
+file's content, an earlier parse of it is reused by the next pipeline run.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+
+from starlette.concurrency import run_in_threadpool
+
+from .agents.registry import get_agent
+from .build_cache import StageCache
+from .workspace import RunContext, use_run
+
+CHUNK_BYTES = 1 << 20
+ALLOWED_SUFFIXES = (".pdf", ".docx", ".txt")
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class StoredUpload:
+    upload_id: str
+    path: Path
+    sha256: str
+    size: int
+    duplicate: bool
+
+
+async def save_upload(file, dest_dir: Path, max_bytes: int) -> StoredUpload:
+    suffix = Path(file.filename or "").suffix.lower()
+    if suffix not in ALLOWED_SUFFIXES:
+        raise ValueError(f"Unsupported file type '{suffix or '?'}'; expected one of {', '.join(ALLOWED_SUFFIXES)}")
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=str(dest_dir), prefix=".upload-", suffix=".tmp")
+    out = os.fdopen(fd, "wb")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        while True:
+            chunk = await file.read(CHUNK_BYTES)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLarge(f"Upload exceeds {max_bytes} bytes")
+            digest.update(chunk)
+            await run_in_threadpool(out.write, chunk)
+        await run_in_threadpool(out.close)
+        sha = digest.hexdigest()
+        target = dest_dir / f"{sha}{suffix}"
+        duplicate = target.exists()
+        if not duplicate:
+            os.chmod(tmp, 0o644)  # mkstemp creates 0600 files
+            os.replace(tmp, target)
+        return StoredUpload(target.name, target, sha, size, duplicate)
+    finally:
+        if not out.closed:
+            out.close()
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def resume_parse_cached(path: Path, cache: StageCache) -> bool:
+    """Whether the stage cache already holds the résumé agent's output for this file."""
+    scratch = RunContext("upload", Path(path).parent, sources={"resume": str(path)})
+    spec = get_agent("resume")
+    with use_run(scratch):
+        return cache.has(spec, cache.key(spec, scratch.outputs_dir))
@@ -0,0 +1,220 @@
+"""Run-scoped workspaces for agent pipelines.
+
+Every pipeline run gets a run id and its own directory:
+
+    runs/<run_id>/run.json     metadata (id, created, source overrides)
+    runs/<run_id>/inputs/      uploaded résumé, quiz answers
+    runs/<run_id>/outputs/     everything the agents write
+
+Agents resolve paths through `outputs_dir()` / `source_path()` instead of the
+shared `outputs/`, so concurrent runs cannot overwrite each other. The active
+run is a context variable set with `use_run()`; `AgentRunner` copies it into
+its worker threads and passes `AGENT_RUN_DIR` to subprocess agents. With no
+active run, agents fall back to the shared `outputs/` and the sample inputs
+(standalone CLI use).
+
+Old workspaces are pruned whenever a run is created: only the newest
+`RUNS_KEEP` runs younger than `RUNS_MAX_AGE_DAYS` are kept (0 disables
+either limit). Runs are ordered by the mtime of their run.json, so listing a
+page and pruning never parse the metadata of runs they skip.
+
+`atomic_write_json` / `atomic_write_text` / `atomic_write_bytes` write to a
+temp file in the target directory and `os.replace` it, so readers never see a
+half-written file. JSON is compact unless JSON_PRETTY is set
+(app/serialization.py).
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import shutil
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .config import OUTPUTS_DIR, PROJECT_ROOT, get_config
+from .serialization import dumps, loads
+
+# Inputs an agent may read besides outputs/; a run can override any of them.
+DEFAULT_SOURCES: Dict[str, Path] = {
+    "resume": PROJECT_ROOT / "app" / "samples" / "resumeanweshsinha.pdf",
+    "quiz_input": PROJECT_ROOT / "app" / "samples" / "quiz_input.json",
+    "quiz_table": PROJECT_ROOT / "app" / "data" / "quiz_persona_table.json",
+}
+
+RUN_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def atomic_write_bytes(path: Path, data: bytes) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=str(path.parent), prefix="." + path.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.chmod(tmp, 0o644)  # mkstemp creates 0600 files
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def atomic_write_text(path: Path, text: str, encoding: str = "utf-8") -> None:
+    atomic_write_bytes(path, text.encode(encoding))
+
+
+def atomic_write_json(path: Path, data: Any, pretty: Optional[bool] = None) -> None:
+    """Compact UTF-8 JSON via app/serialization.py; `pretty` (or JSON_PRETTY) indents it."""
+    atomic_write_bytes(path, dumps(data, pretty=pretty))
+
+
+def runs_dir() -> Path:
+    return Path(get_config().runs_dir)
+
+
+@dataclass(frozen=True)
+class RunContext:
+    run_id: str
+    root: Path
+    created: float = 0.0
+    sources: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def outputs_dir(self) -> Path:
+        return self.root / "outputs"
+
+    @property
+    def inputs_dir(self) -> Path:
+        return self.root / "inputs"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"run_id": self.run_id, "created": self.created, "sources": self.sources}
+
+    @classmethod
+    def load(cls, root: Path) -> "RunContext":
+        meta = loads((Path(root) / "run.json").read_bytes())
+        return cls(meta["run_id"], Path(root), meta.get("created", 0.0), meta.get("sources", {}))
+
+
+def new_run(
+    run_id: Optional[str] = None,
+    sources: Optional[Dict[str, str]] = None,
+    inputs: Optional[Dict[str, Any]] = None,
+) -> RunContext:
+    """Create a fresh workspace.
+
+    `sources` maps DEFAULT_SOURCES names to existing files to use instead;
+    `inputs` maps names to JSON data written to `inputs/<name>.json` and used
+    as that source.
+    """
+    run_id = run_id or f"run-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+    if not RUN_ID_PATTERN.match(run_id):
+        raise ValueError(f"Invalid run id {run_id!r}")
+    unknown = (set(sources or {}) | set(inputs or {})) - set(DEFAULT_SOURCES)
+    if unknown:
+        raise ValueError(f"Unknown run sources: {', '.join(sorted(unknown))}")
+    root = runs_dir() / run_id
+    root.mkdir(parents=True, exist_ok=False)
+    (root / "outputs").mkdir()
+    (root / "inputs").mkdir()
+    resolved = {k: str(v) for k, v in (sources or {}).items()}
+    for name, data in (inputs or {}).items():
+        path = root / "inputs" / f"{name}.json"
+        atomic_write_json(path, data)
+        resolved[name] = str(path)
+    ctx = RunContext(run_id, root, time.time(), resolved)
+    atomic_write_json(root / "run.json", ctx.to_dict())
+    prune_runs()
+    return ctx
+
+
+def get_run(run_id: str) -> RunContext:
+    """Existing workspace by id; KeyError if unknown or malformed."""
+    root = runs_dir() / run_id
+    if not RUN_ID_PATTERN.match(run_id) or not (root / "run.json").exists():
+        raise KeyError(run_id)
+    return RunContext.load(root)
+
+
+def _run_roots() -> List[Tuple[float, Path]]:
+    """(run.json mtime, run root) for every workspace, newest first."""
+    base = runs_dir()
+    if not base.exists():
+        return []
+    roots = []
+    for p in base.iterdir():
+        try:
+            roots.append(((p / "run.json").stat().st_mtime, p))
+        except OSError:  # not a run, or being created / pruned
+            continue
+    return sorted(roots, key=lambda r: (r[0], r[1].name), reverse=True)
+
+
+def list_runs(limit: Optional[int] = None, offset: int = 0) -> List[RunContext]:
+    """Workspaces newest first; `limit`/`offset` select a page."""
+    roots = _run_roots()[offset:None if limit is None else offset + limit]
+    runs = []
+    for _, root in roots:
+        try:
+            runs.append(RunContext.load(root))
+        except (OSError, ValueError):  # pruned meanwhile
+            continue
+    return runs
+
+
+def prune_runs(keep: Optional[int] = None, max_age_days: Optional[float] = None) -> List[str]:
+    """Delete all but the newest `keep` workspaces and any older than `max_age_days`; returns the removed ids."""
+    cfg = get_config()
+    keep = cfg.runs_keep if keep is None else keep
+    max_age_days = cfg.runs_max_age_days if max_age_days is None else max_age_days
+    now = time.time()
+    removed = []
+    for i, (mtime, root) in enumerate(_run_roots()):
+        if (keep and i >= keep) or (max_age_days and now - mtime > max_age_days * 86400):
+            shutil.rmtree(root, ignore_errors=True)
+            removed.append(root.name)
+    return removed
+
+
+_current: ContextVar[Optional[RunContext]] = ContextVar("run_context", default=None)
+
+
+@contextmanager
+def use_run(ctx: Optional[RunContext]) -> Iterator[Optional[RunContext]]:
+    token = _current.set(ctx)
+    try:
+        yield ctx
+    finally:
+        _current.reset(token)
+
+
+def current_run() -> Optional[RunContext]:
+    ctx = _current.get()
+    if ctx is None and os.getenv("AGENT_RUN_DIR"):
+        # subprocess agent started by AgentRunner for a run
+        ctx = RunContext.load(Path(os.environ["AGENT_RUN_DIR"]))
+    return ctx
+
+
+def outputs_dir() -> Path:
+    ctx = current_run()
+    path = ctx.outputs_dir if ctx else OUTPUTS_DIR
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def output_path(name: str) -> Path:
+    return outputs_dir() / name
+
+
+def source_path(name: str) -> Path:
+    ctx = current_run()
+    if ctx and name in ctx.sources:
+        return Path(ctx.sources[name])
+    return DEFAULT_SOURCES[name]
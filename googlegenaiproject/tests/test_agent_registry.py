@@ -0,0 +1,54 @@
+import pytest
+
+from app import ratelimit
+from app.agents import registry
+from app.agents.registry import AgentError, AgentRunner, AgentSpec, get_agent
+
+
+def test_registry_covers_pipeline_agents():
+    for name in ("resume", "quiz", "skillgap", "mentor", "roadmap", "market"):
+        assert get_agent(name).name == name
+    assert get_agent("Roadmap") is get_agent("roadmap")
+    with pytest.raises(KeyError):
+        get_agent("unknown")
+
+
+def test_inprocess_runner_reuses_loaded_module(monkeypatch):
+    calls = []
+    spec = AgentSpec("echo", "app.agents.registry", "_echo_agent", ())
+    monkeypatch.setitem(registry.AGENTS, "echo", spec)
+    monkeypatch.setattr(registry, "_echo_agent", lambda: calls.append(1) or len(calls), raising=False)
+    runner = AgentRunner(mode="inprocess", workers=2)
+    try:
+        results = [runner.submit("echo") for _ in range(3)]
+        values = sorted(f.result().value for f in results)
+    finally:
+        runner.shutdown()
+    assert values == [1, 2, 3]
+    assert results[0].result().mode == "inprocess"
+
+
+def test_inprocess_agents_queue_on_the_quota_as_their_run(monkeypatch):
+    monkeypatch.setitem(registry.AGENTS, "who", AgentSpec("who", "app.agents.registry", "_who_agent", ()))
+    monkeypatch.setattr(registry, "_who_agent", ratelimit._quota_run.get, raising=False)
+    runners = [AgentRunner(mode="inprocess", workers=1, run_id=run_id) for run_id in ("run-a", "run-b")]
+    try:
+        assert [r.run("who").value for r in runners] == ["run-a", "run-b"]
+    finally:
+        for r in runners:
+            r.shutdown()
+    assert ratelimit._quota_run.get() is None
+
+
+def test_agent_failure_is_wrapped(monkeypatch):
+    def boom():
+        raise ValueError("bad input")
+
+    monkeypatch.setitem(registry.AGENTS, "boom", AgentSpec("boom", "app.agents.registry", "_boom_agent", ()))
+    monkeypatch.setattr(registry, "_boom_agent", boom, raising=False)
+    runner = AgentRunner(mode="inprocess", workers=1)
+    try:
+        with pytest.raises(AgentError, match="bad input"):
+            runner.run("boom")
+    finally:
+        runner.shutdown()
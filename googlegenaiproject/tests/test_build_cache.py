@@ -0,0 +1,118 @@
+import pytest
+
+from app import workspace
+from app.agents import registry
+from app.agents.registry import AgentRunner, AgentSpec
+from app.build_cache import StageCache
+from app.pipeline import PipelineExecutor
+
+
+@pytest.fixture
+def outputs(tmp_path, monkeypatch):
+    outputs = tmp_path / "outputs"
+    outputs.mkdir()
+    monkeypatch.setattr(workspace, "OUTPUTS_DIR", outputs)
+    (outputs / "answers.txt").write_text("a")
+    (outputs / "resume.txt").write_text("cv")
+    return outputs
+
+
+@pytest.fixture
+def fallbacks():
+    return set()  # agents that report FALLBACK
+
+
+@pytest.fixture
+def runs(outputs, fallbacks, monkeypatch):
+    runs = []
+
+    def register(name, reads, writes):
+        def agent():
+            runs.append(name)
+            body = ",".join((outputs / f).read_text() for f in reads)
+            (outputs / writes).write_text(f"{name}({body})")
+            return registry.FALLBACK if name in fallbacks else None
+
+        spec = AgentSpec(name, "app.agents.registry", f"_agent_{name}", (writes,), reads)
+        monkeypatch.setitem(registry.AGENTS, name, spec)
+        monkeypatch.setattr(registry, f"_agent_{name}", agent, raising=False)
+
+    register("parse", ("resume.txt",), "parsed.json")
+    register("quiz", ("answers.txt",), "quiz.json")
+    register("gap", ("parsed.json", "quiz.json"), "gap.json")
+    return runs
+
+
+def run(cache):
+    runner = AgentRunner(mode="inprocess", workers=2)
+    try:
+        return PipelineExecutor(runner, ["parse", "quiz", "gap"], cache=cache).run()
+    finally:
+        runner.shutdown()
+
+
+def clear(outputs):
+    for path in outputs.glob("*.json"):
+        path.unlink()
+
+
+def test_unchanged_inputs_reuse_cached_outputs(tmp_path, outputs, runs):
+    cache = StageCache(tmp_path / "cache")
+    assert run(cache).ok
+    assert sorted(runs) == ["gap", "parse", "quiz"]
+
+    clear(outputs)
+    report = run(cache)
+    assert len(runs) == 3
+    assert {r.status for r in report.stages.values()} == {"cached"}
+    assert (outputs / "gap.json").read_text() == "gap(parse(cv),quiz(a))"
+    assert cache.hits == 3
+
+
+def test_edited_answers_rerun_only_affected_stages(tmp_path, outputs, runs):
+    cache = StageCache(tmp_path / "cache")
+    run(cache)
+    runs.clear()
+
+    clear(outputs)
+    (outputs / "answers.txt").write_text("b")
+    report = run(cache)
+    assert sorted(runs) == ["gap", "quiz"]
+    assert report.stages["parse"].status == "cached"
+    assert (outputs / "gap.json").read_text() == "gap(parse(cv),quiz(b))"
+
+
+def test_spec_version_and_env_are_part_of_the_key(tmp_path, outputs, monkeypatch):
+    cache = StageCache(tmp_path / "cache")
+    spec = AgentSpec("x", "app.agents.registry", "f", ("x.json",), env=("X_MODE",))
+    key = cache.key(spec, outputs)
+    monkeypatch.setenv("X_MODE", "fast")
+    assert cache.key(spec, outputs) != key
+    bumped = AgentSpec("x", "app.agents.registry", "f", ("x.json",), env=("X_MODE",), version="2")
+    assert cache.key(bumped, outputs) != cache.key(spec, outputs)
+
+
+def test_fallback_outputs_are_not_cached(tmp_path, outputs, runs, fallbacks):
+    cache = StageCache(tmp_path / "cache")
+    fallbacks.add("quiz")  # e.g. the LLM call failed and a heuristic report was written
+    report = run(cache)
+    assert report.ok and report.stages["quiz"].fallback
+    runs.clear()
+    fallbacks.clear()
+
+    clear(outputs)
+    report = run(cache)
+    assert runs == ["quiz"]  # parse was cached; gap's input is unchanged, so it is too
+    assert report.stages["gap"].status == "cached"
+
+
+def test_llm_key_presence_is_part_of_the_key(tmp_path, outputs, monkeypatch):
+    cache = StageCache(tmp_path / "cache")
+    spec = AgentSpec("x", "app.agents.registry", "f", ("x.json",))
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    monkeypatch.delenv("GENAI_API_KEY", raising=False)
+    without = cache.key(spec, outputs)
+    monkeypatch.setenv("GEMINI_API_KEY", "k1")
+    with_key = cache.key(spec, outputs)
+    monkeypatch.setenv("GEMINI_API_KEY", "k2")
+    assert with_key != without and cache.key(spec, outputs) == with_key
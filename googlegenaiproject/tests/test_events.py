@@ -0,0 +1,48 @@
+import asyncio
+import threading
+
+from app.events import EventBus, RunEventLog
+
+
+async def collect(log, **kwargs):
+    return [event async for event in log.follow(**kwargs)]
+
+
+def test_follow_replays_then_streams_until_finished():
+    log = RunEventLog("r1")
+    log.publish("run_started", {"stages": ["a"]})
+
+    async def main():
+        consumer = asyncio.ensure_future(collect(log, heartbeat_s=0.05))
+        await asyncio.sleep(0.12)  # idle: a couple of heartbeats
+
+        def pipeline():  # publishers run on pipeline threads
+            log.publish("stage_started", {"stage": "a"})
+            log.publish("run_finished", {"ok": True})
+
+        threading.Thread(target=pipeline).start()
+        return await asyncio.wait_for(consumer, 2)
+
+    seen = asyncio.run(main())
+    assert [e.kind for e in seen if e] == ["run_started", "stage_started", "run_finished"]
+    assert None in seen
+    assert log._subscribers == []
+
+
+def test_resume_after_last_event_id_and_sse_format():
+    log = RunEventLog("r1")
+    for kind in ("run_started", "stage_started", "run_finished"):
+        log.publish(kind, {})
+    events = asyncio.run(collect(log, after=1))
+    assert [e.id for e in events] == [2, 3]
+    assert events[0].sse().startswith("id: 2\nevent: stage_started\ndata: {\"run_id\":\"r1\"}")
+    assert asyncio.run(collect(log, after=3)) == []
+
+
+def test_bus_keeps_only_recent_runs():
+    bus = EventBus(max_runs=2)
+    for run_id in ("a", "b", "c"):
+        bus.publish(run_id, "run_queued")
+    assert bus.log("a") is None and bus.log("c").events[0].kind == "run_queued"
+    bus.discard("c")
+    assert bus.log("c") is None
@@ -0,0 +1,276 @@
+import time
+
+import pytest
+
+from app.integrations import gcp
+from app.integrations.gcp import FirestoreClient
+from app.integrations.storage import SQLiteBackend, apply_update
+from app.schemas import PCP, CourseItem, CourseRecommendations, Roadmap, RoadmapMilestone
+
+
+def make_roadmap(user_id, version=1):
+    return Roadmap(
+        user_id=user_id,
+        version=version,
+        milestones=[RoadmapMilestone(id="m1", title="t", description="d")],
+        total_estimate_weeks=1,
+    )
+
+
+def make_pcp(user_id):
+    return PCP(
+        user_id=user_id,
+        target_roles=["data analyst"],
+        domains=["fintech"],
+        weekly_time_hours=8,
+        budget_usd=0.0,
+        learning_style="video",
+        confidence_by_cluster={"python": 0.5},
+    )
+
+
+class FakeDoc:
+    def __init__(self, client, path):
+        self.client = client
+        self.path = path
+
+    def set(self, data):
+        self.client.docs[self.path] = data
+
+
+class FakeBatch:
+    def __init__(self, client):
+        self.client = client
+        self.ops = []
+
+    def set(self, doc, data):
+        self.ops.append((doc.path, lambda old: data))
+
+    def update(self, doc, fields):
+        self.client.updates.append(fields)
+        changes = {tuple(part.strip("`") for part in path.split(".")): value for path, value in fields.items()}
+
+        def patch(old):
+            assert old is not None, "update of a missing document"
+            return apply_update(old, changes)
+
+        self.ops.append((doc.path, patch))
+
+    def commit(self):
+        if self.client.fail_next:
+            self.client.fail_next = False
+            raise RuntimeError("unavailable")
+        self.client.commits.append(len(self.ops))
+        for path, op in self.ops:
+            self.client.docs[path] = op(self.client.docs.get(path))
+
+
+class FakeFirestore:
+    """The slice of google.cloud.firestore.Client the write-behind buffer uses."""
+
+    def __init__(self):
+        self.docs = {}
+        self.commits = []
+        self.updates = []
+        self.get_alls = []
+        self.fail_next = False
+
+    def collection(self, name):
+        client = self
+
+        class Collection:
+            def document(self, doc_id):
+                return FakeDoc(client, f"{name}/{doc_id}")
+
+        return Collection()
+
+    def batch(self):
+        return FakeBatch(self)
+
+    def get_all(self, refs):
+        self.get_alls.append(len(refs))
+        for ref in refs:
+            data = self.docs.get(ref.path)
+            yield FakeSnapshot(ref, data)
+
+
+class FakeSnapshot:
+    def __init__(self, ref, data):
+        self.reference = ref
+        self.exists = data is not None
+        self._data = data
+
+    def to_dict(self):
+        return dict(self._data)
+
+
+def local_doc(store, collection, user_id):
+    return store.backend.get_many([(collection, user_id)])[(collection, user_id)]
+
+
+def test_repeated_writes_coalesce_into_one_batched_commit(tmp_path):
+    store = FirestoreClient(backend=SQLiteBackend(tmp_path / "docs.sqlite"), write_behind=True, flush_interval_s=0)
+    store.save_pcp(make_pcp("u1"))
+    store.save_roadmap(make_roadmap("u1", version=1))
+    store.save_roadmap(make_roadmap("u1", version=2))
+    assert store.backend.count() == 0
+    assert store.flush() == 2
+    assert local_doc(store, "roadmaps", "u1")["version"] == 2
+    stats = store.write_stats()
+    assert (stats["requested"], stats["coalesced"], stats["written"], stats["commits"]) == (3, 1, 2, 1)
+    assert stats["flushes"]["explicit"] == 1 and stats["pending"] == 0
+
+
+def test_flushes_on_size_and_splits_batches():
+    client = FakeFirestore()
+    store = FirestoreClient(client=client, write_behind=True, flush_interval_s=0, batch_size=2)
+    for i in range(5):
+        store.save_pcp(make_pcp(f"u{i}"))
+    assert client.commits == [2, 2]
+    assert store.pending_writes() == 1
+    store.flush()
+    assert client.commits == [2, 2, 1]
+    assert set(client.docs) == {f"pcps/u{i}" for i in range(5)}
+    assert store.write_stats()["flushes"]["size"] == 2
+
+
+def test_flushes_after_the_time_window():
+    client = FakeFirestore()
+    store = FirestoreClient(client=client, write_behind=True, flush_interval_s=0.05)
+    store.save_roadmap(make_roadmap("u1"))
+    store.save_pcp(make_pcp("u1"))
+    deadline = time.time() + 2
+    while not client.commits and time.time() < deadline:
+        time.sleep(0.01)
+    assert client.commits == [2]
+    assert store.write_stats()["flushes"]["time"] == 1
+
+
+def test_failed_commit_requeues_without_clobbering_newer_writes():
+    client = FakeFirestore()
+    store = FirestoreClient(client=client, write_behind=True, flush_interval_s=0)
+    store.save_roadmap(make_roadmap("u1", version=1))
+    store.save_pcp(make_pcp("u1"))
+    client.fail_next = True
+    with pytest.raises(RuntimeError):
+        store.flush()
+    store.save_roadmap(make_roadmap("u1", version=3))
+    assert store.pending_writes() == 2
+    store.flush()
+    assert client.docs["roadmaps/u1"]["version"] == 3
+    assert store.write_stats()["failed_commits"] == 1
+
+
+def test_write_behind_off_writes_through(tmp_path):
+    store = FirestoreClient(backend=SQLiteBackend(tmp_path / "docs.sqlite"), write_behind=False)
+    store.save_roadmap(make_roadmap("u1"))
+    assert local_doc(store, "roadmaps", "u1")["user_id"] == "u1"
+    assert store.flush() == 0
+    assert store.write_stats()["commits"] == 1
+
+
+def test_reads_see_pending_writes_then_cache_then_store():
+    client = FakeFirestore()
+    store = FirestoreClient(client=client, write_behind=True, flush_interval_s=0)
+    store.save_roadmap(make_roadmap("u1", version=2))
+    assert store.get_roadmap("u1").version == 2  # from the write-behind buffer
+    store.flush()
+    client.docs["pcps/u1"] = make_pcp("u1").model_dump(mode="json")
+    assert store.get_pcp("u1") == make_pcp("u1")
+    assert store.get_pcp("u1") == make_pcp("u1")
+    assert client.get_alls == [1]
+    assert store.get_mentor_summary("u1") is None
+    # the committed roadmap is kept as the base for its next delta
+    assert store.read_stats() == {"hits": 2, "misses": 2, "round_trips": 2, "cached": 2}
+
+
+def test_own_writes_invalidate_cached_documents():
+    client = FakeFirestore()
+    store = FirestoreClient(client=client, write_behind=False)
+    store.save_pcp(make_pcp("u1"))
+    assert store.get_pcp("u1").weekly_time_hours == 8
+    store.save_pcp(make_pcp("u1").model_copy(update={"weekly_time_hours": 4}))
+    assert store.get_pcp("u1").weekly_time_hours == 4
+    assert client.get_alls == [1, 1]
+
+
+def test_get_many_batches_misses_and_bounds_the_cache(monkeypatch):
+    monkeypatch.setattr(gcp, "READ_BATCH_SIZE", 10)
+    client = FakeFirestore()
+    store = FirestoreClient(client=client, write_behind=False, cache_size=8)
+    for i in range(20):
+        store.save_pcp(make_pcp(f"u{i}"))
+    ids = [f"u{i}" for i in range(25)]
+    pcps = store.get_many("pcps", ids)
+    assert list(pcps) == ids
+    assert pcps["u3"] == make_pcp("u3") and pcps["u24"] is None
+    assert client.get_alls == [10, 10, 5]
+    assert store.read_stats()["cached"] == 8
+    store.get_many("pcps", ids[-8:])
+    assert client.get_alls == [10, 10, 5, 5]  # u20-u24 were never cached
+
+
+def test_user_state_survives_a_restart_of_the_local_store(tmp_path):
+    store = FirestoreClient(backend=SQLiteBackend(tmp_path / "docs.sqlite"), write_behind=True, flush_interval_s=0)
+    store.save_pcp(make_pcp("u1"))
+    store.save_roadmap(make_roadmap("u1"))
+    store.flush()
+    store = FirestoreClient(backend=SQLiteBackend(tmp_path / "docs.sqlite"))
+    state = store.get_user_state("u1")
+    assert set(state) == set(gcp.COLLECTIONS)
+    assert state["pcps"] == make_pcp("u1") and state["roadmaps"] == make_roadmap("u1")
+    assert state["profiles"] is None
+
+
+def test_local_backend_is_the_fallback_without_firestore(tmp_path, monkeypatch):
+    monkeypatch.setenv("FIRESTORE_BACKEND", "sqlite")
+    monkeypatch.setenv("FIRESTORE_LOCAL_DB", str(tmp_path / "local.sqlite"))
+    store = FirestoreClient(write_behind=False)
+    assert isinstance(store.backend, SQLiteBackend) and store.client is None
+    store.save_pcp(make_pcp("u1"))
+    assert (tmp_path / "local.sqlite").exists()
+
+
+def make_milestones(*ids, resources=None):
+    resources = resources or {}
+    return [RoadmapMilestone(id=i, title=i, description="d", resources=resources.get(i, [])) for i in ids]
+
+
+def test_roadmap_saves_send_only_changed_milestones():
+    client = FakeFirestore()
+    store = FirestoreClient(client=client, write_behind=False)
+    roadmap = Roadmap(user_id="u1", milestones=make_milestones("m1", "m2", "m3"), total_estimate_weeks=3)
+    assert store.save_roadmap(roadmap) == 1
+    assert client.docs["roadmaps/u1"]["milestones_order"] == ["m1", "m2", "m3"]
+
+    attached = roadmap.model_copy(update={"milestones": make_milestones("m1", "m2", "m3", resources={"m2": ["c:1"]})})
+    assert store.save_roadmap(attached) == 2  # same version passed in: bumped
+    assert client.updates == [{"milestones.m2": attached.milestones[1].model_dump(mode="json"), "version": 2}]
+    assert store.save_roadmap(attached) == 2  # unchanged: not sent
+    assert client.commits == [1, 1]
+
+    assert store.get_roadmap("u1") == attached.model_copy(update={"version": 2})
+    assert client.get_alls == []
+    stats = store.write_stats()
+    assert (stats["written"], stats["delta_writes"], stats["fields_updated"], stats["unchanged"]) == (2, 1, 2, 1)
+
+
+def test_deltas_round_trip_through_the_local_store(tmp_path):
+    store = FirestoreClient(backend=SQLiteBackend(tmp_path / "docs.sqlite"), write_behind=True, flush_interval_s=0)
+    store.save_roadmap(Roadmap(user_id="u1", milestones=make_milestones("m1", "m2", "m3")))
+    store.flush()
+    reordered = Roadmap(user_id="u1", version=5, milestones=make_milestones("m3", "m1"))
+    store.save_roadmap(reordered)
+    recs = CourseRecommendations(
+        user_id="u1",
+        items=[CourseItem(provider="youtube", course_id="c1", title="t", url="u")] * 2,  # ids not unique
+    )
+    store.save_course_recommendations(recs)
+    store.flush()
+    assert store.write_stats()["delta_writes"] == 1
+    stored = local_doc(store, "roadmaps", "u1")
+    assert set(stored["milestones"]) == {"m1", "m3"} and stored["milestones_order"] == ["m3", "m1"]
+
+    store = FirestoreClient(backend=SQLiteBackend(tmp_path / "docs.sqlite"))
+    assert store.get_roadmap("u1") == reordered
+    assert store.get_course_recommendations("u1") == recs
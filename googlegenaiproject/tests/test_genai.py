@@ -0,0 +1,69 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.genai import LLMClient
+
+
+class FakeModel:
+    def __init__(self, name, failures=0, error="429 Resource exhausted"):
+        self.name = name
+        self.failures = failures
+        self.error = error
+        self.calls = 0
+
+    def generate_content(self, prompt, **kwargs):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise RuntimeError(self.error)
+        usage = SimpleNamespace(prompt_token_count=12, candidates_token_count=5)
+        return SimpleNamespace(text=f"echo: {prompt}", usage_metadata=usage)
+
+
+def make_client(**model_kwargs):
+    created = []
+
+    def factory(name):
+        model = FakeModel(name, **model_kwargs)
+        created.append(model)
+        return model
+
+    sleeps = []
+    client = LLMClient(api_key="k", max_retries=3, backoff_base=1.0, model_factory=factory, sleep=sleeps.append)
+    return client, created, sleeps
+
+
+def test_model_handles_are_reused_across_name_variants():
+    client, created, _ = make_client()
+    client.generate("a", model="gemini-2.0-flash", agent="quiz")
+    client.generate("b", model="models/gemini-2.0-flash", agent="market")
+    assert len(created) == 1
+    assert created[0].name == "models/gemini-2.0-flash"
+
+
+def test_transient_errors_retry_with_bounded_jittered_backoff():
+    client, created, sleeps = make_client(failures=2)
+    text = client.generate("hi", agent="quiz")
+    assert text == "echo: hi"
+    assert created[0].calls == 3
+    assert len(sleeps) == 2
+    assert 0 <= sleeps[0] <= 1.0 and 0 <= sleeps[1] <= 2.0
+    stats = client.stats()["quiz"]
+    assert stats["retries"] == 2 and stats["errors"] == 2 and stats["calls"] == 3
+    assert stats["prompt_tokens"] == 12 and stats["completion_tokens"] == 5
+
+
+def test_non_transient_errors_are_not_retried():
+    client, created, sleeps = make_client(failures=1, error="400 invalid argument")
+    with pytest.raises(RuntimeError):
+        client.generate("hi", agent="roadmap")
+    assert created[0].calls == 1
+    assert sleeps == []
+
+
+def test_bound_model_is_a_drop_in_for_generate_content():
+    client, _, _ = make_client()
+    model = client.for_agent("enrichment", "models/gemini-pro-latest")
+    response = model.generate_content("x")
+    assert response.text == "echo: x"
+    assert client.stats()["enrichment"]["calls"] == 1
@@ -0,0 +1,58 @@
+import threading
+import time
+
+import pytest
+
+from app.jobs import JobQueue, QueueFull, new_job_id
+
+
+def wait_for(job, timeout=5):
+    return job.future.result(timeout=timeout)
+
+
+def test_queue_rejects_when_full_and_bounds_concurrency():
+    release = threading.Event()
+    running = []
+
+    def slow():
+        running.append(1)
+        release.wait(5)
+        return "ok"
+
+    q = JobQueue(workers=1, max_depth=2)
+    first = q.submit("t", slow)
+    while not running:
+        time.sleep(0.01)
+    queued = [q.submit("t", slow), q.submit("t", slow)]
+    with pytest.raises(QueueFull):
+        q.submit("t", slow)
+    assert q.metrics()["busy"] == 1 and q.metrics()["depth"] == 2 and q.metrics()["rejected"] == 1
+    release.set()
+    assert [wait_for(j) for j in [first, *queued]] == ["ok", "ok", "ok"]
+
+
+def test_job_status_result_and_metrics():
+    q = JobQueue(workers=2, max_depth=4)
+    ok = q.submit("agent", lambda: {"x": 1}, agent="quiz")
+    bad = q.submit("agent", lambda: 1 / 0)
+    assert wait_for(ok) == {"x": 1}
+    with pytest.raises(RuntimeError):
+        wait_for(bad)
+    info = q.get(ok.id).to_dict()
+    assert info["status"] == "done" and info["agent"] == "quiz" and info["run_s"] >= 0
+    assert q.get(bad.id).status == "failed" and "ZeroDivisionError" in q.get(bad.id).error
+    m = q.metrics()
+    assert m["jobs"] == {"done": 1, "failed": 1}
+    assert m["queue_wait_s"]["count"] == 2 and m["run_s"]["count"] == 2
+
+
+def test_job_id_can_be_reserved_before_submitting():
+    job_id = new_job_id()
+    q = JobQueue(workers=1, max_depth=1)
+    release = threading.Event()
+    job = q.submit("pipeline", lambda: release.wait(5) and "ok", job_id=job_id, run_id="r1")
+    assert q.has_active("pipeline", "r1") and not q.has_active("pipeline", "r2")
+    release.set()
+    assert job.id == job_id and q.get(job_id).meta == {"run_id": "r1"}
+    assert wait_for(job) == "ok"
+    assert not q.has_active("pipeline", "r1")
@@ -0,0 +1,57 @@
+import json
+
+from app.agents import roadmap
+from app.json_stream import JSONArrayStreamParser
+
+
+def feed_all(parser, text, size):
+    out = []
+    for i in range(0, len(text), size):
+        out.extend(parser.feed(text[i:i + size]))
+    return out
+
+
+def test_parser_emits_each_week_as_it_closes_across_chunk_boundaries():
+    weeks = [{"week": i, "focus": f"topic {i} with {{braces}} and \"quotes\"", "resources": ["a", "b"]} for i in range(1, 4)]
+    text = "```json\n" + json.dumps({"roadmap": weeks}, indent=2) + "\n```"
+    for size in (1, 7, len(text)):
+        parser = JSONArrayStreamParser()
+        assert feed_all(parser, text, size) == weeks
+        assert parser.complete
+
+
+def test_parser_keeps_completed_weeks_from_truncated_or_malformed_tail():
+    text = '{"roadmap": [{"week": 1, "focus": "a",}, {"week": 2, "focus": "b"}, {"week": 3, "foc'
+    parser = JSONArrayStreamParser()
+    assert [w["week"] for w in feed_all(parser, text, 5)] == [1, 2]
+    assert not parser.complete
+
+
+def test_roadmap_requests_only_missing_weeks_after_truncated_stream(monkeypatch):
+    first = '{"roadmap": [' + ", ".join(json.dumps({"week": i, "focus": "x"}) for i in range(1, 6)) + ', {"week": 6'
+    rest = json.dumps({"roadmap": [{"week": i, "focus": "y"} for i in range(6, 9)]})
+    prompts = []
+
+    def fake_stream(prompt):
+        prompts.append(prompt)
+        text = first if len(prompts) == 1 else rest
+        return iter([text[i:i + 16] for i in range(0, len(text), 16)])
+
+    monkeypatch.setattr(roadmap, "stream_llm", fake_stream)
+    result = roadmap.generate_roadmap_content({"gaps": []}, {"advice": []})
+
+    assert [w["week"] for w in result["roadmap"]] == list(range(1, 9))
+    assert len(prompts) == 2 and "ONLY weeks 6-8" in prompts[1]
+
+
+def test_parser_skips_braces_in_chatter_around_the_payload():
+    weeks = [{"week": 1, "focus": "a"}, {"week": 2, "focus": "b"}]
+    text = (
+        "Sure! Here is {your} plan [1], with a [draft] first:\n```json\n"
+        + json.dumps({"roadmap": weeks})
+        + "\n```\nLet me know if {week 3} should cover [{\"week\": 3}] too."
+    )
+    for size in (1, 5, len(text)):
+        parser = JSONArrayStreamParser()
+        assert feed_all(parser, text, size) == weeks
+        assert parser.complete and parser.skipped == 0
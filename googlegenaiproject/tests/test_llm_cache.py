@@ -0,0 +1,80 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app.genai import LLMClient
+from app.llm_cache import FAKE_START_DATE, FakeBackend, ResponseStore
+
+
+class CountingModel:
+    def __init__(self, name):
+        self.calls = 0
+
+    def generate_content(self, prompt, **kwargs):
+        self.calls += 1
+        usage = SimpleNamespace(prompt_token_count=3, candidates_token_count=2)
+        return SimpleNamespace(text=f"live:{prompt}", usage_metadata=usage)
+
+
+def make_client(tmp_path, mode):
+    models = []
+
+    def factory(name):
+        models.append(CountingModel(name))
+        return models[-1]
+
+    client = LLMClient(
+        api_key="k",
+        model_factory=factory,
+        cache_mode=mode,
+        response_store=ResponseStore(tmp_path),
+        fake_backend=FakeBackend(latency_s=0),
+    )
+    return client, models
+
+
+def test_record_then_replay_serves_identical_text_without_live_calls(tmp_path):
+    recorder, live = make_client(tmp_path, "record")
+    assert recorder.generate("p1", model="gemini-2.0-flash", agent="quiz") == "live:p1"
+
+    replayer, replay_models = make_client(tmp_path, "replay")
+    assert replayer.generate("p1", model="models/gemini-2.0-flash", agent="quiz") == "live:p1"
+    assert replay_models == []
+    assert replayer.stats()["quiz"]["cache_hits"] == 1
+
+
+def test_replay_miss_raises_and_params_are_part_of_the_key(tmp_path):
+    recorder, _ = make_client(tmp_path, "record")
+    recorder.generate("p1", agent="quiz", generation_config={"temperature": 0})
+    replayer, _ = make_client(tmp_path, "replay")
+    with pytest.raises(LookupError):
+        replayer.generate("p1", agent="quiz", generation_config={"temperature": 1})
+
+
+def test_cache_mode_calls_live_once_per_identical_prompt(tmp_path):
+    client, models = make_client(tmp_path, "cache")
+    client.generate("same", agent="market")
+    client.generate("same", agent="market")
+    assert models[0].calls == 1
+
+
+def test_fake_mode_is_deterministic_and_schema_shaped(tmp_path):
+    client, models = make_client(tmp_path, "fake")
+    first = json.loads(client.generate("roadmap prompt", agent="roadmap"))
+    second = json.loads(client.generate("roadmap prompt", agent="roadmap"))
+    assert first == second
+    assert len(first["roadmap"]) == 8
+    assert {"week", "start_date", "focus", "resources", "outcome"} <= set(first["roadmap"][0])
+    assert first["roadmap"][0]["start_date"] == FAKE_START_DATE.isoformat()  # not today's date
+    quiz = json.loads(client.generate("quiz prompt", agent="quiz"))
+    assert set(quiz["per_question"]) == {str(i) for i in range(1, 11)}
+    assert models == []
+
+
+def test_failed_store_write_leaves_no_temp_file(tmp_path):
+    store = ResponseStore(tmp_path)
+    response = SimpleNamespace(text=object(), usage_metadata=None)  # not JSON serializable
+    with pytest.raises(TypeError):
+        store.put("abcdef", "m", "a", response)
+    assert list(tmp_path.rglob("*")) == [tmp_path / "ab"]
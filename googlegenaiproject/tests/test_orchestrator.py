@@ -0,0 +1,152 @@
+import asyncio
+import time
+
+import pytest
+
+from app.agents.courses import CourseRecommenderAgent
+from app.integrations.local_courses import CourseraAPI, YouTubeAPI
+from app.orchestrator import AsyncOrchestrator, Orchestrator
+from app.schemas import MentorSummary, PCP, ResumeProfile, Roadmap, RoadmapMilestone, SkillGraph
+
+DELAY = 0.05
+
+
+def make_pcp(user_id):
+    return PCP(
+        user_id=user_id,
+        target_roles=["data analyst"],
+        domains=["fintech"],
+        weekly_time_hours=8,
+        budget_usd=100.0,
+        learning_style="video",
+        confidence_by_cluster={"python": 0.5},
+    )
+
+
+class SlowCoursera(CourseraAPI):
+    def search_courses(self, skills):
+        time.sleep(DELAY)
+        return super().search_courses(skills)
+
+
+class SlowYouTube(YouTubeAPI):
+    def search_videos(self, skills):
+        time.sleep(DELAY)
+        return super().search_videos(skills)
+
+
+class SlowUdemy:
+    def search_courses(self, skills):
+        time.sleep(DELAY)
+        return []
+
+
+class FakeQuiz:
+    def simulate_quiz(self, user_id, resume_profile):
+        time.sleep(DELAY)
+        return make_pcp(user_id)
+
+
+class FakeRoadmap:
+    def generate(self, pcp, graph):
+        time.sleep(DELAY)
+        milestones = [RoadmapMilestone(id=f"m{i}", title=f"t{i}", description="d", skills=["python", "sql"]) for i in (1, 2, 3)]
+        return Roadmap(user_id=pcp.user_id, milestones=milestones, total_estimate_weeks=3)
+
+    def attach_resources(self, roadmap, resource_map):
+        milestones = [m.model_copy(update={"resources": resource_map.get(m.id, [])}) for m in roadmap.milestones]
+        return roadmap.model_copy(update={"milestones": milestones, "version": roadmap.version + 1})
+
+
+class FakeMentor:
+    def schedule_checkins(self, user_id, roadmap):
+        time.sleep(DELAY)
+        return MentorSummary(user_id=user_id, week=1, progress_by_milestone={m.id: 0.0 for m in roadmap.milestones})
+
+
+class FakeStore:
+    def __init__(self, fail=None):
+        self.writes = []
+        self.fail = fail
+        self.flushes = 0
+
+    def flush(self):
+        self.flushes += 1
+
+    def _write(self, key, data):
+        time.sleep(DELAY)
+        if key == self.fail:
+            raise RuntimeError(f"write to {key} failed")
+        self.writes.append((key, data))
+
+    def save_pcp(self, pcp):
+        self._write(f"pcps/{pcp.user_id}", pcp)
+
+    def save_roadmap(self, roadmap):
+        self._write(f"roadmaps/{roadmap.user_id}", roadmap)
+
+    def save_course_recommendations(self, recs):
+        self._write(f"recommendations/{recs.user_id}", recs)
+
+    def save_mentor_summary(self, summary):
+        self._write(f"mentor/{summary.user_id}", summary)
+
+
+def agents():
+    return dict(
+        resume_agent=None,
+        quiz_agent=FakeQuiz(),
+        roadmap_agent=FakeRoadmap(),
+        market_agent=None,
+        course_agent=CourseRecommenderAgent(SlowCoursera(), SlowYouTube(), SlowUdemy()),
+        mentor_agent=FakeMentor(),
+    )
+
+
+def test_async_quiz_complete_matches_sync_and_overlaps_io():
+    profile, graph = ResumeProfile(user_id="u1"), SkillGraph()
+    sync_store, async_store = FakeStore(), FakeStore()
+
+    start = time.perf_counter()
+    expected = Orchestrator(sync_store, **agents()).handle_quiz_complete("u1", profile, graph)
+    sync_s = time.perf_counter() - start
+
+    orch = AsyncOrchestrator(async_store, **agents())
+    start = time.perf_counter()
+    result = asyncio.run(orch.handle_quiz_complete("u1", profile, graph))
+    async_s = time.perf_counter() - start
+
+    assert result == expected
+    assert sorted(k for k, _ in async_store.writes) == sorted(k for k, _ in sync_store.writes)
+    # the roadmap with resources attached is saved last, whatever the timing
+    roadmaps = [data for key, data in async_store.writes if key == "roadmaps/u1"]
+    assert [r.version for r in roadmaps] == [1, 2]
+    # sync: 11 sleeps; async critical path: quiz -> roadmap -> courses -> 2 roadmap saves
+    assert async_s < sync_s * 0.7
+
+    handler, report = orch.reports[-1]
+    assert handler == "quiz_complete"
+    assert all(r.status == "ok" for r in report.stages.values())
+    assert report.deps["save_roadmap"] == {"attach_resources", "save_roadmap_draft"}
+    assert report.critical_path()[:3] == ["quiz", "roadmap", "courses"]
+    assert report.stages["flush"].status == "ok" and async_store.flushes == sync_store.flushes == 1
+    assert report.wall_s < sum(r.duration_s for r in report.stages.values())
+
+
+def test_failed_save_is_raised_after_other_writes_finish():
+    store = FakeStore(fail="pcps/u1")
+    orch = AsyncOrchestrator(store, **agents())
+    with pytest.raises(RuntimeError, match="pcps/u1"):
+        asyncio.run(orch.handle_quiz_complete("u1", ResumeProfile(user_id="u1"), SkillGraph()))
+    assert {k for k, _ in store.writes} == {"roadmaps/u1", "recommendations/u1", "mentor/u1"}
+    report = orch.reports[-1][1]
+    assert report.stages["save_pcp"].status == "failed"
+
+
+def test_arecommend_matches_recommend():
+    agent = CourseRecommenderAgent(SlowCoursera(), SlowYouTube(), SlowUdemy())
+    roadmap = FakeRoadmap().generate(make_pcp("u"), SkillGraph())
+    start = time.perf_counter()
+    recs = asyncio.run(agent.arecommend(make_pcp("u"), SkillGraph(), roadmap))
+    assert time.perf_counter() - start < 3 * DELAY
+    assert recs == agent.recommend(make_pcp("u"), SkillGraph(), roadmap)
@@ -0,0 +1,77 @@
+import gzip
+import json
+import os
+
+from starlette.applications import Starlette
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.output_cache import OutputCache, respond
+
+
+def make_client(tmp_path):
+    cache = OutputCache()
+
+    async def get_file(request):
+        return respond(request, cache.file(tmp_path / request.path_params["name"]))
+
+    async def listing(request):
+        return respond(request, cache.listing(tmp_path, "r1"))
+
+    app = Starlette(routes=[Route("/files", listing), Route("/files/{name}", get_file)])
+    return cache, TestClient(app)
+
+
+def test_unchanged_file_is_parsed_once_and_revalidates_with_304(tmp_path):
+    (tmp_path / "roadmap.json").write_text(json.dumps({"roadmap": [{"week": 1}]}, indent=2))
+    cache, client = make_client(tmp_path)
+    first = client.get("/files/roadmap.json")
+    assert first.json() == {"roadmap": [{"week": 1}]}
+    etag = first.headers["etag"]
+    assert first.headers["last-modified"]
+    again = client.get("/files/roadmap.json", headers={"If-None-Match": etag})
+    assert again.status_code == 304 and again.content == b""
+    assert cache.loads == 1 and cache.hits == 1
+
+
+def test_changed_file_gets_new_etag(tmp_path):
+    path = tmp_path / "quiz.json"
+    path.write_text('{"a": 1}')
+    cache, client = make_client(tmp_path)
+    etag = client.get("/files/quiz.json").headers["etag"]
+    path.write_text('{"a": 22}')
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    resp = client.get("/files/quiz.json", headers={"If-None-Match": etag})
+    assert resp.status_code == 200 and resp.json() == {"a": 22} and resp.headers["etag"] != etag
+
+
+def test_large_body_is_gzipped_when_accepted(tmp_path):
+    (tmp_path / "big.json").write_text(json.dumps({"items": ["skill"] * 2000}))
+    cache, client = make_client(tmp_path)
+    resp = client.get("/files/big.json", headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["content-encoding"] == "gzip"
+    assert resp.json() == {"items": ["skill"] * 2000}  # client transparently decodes
+    raw = cache.file(tmp_path / "big.json")
+    assert len(raw.gzipped()) < len(raw.body)
+    assert json.loads(gzip.decompress(raw.gzipped())) == {"items": ["skill"] * 2000}
+
+
+def test_gzip_has_its_own_etag_and_respects_q_zero(tmp_path):
+    (tmp_path / "big.json").write_text(json.dumps({"items": ["skill"] * 2000}))
+    _, client = make_client(tmp_path)
+    gzipped = client.get("/files/big.json", headers={"Accept-Encoding": "gzip, deflate"})
+    plain = client.get("/files/big.json", headers={"Accept-Encoding": "gzip;q=0, identity"})
+    assert "content-encoding" not in plain.headers
+    assert gzipped.headers["etag"] == plain.headers["etag"][:-1] + '-gz"'
+    assert "content-encoding" not in client.get("/files/big.json", headers={"Accept-Encoding": "*;q=0.5, gzip;q=0"}).headers
+    assert client.get("/files/big.json", headers={"Accept-Encoding": "br, *"}).headers["content-encoding"] == "gzip"
+    again = client.get("/files/big.json", headers={"Accept-Encoding": "gzip", "If-None-Match": gzipped.headers["etag"]})
+    assert again.status_code == 304 and again.headers["etag"] == gzipped.headers["etag"]
+
+
+def test_listing_skips_temp_files(tmp_path):
+    (tmp_path / "a.json").write_text("{}")
+    (tmp_path / ".a.json123.tmp").write_text("")
+    _, client = make_client(tmp_path)
+    assert client.get("/files").json() == {"run_id": "r1", "outputs": [{"name": "a.json", "path": str(tmp_path / "a.json")}]}
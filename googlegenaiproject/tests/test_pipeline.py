@@ -0,0 +1,84 @@
+import threading
+import time
+
+import pytest
+
+from app import workspace
+from app.agents import registry
+from app.agents.registry import AgentRunner, AgentSpec
+from app.pipeline import PipelineExecutor, build_graph
+
+
+def register(monkeypatch, tmp_path, name, inputs, output, fn=None):
+    def agent():
+        if fn:
+            fn()
+        (tmp_path / output).write_text("{}")
+
+    monkeypatch.setitem(registry.AGENTS, name, AgentSpec(name, "app.agents.registry", f"_agent_{name}", (output,), inputs))
+    monkeypatch.setattr(registry, f"_agent_{name}", agent, raising=False)
+
+
+@pytest.fixture
+def outputs(tmp_path, monkeypatch):
+    monkeypatch.setattr(workspace, "OUTPUTS_DIR", tmp_path)
+    return tmp_path
+
+
+def test_graph_follows_declared_files():
+    deps = build_graph([registry.AGENTS[n] for n in ("roadmap", "market", "mentor", "skillgap", "quiz", "resume")])
+    assert deps["skillgap"] == {"resume", "quiz"}
+    assert deps["market"] == {"skillgap"}
+    assert "mentor" not in deps["market"]
+    assert list(deps).index("roadmap") > list(deps).index("mentor")
+
+
+def test_independent_stages_run_concurrently(monkeypatch, outputs):
+    barrier = threading.Barrier(2, timeout=5)
+    register(monkeypatch, outputs, "a", (), "a.json", barrier.wait)
+    register(monkeypatch, outputs, "b", (), "b.json", barrier.wait)
+    register(monkeypatch, outputs, "c", ("a.json", "b.json"), "c.json")
+    runner = AgentRunner(mode="inprocess", workers=3)
+    try:
+        report = PipelineExecutor(runner, ["c", "a", "b"]).run()
+    finally:
+        runner.shutdown()
+    assert report.ok
+    assert report.stages["c"].start_s >= max(report.stages["a"].duration_s, report.stages["b"].duration_s) - 0.05
+    assert report.critical_path()[-1] == "c"
+
+
+def test_failure_skips_downstream_only(monkeypatch, outputs):
+    def boom():
+        raise ValueError("no resume")
+
+    register(monkeypatch, outputs, "a", (), "a.json", boom)
+    register(monkeypatch, outputs, "b", (), "b.json", lambda: time.sleep(0.01))
+    register(monkeypatch, outputs, "c", ("a.json",), "c.json")
+    register(monkeypatch, outputs, "d", ("c.json",), "d.json")
+    runner = AgentRunner(mode="inprocess", workers=2)
+    try:
+        report = PipelineExecutor(runner, ["a", "b", "c", "d"]).run()
+    finally:
+        runner.shutdown()
+    statuses = {n: r.status for n, r in report.stages.items()}
+    assert statuses == {"a": "failed", "b": "ok", "c": "skipped", "d": "skipped"}
+    assert not (outputs / "c.json").exists()
+    assert "no resume" in report.format()
+
+
+def test_missing_output_counts_as_failure(monkeypatch, outputs):
+    monkeypatch.setitem(registry.AGENTS, "quiet", AgentSpec("quiet", "app.agents.registry", "_agent_quiet", ("quiet.json",)))
+    monkeypatch.setattr(registry, "_agent_quiet", lambda: None, raising=False)
+    runner = AgentRunner(mode="inprocess", workers=1)
+    try:
+        report = PipelineExecutor(runner, ["quiet"]).run()
+    finally:
+        runner.shutdown()
+    assert report.stages["quiet"].status == "failed"
+
+
+def test_cycle_is_rejected():
+    specs = [AgentSpec("x", "m", "f", ("x.json",), ("y.json",)), AgentSpec("y", "m", "f", ("y.json",), ("x.json",))]
+    with pytest.raises(ValueError, match="cycle"):
+        build_graph(specs)
@@ -0,0 +1,33 @@
+from app import prompting
+from app.agents import quiz
+from app.prompting import PromptBudget, PromptBuilder, compact_json, count_tokens
+
+
+def test_compact_json_has_no_whitespace_padding():
+    assert compact_json({"a": [1, 2], "b": "x y"}) == '{"a":[1,2],"b":"x y"}'
+
+
+def test_builder_trims_lowest_priority_section_first_and_keeps_required_text():
+    builder = PromptBuilder("roadmap", budget=PromptBudget(input_tokens=60, output_tokens=100))
+    builder.text("Instructions that must survive.")
+    builder.data("GAPS", {"skills": ["sql", "docker", "mlops"], "timestamp": "2025-11-02"}, priority=1,
+                 optional_keys=("timestamp",))
+    builder.data("MENTOR", {"advice": ["practice " * 10] * 6}, priority=2)
+    prompt = builder.build()
+
+    assert count_tokens(prompt) <= 60
+    assert prompt.startswith("Instructions that must survive.")
+    assert '"skills":["sql","docker","mlops"]' in prompt
+    assert builder.trimmed[0].startswith("MENTOR")
+
+
+def test_quiz_prompt_renders_only_the_chosen_options():
+    prompt = quiz._build_prompt("u1", {"1": "c", "2": "a", "10": "1200000"})
+    assert "Join a high-growth startup" in prompt
+    assert "Find the highest-paying job" not in prompt
+    assert "-> 1200000" in prompt
+
+
+def test_count_tokens_falls_back_without_encoding(monkeypatch):
+    monkeypatch.setattr(prompting, "_get_encoding", lambda: None)
+    assert count_tokens("x" * 40) == 10
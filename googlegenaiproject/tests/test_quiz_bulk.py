@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+from app.agents import quiz
+
+TABLE_HIT = {"1": "c", "2": "a", "3": "a", "4": "b", "5": "a", "6": "b", "7": "b", "8": "a", "9": "a", "10": "400000"}
+OFF_TABLE = {**TABLE_HIT, "1": ""}  # unanswered question -> needs the LLM
+
+
+def report_for(user_id, **overrides):
+    item = {"user_id": user_id, "score_percent": 70, "per_question": {}, "persona": "P", "summary": "s",
+            "recommendations": ["r"]}
+    item.update(overrides)
+    return item
+
+
+def test_bulk_packs_users_and_retries_only_failed_ones(monkeypatch, tmp_path):
+    prompts = []
+
+    def fake_call(prompt):
+        prompts.append(prompt)
+        users = [line.split(":")[0] for line in prompt.splitlines() if ": 1=" in line]
+        if len(prompts) == 1:
+            # u2 missing, u3 invalid, output truncated mid-u4
+            items = [report_for("u1"), report_for("u3", per_question="bad")]
+            return json.dumps(items)[:-1] + ', {"user_id": "u4", "score'
+        return json.dumps([report_for(u) for u in users])
+
+    monkeypatch.setattr(quiz, "_llm_enabled", lambda: True)
+    monkeypatch.setattr(quiz, "_call_gemini_bulk", fake_call)
+
+    cohort = tmp_path / "cohort.ndjson"
+    lines = [{"user_id": "hit", "answers": TABLE_HIT}] + [{"user_id": f"u{i}", "answers": OFF_TABLE} for i in range(1, 5)]
+    lines.append({"user_id": "hit", "answers": OFF_TABLE})  # duplicate: skipped, first answers kept
+    cohort.write_text("\n".join(json.dumps(x) for x in lines) + "\nnot json\n", encoding="utf-8")
+    out = tmp_path / "out.ndjson"
+    quiz.run_quiz_bulk(str(cohort), str(out))
+
+    rows = [json.loads(line) for line in out.read_text(encoding="utf-8").splitlines()]
+    assert [r["user_id"] for r in rows] == ["hit", "u1", "u2", "u3", "u4"]
+    # table hits get exactly what evaluate_quiz returns for the same answers
+    assert rows[0]["report"] == quiz.evaluate_quiz("hit", TABLE_HIT) and rows[0]["report"]["source"] == "table"
+    assert all(r["report"]["source"] == "llm_bulk" for r in rows[1:])
+    assert len(prompts) == 2
+    assert "hit:" not in prompts[0] and "u1:" not in prompts[1]
+    assert {"u2:", "u3:", "u4:"} <= {line.split()[0] for line in prompts[1].splitlines() if line}
+
+
+def test_pack_batches_respects_output_budget():
+    users = [(f"user{i}", OFF_TABLE) for i in range(100)]
+    batches = quiz._pack_batches(users, quiz._bulk_header())
+    per_batch = quiz.budget_for("quiz_bulk").output_tokens // quiz.BULK_OUTPUT_TOKENS_PER_USER
+    assert sum(len(b) for b in batches) == 100
+    assert max(len(b) for b in batches) == per_batch
+
+
+def test_bulk_rejects_duplicate_user_ids():
+    with pytest.raises(ValueError, match="u1"):
+        quiz.evaluate_quiz_bulk([("u1", TABLE_HIT), ("u2", TABLE_HIT), ("u1", OFF_TABLE)])
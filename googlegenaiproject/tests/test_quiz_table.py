@@ -0,0 +1,54 @@
+from app import quiz_table
+from app.agents.quiz import QUIZ_QUESTIONS, evaluate_quiz
+from app.quiz_table import PERSONA_QUESTIONS, QuizPersonaTable, build_table, salary_bucket
+
+SAMPLE = {"1": "c", "2": "a", "3": "a", "4": "b", "5": "a", "6": "b", "7": "b", "8": "a", "9": "a", "10": "400000"}
+
+
+def test_cluster_index_matches_answer_vector():
+    # Echo the persona answers back so every cluster entry is distinct and checkable
+    def echo(questions, answers):
+        return {"persona": "".join(answers[q] for q in PERSONA_QUESTIONS), "summary": ""}
+
+    base = build_table(QUIZ_QUESTIONS, use_llm=False)
+    personas, index = quiz_table._build_clusters(QUIZ_QUESTIONS, PERSONA_QUESTIONS, base["options"], echo, 2)
+    table = QuizPersonaTable({**base, "personas": personas, "persona_index": index})
+
+    assert len(index) == 5 * 4 * 3 * 4
+    assert table.lookup(SAMPLE)["persona"] == "caab"
+    assert table.lookup({**SAMPLE, "1": "e", "7": "d"})["persona"] == "eaad"
+
+
+def test_lookup_report_shape_and_off_table_answers():
+    table = QuizPersonaTable(build_table(QUIZ_QUESTIONS, use_llm=False))
+    report = table.lookup(SAMPLE)
+    assert set(report["per_question"]) == {str(i) for i in range(1, 11)}
+    assert report["persona"] == "Startup Builder"
+    assert report["per_question"]["10"]["score"] == 5
+    assert table.lookup({**SAMPLE, "2": "z"}) is None
+    assert salary_bucket("25,00,000") == "high" and salary_bucket("n/a") == "unknown"
+
+
+def test_evaluate_quiz_answers_from_the_table_without_llm(monkeypatch):
+    monkeypatch.setattr("app.agents.quiz._llm_enabled", lambda: False)
+    monkeypatch.setattr("app.agents.quiz._call_gemini", lambda *a, **k: (_ for _ in ()).throw(AssertionError("LLM called")))
+    report = evaluate_quiz("u1", SAMPLE)
+    assert report["source"] == "table"
+
+
+def test_table_answers_even_with_the_llm_and_personalization_is_opt_in(monkeypatch):
+    calls = []
+
+    def fake_gemini(prompt, *args, **kwargs):
+        calls.append(prompt)
+        return "A warm, personal summary."
+
+    monkeypatch.setattr("app.agents.quiz._llm_enabled", lambda: True)
+    monkeypatch.setattr("app.agents.quiz._call_gemini", fake_gemini)
+    rules = QuizPersonaTable(build_table(QUIZ_QUESTIONS, use_llm=False))
+    monkeypatch.setattr("app.agents.quiz.get_table", lambda: rules)
+    assert evaluate_quiz("u1", SAMPLE) == rules.lookup(SAMPLE) and calls == []
+
+    monkeypatch.setattr("app.agents.quiz.PERSONALIZE", True)
+    report = evaluate_quiz("u1", SAMPLE)
+    assert report["source"] == "table+llm" and report["summary"] == "A warm, personal summary." and len(calls) == 1
@@ -0,0 +1,133 @@
+from app.ratelimit import SharedQuotaLimiter, TokenBucketLimiter, quota_run
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_rpm_bucket_spaces_requests_after_burst():
+    clock = FakeClock()
+    limiter = TokenBucketLimiter(rpm=60, clock=clock, sleep=clock.sleep)
+    for _ in range(60):
+        assert limiter.acquire() == 0
+    # Bucket drained: the next request waits for one refill interval (1s at 60 rpm)
+    waited = limiter.acquire()
+    assert abs(waited - 1.0) < 1e-9
+    assert abs(clock.now - 1.0) < 1e-9
+
+
+def test_tpm_bucket_blocks_on_tokens_and_settles_actual_usage():
+    clock = FakeClock()
+    limiter = TokenBucketLimiter(rpm=1000, tpm=6000, clock=clock, sleep=clock.sleep)
+    limiter.acquire(6000)
+    # Only 100 tokens were really used, so 5900 are credited back
+    limiter.settle(reserved=6000, actual=100)
+    assert limiter.acquire(5000) == 0
+    # 900 left; 1000 more needed at 100 tokens/s
+    waited = limiter.acquire(1900)
+    assert abs(waited - 10.0) < 1e-9
+
+
+def test_pause_holds_even_when_the_request_bucket_is_low():
+    clock = FakeClock()
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        clock.sleep(seconds)
+
+    limiter = TokenBucketLimiter(rpm=60, clock=clock, sleep=sleep)
+    for _ in range(60):
+        limiter.acquire()
+    clock.now += 0.5  # half a request refilled
+    limiter.pause(30.0)
+    assert abs(limiter.acquire() - 30.0) < 1e-9
+    assert len(sleeps) == 1  # one wait for the pause, not a short one for the bucket first
+
+
+def shared(tmp_path, clock, run_id, **kwargs):
+    return SharedQuotaLimiter(tmp_path / "quota.sqlite", run_id=run_id, clock=clock, sleep=clock.sleep, **kwargs)
+
+
+def test_shared_bucket_is_one_quota_across_limiter_instances(tmp_path):
+    clock = FakeClock()
+    a = shared(tmp_path, clock, "run-a", rpm=2)
+    b = shared(tmp_path, clock, "run-b", rpm=2)
+    assert a.acquire() == 0
+    assert b.acquire() == 0
+    # Two requests used the shared 2 rpm bucket: the third waits ~30s for a refill
+    assert abs(a.acquire() - 30.0) < 1.0
+    assert {row["run_id"]: row["grants"] for row in a.report()} == {"run-a": 2, "run-b": 1}
+
+
+def test_one_process_limiter_charges_each_waiter_to_its_active_run(tmp_path):
+    clock = FakeClock()
+    limiter = shared(tmp_path, clock, None, rpm=60)
+    with quota_run("run-a"):
+        limiter.acquire()
+        limiter.acquire()
+    with quota_run("run-b"):
+        limiter.acquire()
+    limiter.acquire()
+    grants = {row["run_id"]: row["grants"] for row in limiter.report()}
+    assert grants == {"run-a": 2, "run-b": 1, limiter.run_id: 1}
+
+
+def test_pause_after_429_holds_back_other_processes(tmp_path):
+    clock = FakeClock()
+    a = shared(tmp_path, clock, "run-a", rpm=100)
+    b = shared(tmp_path, clock, "run-b", rpm=100)
+    a.pause(5.0)
+    assert b.acquire() >= 5.0
+    assert b.report()[0]["max_wait_s"] >= 5.0
+
+
+def test_queue_serves_least_recently_served_run_first(tmp_path):
+    clock = FakeClock()
+    busy = shared(tmp_path, clock, "busy", rpm=100)
+    busy.acquire()
+    clock.now += 1
+    with busy._transaction() as db:
+        for run_id in ("busy", "busy", "quiet"):
+            db.execute("INSERT INTO queue (run_id, enqueued, heartbeat) VALUES (?, ?, ?)", (run_id, clock.now, clock.now))
+        head = busy._head(db, clock.now)
+        assert db.execute("SELECT run_id FROM queue WHERE ticket = ?", (head,)).fetchone()[0] == "quiet"
+
+
+def test_waiters_behind_the_head_poll_without_the_write_lock(tmp_path, monkeypatch):
+    clock = FakeClock()
+    limiter = shared(tmp_path, clock, "waiter", rpm=100)
+    with limiter._transaction() as db:  # another process's ticket holds the head for 5s
+        blocker = db.execute(
+            "INSERT INTO queue (run_id, enqueued, heartbeat) VALUES ('other', 0, 0)"
+        ).lastrowid
+    locks = []
+    transaction = limiter._transaction
+    monkeypatch.setattr(limiter, "_transaction", lambda: locks.append(1) or transaction())
+
+    def sleep(seconds):
+        clock.sleep(seconds)
+        if clock.now >= 5.0:
+            limiter._conn().execute("DELETE FROM queue WHERE ticket = ?", (blocker,))
+
+    limiter._sleep = sleep
+    assert abs(limiter.acquire() - 5.0) < 0.1
+    # enqueue + grant, no per-poll write transactions over ~100 polls
+    assert len(locks) == 2
+
+
+def test_idle_runs_are_pruned_from_the_stats_table(tmp_path):
+    clock = FakeClock()
+    old = shared(tmp_path, clock, "old-run", rpm=100, run_ttl_s=3600)
+    old.acquire()
+    clock.now += 7200
+    fresh = shared(tmp_path, clock, "new-run", rpm=100, run_ttl_s=3600)
+    fresh.acquire()
+    assert [row["run_id"] for row in fresh.report()] == ["new-run"]
@@ -0,0 +1,79 @@
+import time
+from types import SimpleNamespace
+
+from app.genai import LLMClient, is_transient_error, normalize_model_name
+from app.llm_cache import FakeBackend
+from app.routing import ModelRouter, parse_routes
+
+
+def make_router(**kwargs):
+    kwargs.setdefault("alternates", {"quiz": ["fast"]})
+    return ModelRouter(normalize=normalize_model_name, retryable=is_transient_error, min_samples=3, **kwargs)
+
+
+def fake_client(router, latencies):
+    backend = FakeBackend(latency_s=0.0, jitter=0.0, model_latency_s=latencies, sleep=time.sleep)
+    return LLMClient(api_key="k", cache_mode="fake", fake_backend=backend, router=router)
+
+
+def test_slow_primary_is_hedged_and_the_fast_model_wins():
+    router = make_router(hedge_after_s=0.05)
+    client = fake_client(router, {"models/slow": 0.6, "models/fast": 0.01})
+
+    start = time.perf_counter()
+    client.generate("p", model="slow", agent="quiz")
+    assert time.perf_counter() - start < 0.4
+    assert router.stats()["agents"]["quiz"] == {"hedges": 1, "hedge_wins": 1, "failovers": 0}
+
+
+def test_router_prefers_the_measured_fastest_acceptable_model():
+    router = make_router()
+    for _ in range(3):
+        router.observe("models/slow", 0.5, ok=True)
+        router.observe("models/fast", 0.05, ok=True)
+    assert router.rank("quiz", "models/slow") == ["models/fast", "models/slow"]
+
+    for _ in range(5):
+        router.observe("models/fast", 0.05, ok=False)
+    assert router.rank("quiz", "models/slow")[0] == "models/slow"
+
+
+def test_rate_limited_primary_fails_over_to_alternate():
+    def factory(name):
+        def generate_content(prompt, **kwargs):
+            if name == "models/slow":
+                raise RuntimeError("429 Resource exhausted")
+            return SimpleNamespace(text=f"{name}:{prompt}", usage_metadata=None)
+        return SimpleNamespace(generate_content=generate_content)
+
+    router = make_router()
+    client = LLMClient(api_key="k", model_factory=factory, max_retries=0, router=router, cache_mode="off")
+    assert client.generate("p", model="slow", agent="quiz") == "models/fast:p"
+    assert router.stats()["agents"]["quiz"]["failovers"] == 1
+
+
+def test_parse_routes():
+    assert parse_routes("quiz=a, b;roadmap=c;") == {"quiz": ["a", "b"], "roadmap": ["c"]}
+
+
+def test_losing_hedge_stops_retrying_once_the_winner_returns():
+    calls = []
+
+    def factory(name):
+        def generate_content(prompt, **kwargs):
+            if name == "models/slow":
+                calls.append(name)
+                time.sleep(0.1)
+                raise RuntimeError("503 Service unavailable")
+            return SimpleNamespace(text=f"{name}:{prompt}", usage_metadata=None)
+        return SimpleNamespace(generate_content=generate_content)
+
+    router = make_router(hedge_after_s=0.05)
+    client = LLMClient(
+        api_key="k", model_factory=factory, max_retries=10, backoff_base=0.01, backoff_max=0.01,
+        router=router, cache_mode="off",
+    )
+    assert client.generate("p", model="slow", agent="quiz") == "models/fast:p"
+    time.sleep(0.3)  # the primary's first attempt fails after the hedge won: no retries follow
+    assert calls == ["models/slow"]
+    assert router.stats()["models"]["models/slow"]["error_rate"] == 1.0
@@ -0,0 +1,75 @@
+import json
+from pathlib import Path
+
+import numpy as np
+from starlette.applications import Starlette
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app import serialization
+from app.schemas import CourseItem, CourseRecommendations
+from app.serialization import ORJSONResponse, dump_model, dumps, dumps_text, loads, to_document
+from app.workspace import atomic_write_json
+
+
+def make_recs():
+    return CourseRecommendations(
+        user_id="u1",
+        items=[CourseItem(provider="coursera", course_id="c1", title="Données & ML", url="https://x", mapped_skills=["ml"])],
+    )
+
+
+def test_dumps_is_compact_utf8_and_matches_stdlib():
+    data = {"roadmap": [{"week": 1, "title": "Données", "skills": ["sql"]}], "score": 0.5}
+    out = dumps(data, pretty=False)
+    assert out == json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    assert loads(out) == data
+
+
+def test_pretty_is_opt_in(monkeypatch):
+    data = {"a": [1, 2]}
+    monkeypatch.setattr(serialization, "PRETTY", False)
+    assert b"\n" not in dumps(data)
+    monkeypatch.setattr(serialization, "PRETTY", True)
+    assert dumps(data) == b'{\n  "a": [\n    1,\n    2\n  ]\n}'
+    assert b"\n" not in dumps_text(data, pretty=False).encode()
+
+
+def test_models_paths_sets_numpy_and_int_keys():
+    recs = make_recs()
+    out = loads(dumps({"recs": recs, "path": Path("/tmp/x"), "tags": {"a"}, "n": np.float32(1.5), 3: "k"}, pretty=False))
+    assert out == {"recs": recs.model_dump(), "path": "/tmp/x", "tags": ["a"], "n": 1.5, "3": "k"}
+    assert loads(dump_model(recs, pretty=False)) == recs.model_dump()
+    assert dumps(recs, pretty=False) == dump_model(recs, pretty=False)
+    assert to_document(recs) == recs.model_dump(mode="json")
+
+
+def test_unknown_types_raise_unless_default_given():
+    class Thing:
+        def __str__(self):
+            return "thing"
+
+    try:
+        dumps({"x": Thing()})
+    except TypeError:
+        pass
+    else:
+        raise AssertionError("expected TypeError")
+    assert dumps({"x": Thing()}, pretty=False, default=str) == b'{"x":"thing"}'
+
+
+def test_atomic_write_json_round_trips(tmp_path):
+    path = tmp_path / "out" / "quiz.json"
+    atomic_write_json(path, {"name": "Zoë"}, pretty=False)
+    assert path.read_bytes() == '{"name":"Zoë"}'.encode("utf-8")
+    assert list(path.parent.iterdir()) == [path]
+
+
+def test_orjson_response_renders_content():
+    async def endpoint(request):
+        return ORJSONResponse({"recs": make_recs(), "ok": True})
+
+    client = TestClient(Starlette(routes=[Route("/", endpoint)]))
+    resp = client.get("/")
+    assert resp.headers["content-type"] == "application/json"
+    assert resp.json()["recs"]["items"][0]["title"] == "Données & ML"
@@ -0,0 +1,66 @@
+import threading
+
+from app.integrations.storage import DELETE, SQLiteBackend, apply_update, field_path
+
+
+def test_upserts_replace_documents_and_persist(tmp_path):
+    db = SQLiteBackend(tmp_path / "docs.sqlite")
+    db.upsert_many([(("pcps", "u1"), {"v": 1}), (("roadmaps", "u1"), {"v": 1})])
+    db.upsert_many([(("pcps", "u1"), {"v": 2, "name": "Zoë"})])
+    db.close()
+    reopened = SQLiteBackend(tmp_path / "docs.sqlite")
+    assert reopened.get_many([("pcps", "u1"), ("roadmaps", "u1"), ("pcps", "u2")]) == {
+        ("pcps", "u1"): {"v": 2, "name": "Zoë"},
+        ("roadmaps", "u1"): {"v": 1},
+        ("pcps", "u2"): None,
+    }
+    assert reopened.count() == 2 and reopened.count("pcps") == 1
+
+
+def test_bulk_lookup_across_chunks_and_pagination(tmp_path):
+    db = SQLiteBackend(tmp_path / "docs.sqlite")
+    db.upsert_many([(("pcps", f"u{i:05d}"), {"i": i}) for i in range(1200)])
+    keys = [("pcps", f"u{i:05d}") for i in range(0, 1300, 1)]
+    found = db.get_many(keys)
+    assert sum(doc is not None for doc in found.values()) == 1200
+    assert found[("pcps", "u01199")] == {"i": 1199}
+    first = db.user_ids("pcps", limit=500)
+    second = db.user_ids("pcps", after=first[-1], limit=1000)
+    assert first[0] == "u00000" and len(first) == 500 and len(second) == 700
+    assert db.user_ids("roadmaps") == []
+
+
+def test_concurrent_writers_use_their_own_connections(tmp_path):
+    db = SQLiteBackend(tmp_path / "docs.sqlite")
+
+    def write(t):
+        for i in range(50):
+            db.upsert_many([(("mentor", f"t{t}-{i}"), {"t": t, "i": i})])
+
+    threads = [threading.Thread(target=write, args=(t,)) for t in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert db.count("mentor") == 200
+
+
+def test_field_path_updates_patch_stored_documents(tmp_path):
+    db = SQLiteBackend(tmp_path / "docs.sqlite")
+    db.write_many([(("roadmaps", "u1"), {"version": 1, "milestones": {"m1": {"t": 1}, "m2": {"t": 2}}})])
+    db.write_many(
+        [(("pcps", "u1"), {"v": 1})],
+        [(("roadmaps", "u1"), {("version",): 2, ("milestones", "m1"): DELETE, ("milestones", "m3"): {"t": 3}})],
+    )
+    assert db.get_many([("roadmaps", "u1")])[("roadmaps", "u1")] == {
+        "version": 2,
+        "milestones": {"m2": {"t": 2}, "m3": {"t": 3}},
+    }
+    assert db.count() == 2
+
+
+def test_field_paths_quote_non_identifier_segments():
+    assert field_path(("milestones", "m2")) == "milestones.m2"
+    assert field_path(("items", "coursera:c-1")) == "items.`coursera:c-1`"
+    assert field_path(("a", "x`y")) == "a.`x\\`y`"
+    assert apply_update({"a": {"b": 1}}, {("a", "c"): 2, ("d", "e"): 3}) == {"a": {"b": 1, "c": 2}, "d": {"e": 3}}
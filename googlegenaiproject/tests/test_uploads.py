@@ -0,0 +1,46 @@
+import asyncio
+import io
+
+import pytest
+from starlette.datastructures import UploadFile
+
+from app.agents.registry import get_agent
+from app.build_cache import StageCache
+from app.uploads import UploadTooLarge, resume_parse_cached, save_upload
+from app.workspace import RunContext, use_run
+
+
+def upload(data, name="cv.txt"):
+    return UploadFile(io.BytesIO(data), filename=name)
+
+
+def test_identical_bytes_are_deduplicated(tmp_path):
+    first = asyncio.run(save_upload(upload(b"python sql"), tmp_path, 1024))
+    again = asyncio.run(save_upload(upload(b"python sql", "renamed.txt"), tmp_path, 1024))
+    other = asyncio.run(save_upload(upload(b"java"), tmp_path, 1024))
+    assert not first.duplicate and again.duplicate
+    assert again.upload_id == first.upload_id == f"{first.sha256}.txt"
+    assert other.upload_id != first.upload_id
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted([first.upload_id, other.upload_id])
+
+
+def test_size_cap_and_type_are_enforced(tmp_path):
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(save_upload(upload(b"x" * 2048), tmp_path, 1024))
+    with pytest.raises(ValueError):
+        asyncio.run(save_upload(upload(b"x", "cv.exe"), tmp_path, 1024))
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_parse_cached_follows_resume_stage_cache(tmp_path):
+    stored = asyncio.run(save_upload(upload(b"python sql"), tmp_path / "uploads", 1024))
+    cache = StageCache(tmp_path / "cache")
+    assert not resume_parse_cached(stored.path, cache)
+
+    run = RunContext("r1", tmp_path / "run", sources={"resume": str(stored.path)})
+    run.outputs_dir.mkdir(parents=True)
+    (run.outputs_dir / "resume_skills.json").write_text("{}")
+    spec = get_agent("resume")
+    with use_run(run):
+        cache.store(spec, cache.key(spec, run.outputs_dir), run.outputs_dir)
+    assert resume_parse_cached(stored.path, cache)
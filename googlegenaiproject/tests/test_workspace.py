@@ -0,0 +1,82 @@
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from app.agents import registry
+from app.agents.registry import AgentRunner, AgentSpec
+from app.workspace import atomic_write_json, get_run, list_runs, new_run, outputs_dir, source_path, use_run
+
+
+@pytest.fixture(autouse=True)
+def runs_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("RUNS_DIR", str(tmp_path / "runs"))
+    return tmp_path / "runs"
+
+
+def test_new_run_creates_isolated_workspace_with_inputs():
+    run = new_run(inputs={"quiz_input": {"user_id": "u1", "answers": {"1": "a"}}})
+    assert run.outputs_dir.is_dir()
+    with use_run(run):
+        assert outputs_dir() == run.outputs_dir
+        assert json.loads(source_path("quiz_input").read_text())["user_id"] == "u1"
+        assert source_path("resume").name.endswith(".pdf")  # not overridden -> sample
+    assert get_run(run.run_id).sources == run.sources
+    with pytest.raises(KeyError):
+        get_run("../etc")
+    with pytest.raises(ValueError):
+        new_run(sources={"nope": "x"})
+
+
+def test_concurrent_runs_write_to_their_own_outputs(monkeypatch):
+    barrier = threading.Barrier(2, timeout=5)
+
+    def agent():
+        barrier.wait()  # both runs are in flight at the same time
+        atomic_write_json(outputs_dir() / "echo.json", {"dir": str(outputs_dir())})
+
+    monkeypatch.setitem(registry.AGENTS, "echo", AgentSpec("echo", "app.agents.registry", "_agent_echo", ("echo.json",)))
+    monkeypatch.setattr(registry, "_agent_echo", agent, raising=False)
+    runner = AgentRunner(mode="inprocess", workers=2)
+    a, b = new_run("run-a"), new_run("run-b")
+    try:
+        futures = []
+        for run in (a, b):
+            with use_run(run):
+                futures.append(runner.submit("echo"))
+        results = [f.result() for f in futures]
+    finally:
+        runner.shutdown()
+    for run, result in zip((a, b), results):
+        assert json.loads((run.outputs_dir / "echo.json").read_text()) == {"dir": str(run.outputs_dir)}
+        assert result.output_path() == str(run.outputs_dir / "echo.json")
+
+
+def test_atomic_write_leaves_no_temp_files(tmp_path):
+    target = tmp_path / "out" / "x.json"
+    atomic_write_json(target, {"a": 1})
+    atomic_write_json(target, {"a": 2})
+    assert json.loads(target.read_text()) == {"a": 2}
+    assert [p.name for p in target.parent.iterdir()] == ["x.json"]
+
+
+def _aged(run, days):
+    stamp = time.time() - days * 86400
+    os.utime(run.root / "run.json", (stamp, stamp))
+
+
+def test_old_runs_are_pruned_and_listing_is_paginated(monkeypatch):
+    monkeypatch.setenv("RUNS_KEEP", "3")
+    runs = []
+    for age in (10, 3, 2, 1):
+        runs.append(new_run())
+        _aged(runs[-1], age)
+    # the 10-day-old run went on the next new_run (older than 7 days); keep=3 holds the rest
+    assert not runs[0].root.exists()
+    latest = new_run()
+    assert not runs[1].root.exists()  # fourth newest
+    assert [r.run_id for r in list_runs()] == [latest.run_id, runs[3].run_id, runs[2].run_id]
+    assert [r.run_id for r in list_runs(limit=2, offset=1)] == [runs[3].run_id, runs[2].run_id]
+    assert list_runs(limit=2, offset=3) == []